@@ -0,0 +1,72 @@
+"""Helpers shared by the benchmark scripts."""
+
+import time
+import typing
+
+from cryptography.fernet import Fernet
+from starlette.types import Message, Scope
+
+SECRET = "3xmPiROFJO2Kj4lu-UNQ5ap-5XsxOyv1LGep2xTp1L8="
+SESSION_ID = "6428b4c1-c360-4605-9318-ed99371b7bd6"
+
+
+def create_signer(secret: str = SECRET) -> Fernet:
+    """Create a signer for session cookies."""
+    return Fernet(secret.encode("utf-8"))
+
+
+def http_scope(
+    path: str = "/", cookies: typing.Optional[typing.Dict[str, str]] = None
+) -> Scope:
+    """Build a minimal ASGI scope for an HTTP request."""
+    headers = []
+    if cookies:
+        headers.append(
+            (
+                b"cookie",
+                "; ".join(f"{k}={v}" for k, v in cookies.items()).encode("latin-1"),
+            )
+        )
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def measure(
+    func: typing.Callable[[], typing.Awaitable[typing.Any]],
+    number: int = 1000,
+    repeat: int = 5,
+) -> float:
+    """Return the best average time of a call (in seconds) out of several runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings)
+
+
+def report(title: str, results: typing.Dict[str, float]) -> None:
+    """Print timings of benchmark cases in microseconds."""
+    print(title)
+    for name, seconds in results.items():
+        print(f"  {name:<40} {seconds * 1e6:>10.2f} us")
@@ -0,0 +1,50 @@
+"""Compare throughput of value encryptors on small, medium and large values.
+
+Run it with ``python -m benchmarks.aead``.
+"""
+
+import timeit
+
+from fastapi_session import AES_SIV_Encryptor
+from fastapi_session.encryptors import AEADEncryptor
+from fastapi_session.enums import EncryptorEnum
+
+from ._utils import SECRET, SESSION_ID
+
+SIZES = (100, 4 * 1024, 64 * 1024)
+KEY = b"namespace:key"
+
+
+def main() -> None:
+    legacy = AES_SIV_Encryptor(SECRET, SESSION_ID)
+    # Fall back to a new pycryptodome cipher per message
+    legacy._siv = None
+    encryptors = {
+        "AES-SIV pycryptodome": legacy,
+        "AES-SIV cryptography": AES_SIV_Encryptor(SECRET, SESSION_ID),
+        "ChaCha20-Poly1305": AEADEncryptor(
+            SECRET, SESSION_ID, algorithm=EncryptorEnum.chacha20_poly1305
+        ),
+        "AES-GCM-SIV": AEADEncryptor(
+            SECRET, SESSION_ID, algorithm=EncryptorEnum.aes_gcm_siv
+        ),
+    }
+    print("Encrypt and decrypt a value, MB/s")
+    print(f"  {'':<24}" + "".join(f"{size:>10} B" for size in SIZES))
+    for name, encryptor in encryptors.items():
+        row = []
+        for size in SIZES:
+            value = "x" * size
+            number = max(10, 2 * 1024 * 1024 // size)
+
+            def roundtrip() -> None:
+                (message,) = encryptor.encrypt_many([value], [KEY])
+                encryptor.decrypt_many([message], [KEY])
+
+            seconds = min(timeit.repeat(roundtrip, number=number, repeat=3))
+            row.append(size * number / seconds / 1e6)
+        print(f"  {name:<24}" + "".join(f"{value:>12.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Measure the end-to-end cost of user sessions per request through an ASGI transport.
+
+An app with the routes of ``examples/filesystem`` and ``examples/redis`` is driven
+in process by an httpx client for every backend in three scenarios:
+
+- ``no_cookie``: a request without a session cookie passes through the middleware
+- ``cookie_only``: a session cookie is decoded and a session is loaded untouched
+- ``read_write``: a counter is read from a session and written back
+
+Every scenario reports requests per second, p50/p95/p99 latencies and allocations
+per request, the peak of memory allocated while a request runs is measured
+in a separate pass, since tracemalloc slows requests down.
+Redis runs against the in-process FakeRedis unless a server URL is passed.
+
+Run it with ``python -m benchmarks.asgi [--output results.json] [--compare base.json]``,
+results are printed and written as JSON.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import httpx
+from aioredis import create_redis_pool
+from fastapi import Depends, FastAPI, Response
+
+from fastapi_session import (
+    AsyncSession,
+    BackendImportException,
+    COOKIE_BACKEND_TYPE,
+    DATABASE_BACKEND_TYPE,
+    FS_BACKEND_TYPE,
+    MEMORY_BACKEND_TYPE,
+    REDIS_BACKEND_TYPE,
+    TIERED_REDIS_BACKEND_TYPE,
+    SessionSettings,
+    TieredRedisBackend,
+    encrypt_session,
+    get_user_session,
+)
+from fastapi_session.adapters.fastapi import connect
+from fastapi_session.backends import create_database
+
+from tests.fakes import FakeRedis
+
+from ._utils import SECRET, create_signer
+
+SESSIONS = 100
+SCENARIOS = ("no_cookie", "cookie_only", "read_write")
+BACKENDS = ("fs", "memory", "redis", "tiered_redis", "database", "cookie")
+
+
+def create_app(
+    settings: SessionSettings, adapter: typing.Optional[typing.Any] = None
+) -> FastAPI:
+    """Create an app connected to a session backend like the examples are."""
+    app = FastAPI()
+    connect(
+        app=app,
+        secret=SECRET,
+        signer=create_signer(),
+        settings=settings,
+        backend_adapter_loader=(lambda app: adapter) if adapter is not None else None,
+    )
+
+    @app.get("/")
+    async def index() -> Response:
+        return Response()
+
+    @app.get("/session/")
+    async def load(session: AsyncSession = Depends(get_user_session)) -> Response:
+        return Response()
+
+    @app.post("/visit/")
+    async def visit(session: AsyncSession = Depends(get_user_session)) -> Response:
+        (visits,) = await session.get("visits")
+        await session.set("visits", (visits or 0) + 1)
+        return Response()
+
+    return app
+
+
+@contextlib.asynccontextmanager
+async def backend_app(
+    name: str,
+    directory: str,
+    redis_url: typing.Optional[str] = None,
+    redis_latency: float = 0.0,
+) -> typing.AsyncIterator[typing.Optional[FastAPI]]:
+    """Create an app for a backend and release its connections afterwards.
+
+    :param name: A name of a benchmarked backend
+    :param directory: A directory of session files and databases
+    :param redis_url: A URL of a redis server, FakeRedis is used if it is missing
+    :param redis_latency: A round trip time (in seconds) emulated by FakeRedis
+    :return: An app or None if a backend isn't available
+    """
+    if name == "fs":
+        settings = SessionSettings(
+            SESSION_BACKEND=FS_BACKEND_TYPE, SESSION_FS_STORAGE_PATH=directory
+        )
+        yield create_app(settings)
+    elif name == "memory":
+        yield create_app(SessionSettings(SESSION_BACKEND=MEMORY_BACKEND_TYPE))
+    elif name == "cookie":
+        yield create_app(SessionSettings(SESSION_BACKEND=COOKIE_BACKEND_TYPE))
+    elif name in ("redis", "tiered_redis"):
+        if redis_url:
+            redis = await create_redis_pool(redis_url)
+        else:
+            redis = FakeRedis(latency=redis_latency)
+        backend = REDIS_BACKEND_TYPE if name == "redis" else TIERED_REDIS_BACKEND_TYPE
+        app = create_app(SessionSettings(SESSION_BACKEND=backend), redis)
+        yield app
+        if isinstance(app.session._backend, TieredRedisBackend):
+            await app.session._backend.close()
+        redis.close()
+        await redis.wait_closed()
+    elif name == "database":
+        try:
+            database = create_database(f"sqlite:///{directory}/sessions.db")
+        except BackendImportException:  # databases is an optional dependency
+            yield None
+            return
+        await database.connect()
+        await database.execute("PRAGMA journal_mode=wal")
+        yield create_app(
+            SessionSettings(SESSION_BACKEND=DATABASE_BACKEND_TYPE), database
+        )
+        await database.disconnect()
+    else:
+        raise ValueError(f"Unknown backend {name}")
+
+
+def percentile(quantiles: typing.List[float], value: int) -> float:
+    return round(quantiles[value - 1] * 1e3, 4)
+
+
+async def run_scenario(
+    app: FastAPI, scenario: str, requests: int, concurrency: int
+) -> typing.Dict[str, typing.Any]:
+    """Send requests of a scenario and measure their latencies and allocations."""
+    signer = create_signer()
+    cookie_name = app.session.cookie_name
+    # Every simulated client keeps cookies of its own session
+    jars = [
+        {cookie_name: encrypt_session(signer, f"session-{index}")}
+        for index in range(SESSIONS)
+    ]
+    method, path = {
+        "no_cookie": ("GET", "/"),
+        "cookie_only": ("GET", "/session/"),
+        "read_write": ("POST", "/visit/"),
+    }[scenario]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+
+        async def request(index: int) -> float:
+            jar = jars[index % SESSIONS]
+            headers = {}
+            if scenario != "no_cookie":
+                headers["cookie"] = "; ".join(f"{k}={v}" for k, v in jar.items())
+            started = time.perf_counter()
+            response = await client.request(method, path, headers=headers)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"{method} {path} failed with {response.status_code}"
+                )
+            jar.update(response.cookies)
+            return elapsed
+
+        async def run(count: int) -> typing.List[float]:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited(index: int) -> float:
+                async with semaphore:
+                    return await request(index)
+
+            return await asyncio.gather(*(limited(index) for index in range(count)))
+
+        # Warm up caches, connections and session data
+        await run(min(requests, SESSIONS * 2))
+        started = time.perf_counter()
+        latencies = await run(requests)
+        elapsed = time.perf_counter() - started
+
+        allocations, number = [], max(requests // 10, 10)
+        tracemalloc.start()
+        for index in range(number):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await request(index)
+            allocations.append(tracemalloc.get_traced_memory()[1] - current)
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": requests,
+        "rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "p50": percentile(quantiles, 50),
+            "p95": percentile(quantiles, 95),
+            "p99": percentile(quantiles, 99),
+        },
+        "peak_alloc_bytes": round(statistics.mean(allocations)),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "redis": args.redis_url or f"FakeRedis ({args.redis_latency} ms)",
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.backends:
+            async with backend_app(
+                name, directory, args.redis_url, args.redis_latency / 1e3
+            ) as app:
+                if app is None:
+                    print(f"{name}: skipped, the backend isn't available")
+                    continue
+                await app.router.startup()
+                report["results"][name] = results = {}
+                for scenario in args.scenarios:
+                    results[scenario] = result = await run_scenario(
+                        app, scenario, args.requests, args.concurrency
+                    )
+                    latency = result["latency_ms"]
+                    print(
+                        f"  {name:<14} {scenario:<12} {result['rps']:>9.0f} req/s"
+                        f"  p50 {latency['p50']:.3f} p95 {latency['p95']:.3f}"
+                        f" p99 {latency['p99']:.3f} ms"
+                        f"  {result['peak_alloc_bytes']:>8} B/request"
+                    )
+    if args.compare:
+        compare(report, json.loads(open(args.compare).read()))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def compare(report: typing.Dict[str, typing.Any], base: typing.Dict[str, typing.Any]):
+    """Print changes of throughput and latencies relative to a previous run."""
+    print("Changes relative to the base run")
+    for name, results in report["results"].items():
+        for scenario, result in results.items():
+            previous = base["results"].get(name, {}).get(scenario)
+            if previous is None:
+                continue
+            rps = result["rps"] / previous["rps"] - 1
+            p99 = result["latency_ms"]["p99"] / previous["latency_ms"]["p99"] - 1
+            print(f"  {name:<14} {scenario:<12} rps {rps:+.1%}  p99 {p99:+.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--redis-url", help="A redis server, FakeRedis by default")
+    parser.add_argument(
+        "--redis-latency",
+        type=float,
+        default=0.0,
+        help="A round trip time in milliseconds emulated by FakeRedis",
+    )
+    parser.add_argument("--output", help="A file results are written to as JSON")
+    parser.add_argument("--compare", help="A JSON file of a previous run")
+    asyncio.run(main(parser.parse_args()))
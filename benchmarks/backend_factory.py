@@ -0,0 +1,83 @@
+"""Measure the per-request cost of resolving a session backend in SessionMiddleware.
+
+Run it with ``python -m benchmarks.backend_factory``.
+"""
+
+import asyncio
+import typing
+
+from fastapi_session import (
+    AsyncSession,
+    REDIS_BACKEND_TYPE,
+    SessionManager,
+    SessionMiddleware,
+    SessionSettings,
+    create_backend,
+    create_namespace,
+    encrypt_session,
+)
+from starlette.types import Receive, Scope, Send
+
+from ._utils import (
+    SECRET,
+    SESSION_ID,
+    create_signer,
+    http_scope,
+    measure,
+    receive,
+    report,
+    send,
+)
+
+
+class LegacySessionManager(SessionManager):
+    """A session manager importing a backend class on every request."""
+
+    async def load_session(
+        self, request: typing.Any, session_id: typing.Hashable
+    ) -> AsyncSession:
+        return await AsyncSession.create(
+            encryptor=self.encryptor,
+            namespace=create_namespace(encryptor=self.encryptor, session_id=session_id),
+            backend=await create_backend(
+                self._settings.SESSION_BACKEND,
+                adapter=self._backend_adapter,
+                loop=self._loop,
+            ),
+            loop=self._loop,
+        )
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await scope["session"].materialize()
+
+
+async def main() -> None:
+    signer = create_signer()
+    settings = SessionSettings(SESSION_BACKEND=REDIS_BACKEND_TYPE)
+    scope = http_scope(
+        cookies={settings.SESSION_COOKIE_NAME: encrypt_session(signer, SESSION_ID)}
+    )
+    results = {}
+    for name, klass in (
+        ("import a backend per request", LegacySessionManager),
+        ("cached backend factory", SessionManager),
+    ):
+        manager = klass(
+            secret=SECRET,
+            signer=signer,
+            settings=settings,
+            # The backend never touches the adapter during the benchmark
+            backend_adapter=object(),
+        )
+        middleware = SessionMiddleware(endpoint, manager=manager)
+        results[name] = await measure(
+            lambda: middleware(dict(scope), receive, send), number=2000
+        )
+    report("SessionMiddleware.__call__ with a session cookie", results)
+    legacy, cached = results.values()
+    print(f"  saving per request: {(legacy - cached) * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
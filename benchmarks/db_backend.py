@@ -0,0 +1,79 @@
+"""Compare throughput of DBBackend on SQLite, FSBackend and MemoryBackend.
+
+Every request reads three keys and writes two keys of one of many sessions,
+requests run concurrently. The database backend is shared between sessions,
+the filesystem backend is created for every request as the session manager does.
+SQLite commits every statement, so it is measured with the default rollback
+journal and with write-ahead logging. MemoryBackend is a baseline without I/O.
+
+Run it with ``python -m benchmarks.db_backend``.
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi_session import DBBackend, FSBackend, MemoryBackend, SessionSettings
+
+SESSIONS = 100
+REQUESTS = 2000
+CONCURRENCY = 20
+VALUE = "x" * 128
+
+
+async def handle(backend, session_id: str) -> None:
+    await backend.get(
+        f"{session_id}:user_id", f"{session_id}:cart", f"{session_id}:locale"
+    )
+    await backend.update({f"{session_id}:cart": VALUE, f"{session_id}:visited": VALUE})
+    await backend.persist()
+
+
+async def run(name: str, factory) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(index: int) -> None:
+        session_id = f"session{index % SESSIONS}"
+        async with semaphore:
+            await handle(await factory(session_id), session_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(index) for index in range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {name:<32} {REQUESTS / elapsed:>10.0f} requests/s"
+        f" {elapsed / REQUESTS * 1e3:>8.3f} ms/request"
+    )
+
+
+async def main() -> None:
+    print(f"{REQUESTS} requests to {SESSIONS} sessions, {CONCURRENCY} at once")
+    with tempfile.TemporaryDirectory() as directory:
+        settings = SessionSettings(SESSION_FS_STORAGE_PATH=directory)
+
+        async def fs_factory(session_id: str) -> FSBackend:
+            return await FSBackend.create(session_id, settings=settings)
+
+        await run("FSBackend", fs_factory)
+
+        async def memory_factory(session_id: str) -> MemoryBackend:
+            return await MemoryBackend.create(session_id, settings=settings)
+
+        await run("MemoryBackend", memory_factory)
+
+        for journal_mode in ("delete", "wal"):
+            backend = await DBBackend.create(
+                f"sqlite:///{Path(directory) / f'sessions-{journal_mode}.db'}"
+            )
+            await backend.adapter.execute(f"PRAGMA journal_mode={journal_mode}")
+
+            async def db_factory(session_id: str) -> DBBackend:
+                return backend
+
+            await run(f"DBBackend (SQLite, {journal_mode})", db_factory)
+            await backend.adapter.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Compare redis memory and network usage of legacy and compact encrypted sessions.
+
+A corpus of sessions with typical keys is written with buffered writes through
+the redis backend to an in-process redis stand-in. Stored bytes are summed over
+keys and values, network bytes are the size of RESP encoded MSET commands.
+
+Run it with ``python -m benchmarks.encryption_size``.
+"""
+
+import asyncio
+import random
+import uuid
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    AsyncSession,
+    RedisBackend,
+    create_namespace,
+)
+
+from tests.fakes import FakeRedis
+
+from ._utils import SECRET
+
+SESSIONS = 1000
+
+
+def session_data(rng: random.Random) -> dict:
+    return {
+        "user_id": rng.randrange(10**6),
+        "csrf_token": "%032x" % rng.getrandbits(128),
+        "locale": rng.choice(["en", "de", "fr", "uk"]),
+        "cart": [
+            {"sku": "%08x" % rng.getrandbits(32), "quantity": rng.randint(1, 5)}
+            for _ in range(rng.randint(0, 6))
+        ],
+        "flash": rng.choice([[], ["Your order has been placed."]]),
+        "visited": rng.random() > 0.5,
+    }
+
+
+def resp_size(*args: bytes) -> int:
+    """Get a size of a RESP encoded command."""
+    size = len(f"*{len(args)}\r\n")
+    for arg in args:
+        size += len(f"${len(arg)}\r\n") + len(arg) + 2
+    return size
+
+
+async def run(compact: bool) -> None:
+    rng = random.Random(0)
+    redis = FakeRedis()
+    backend = await RedisBackend.create(redis)
+    encryptor = AES_SIV_Encryptor(SECRET, "salt", compact=compact)
+    plain, network = 0, 0
+    for _ in range(SESSIONS):
+        session = await AsyncSession.create(
+            create_namespace(encryptor, str(uuid.UUID(int=rng.getrandbits(128)))),
+            encryptor,
+            backend,
+            buffered=True,
+        )
+        data = session_data(rng)
+        plain += sum(len(key) + len(repr(value)) for key, value in data.items())
+        await session.update(data)
+        before = set(redis._data)
+        await session.commit()
+        written = [(key, redis._data[key]) for key in set(redis._data) - before]
+        network += resp_size(b"MSET", *(part for item in written for part in item))
+
+    stored = sum(len(key) + len(value) for key, value in redis._data.items())
+    name = "compact" if compact else "legacy"
+    print(
+        f"  {name:<8} {stored / SESSIONS:>8.0f} B stored/session"
+        f" {network / SESSIONS:>8.0f} B sent/session"
+        f" {stored / plain:>6.2f}x of plaintext"
+    )
+
+
+async def main() -> None:
+    print(f"{SESSIONS} sessions with 6 keys each")
+    for compact in (False, True):
+        await run(compact)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Measure contention of processes reading and writing the same session file.
+
+Legacy storage locks a session file exclusively for both reads and in-place writes,
+the current one reads without locks and replaces a file atomically on writes.
+
+Run it with ``python -m benchmarks.fs_contention``.
+"""
+
+import multiprocessing
+import pickle
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import portalocker
+
+from fastapi_session.backends._mixins import FileStorageMixin
+
+READERS = 4
+WRITERS = 1
+DURATION = 2.0
+SESSION_ID = "6428b4c1-c360-4605-9318-ed99371b7bd6"
+DATA = {f"key-{index}": "x" * 256 for index in range(32)}
+
+
+class LegacyStorage(FileStorageMixin):
+    """A storage locking a session file exclusively for reads and writes."""
+
+    def read(self) -> dict:
+        with portalocker.Lock(self.source, "rb", flags=portalocker.LOCK_EX) as fp:
+            return pickle.load(fp)
+
+    def write(self, data: dict) -> None:
+        with portalocker.Lock(self.source, "wb", flags=portalocker.LOCK_EX) as fp:
+            pickle.dump(obj=data, file=fp)
+
+
+class AtomicStorage(FileStorageMixin):
+    """A storage reading without locks and replacing a session file atomically."""
+
+    def read(self) -> dict:
+        return self._FileStorageMixin__load()
+
+    def write(self, data: dict) -> None:
+        self._FileStorageMixin__save(data)
+
+
+def worker(storage_class, storage_path, role, deadline, results) -> None:
+    storage = storage_class(SESSION_ID, Path(storage_path))
+    latencies, errors = [], 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == "reader":
+                storage.read()
+            else:
+                storage.write(DATA)
+        except (EOFError, pickle.UnpicklingError):
+            # A torn file has been read
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    results.put((role, latencies, errors))
+
+
+def run(storage_class) -> None:
+    with tempfile.TemporaryDirectory() as storage_path:
+        storage_class(SESSION_ID, Path(storage_path)).write(DATA)
+        results = multiprocessing.Queue()
+        deadline = time.time() + DURATION
+        processes = [
+            multiprocessing.Process(
+                target=worker,
+                args=(storage_class, storage_path, role, deadline, results),
+            )
+            for role in ["reader"] * READERS + ["writer"] * WRITERS
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    print(storage_class.__doc__)
+    for role in ("reader", "writer"):
+        latencies = [
+            latency
+            for name, timings, _ in collected
+            if name == role
+            for latency in timings
+        ]
+        errors = sum(errors for name, _, errors in collected if name == role)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"  {role}s: {len(latencies) / DURATION:>9.0f} ops/s"
+            f"  p50 {quantiles[49] * 1e6:>8.1f}us  p99 {quantiles[98] * 1e6:>8.1f}us"
+            f"  torn reads {errors}"
+        )
+
+
+def main() -> None:
+    print(f"{READERS} readers and {WRITERS} writer(s) during {DURATION}s")
+    for storage_class in (LegacyStorage, AtomicStorage):
+        run(storage_class)
+
+
+if __name__ == "__main__":
+    main()
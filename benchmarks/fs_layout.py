@@ -0,0 +1,81 @@
+"""Measure open/stat latency of session files against a directory population.
+
+Run it with ``python -m benchmarks.fs_layout [population ...]``.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from fastapi_session.backends._mixins import shard_parts
+
+POPULATIONS = (1_000, 10_000, 100_000)
+DEPTHS = (0, 1, 2)
+LOOKUPS = 5_000
+
+
+def populate(storage_path: Path, session_ids: list, depth: int) -> None:
+    for session_id in session_ids:
+        path = storage_path.joinpath(*shard_parts(session_id, depth), session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+
+def measure(storage_path: Path, session_ids: list, depth: int) -> tuple:
+    sample = random.sample(session_ids, min(LOOKUPS, len(session_ids)))
+    paths = [
+        storage_path.joinpath(*shard_parts(session_id, depth), session_id)
+        for session_id in sample
+    ]
+
+    started = time.perf_counter()
+    for path in paths:
+        os.stat(path)
+    stat = (time.perf_counter() - started) / len(paths)
+
+    started = time.perf_counter()
+    for path in paths:
+        with open(path, "rb") as fp:
+            fp.read()
+    read = (time.perf_counter() - started) / len(paths)
+
+    # A lookup of a missing session file, e.g. for a new session
+    started = time.perf_counter()
+    for session_id in (uuid.uuid4().hex for _ in paths):
+        os.path.exists(
+            storage_path.joinpath(*shard_parts(session_id, depth), session_id)
+        )
+    missing = (time.perf_counter() - started) / len(paths)
+    return stat, read, missing
+
+
+def main(args: argparse.Namespace) -> None:
+    populations = args.populations or POPULATIONS
+    random.seed(0)
+    print(f"{'files':>9} {'depth':>6} {'stat':>10} {'open+read':>10} {'missing':>10}")
+    for population in populations:
+        session_ids = [uuid.uuid4().hex for _ in range(population)]
+        for depth in DEPTHS:
+            with tempfile.TemporaryDirectory() as directory:
+                storage_path = Path(directory)
+                populate(storage_path, session_ids, depth)
+                stat, read, missing = measure(storage_path, session_ids, depth)
+            print(
+                f"{population:>9} {depth:>6} {stat * 1e6:>8.2f}us"
+                f" {read * 1e6:>8.2f}us {missing * 1e6:>8.2f}us"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "populations",
+        nargs="*",
+        type=int,
+        help="Numbers of session files in a storage",
+    )
+    main(parser.parse_args())
@@ -0,0 +1,41 @@
+"""Compare naming of session keys by encryption and by keyed digests.
+
+Run it with ``python -m benchmarks.key_names``.
+"""
+
+import timeit
+
+from fastapi_session import AES_SIV_Encryptor
+from fastapi_session.encryptors import BLAKE2bKeyEncoder, HMACKeyEncoder
+
+from ._utils import SECRET, SESSION_ID
+
+NUMBER = 20000
+KEYS = ("user_id", "cart", SESSION_ID)
+
+
+def main() -> None:
+    strategies = {
+        "AES_SIV_Encryptor.encrypt": AES_SIV_Encryptor(SECRET, SESSION_ID).encrypt,
+        "AES_SIV_Encryptor.encrypt compact": AES_SIV_Encryptor(
+            SECRET, SESSION_ID, compact=True
+        ).encrypt,
+        "HMACKeyEncoder.encode": HMACKeyEncoder(SECRET).encode,
+        "BLAKE2bKeyEncoder.encode": BLAKE2bKeyEncoder(SECRET).encode,
+    }
+    print(f"Naming keys {', '.join(map(repr, KEYS))}")
+    for name, encode in strategies.items():
+        seconds = min(
+            timeit.repeat(
+                lambda: [encode(key) for key in KEYS], number=NUMBER, repeat=5
+            )
+        )
+        lengths = "/".join(str(len(encode(key))) for key in KEYS)
+        print(
+            f"  {name:<36} {seconds / NUMBER / len(KEYS) * 1e6:>8.2f} us/key"
+            f" {lengths:>12} chars"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Micro-benchmarks of encryptors, session cookie signing and value serialization.
+
+Cases run across payload sizes and key counts:
+
+- ``encryptor/<name>``: encrypt, decrypt and batches of encrypt_many/decrypt_many
+  of every EncryptorInterface implementation found at run time
+- ``namespace/<name>``: create_namespace for new and memoized session ids
+- ``cookie``: encrypt_session and decrypt_session (Fernet and pendulum)
+- ``json``: json.dumps and json.loads of session values as AsyncSession does
+
+Implementations are discovered as subclasses of EncryptorInterface, so passing
+``--module`` with a module defining a new encryptor benchmarks it as well.
+An encryptor is created with a secret and a salt unless a factory of its variants
+is registered in VARIANTS.
+
+Every case is timed with an automatically chosen number of calls and the best
+of several repeats is reported in nanoseconds per call, so reports of runs on
+the same machine are comparable. Reports are written as JSON with sorted keys.
+
+Run it with ``python -m benchmarks.micro [--output micro.json] [--compare base.json]``.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import platform
+import statistics
+import timeit
+import typing
+
+import pendulum
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    EncryptorInterface,
+    create_namespace,
+    decrypt_session,
+    encrypt_session,
+)
+from fastapi_session.encryptors import AEADEncryptor
+from fastapi_session.enums import EncryptorEnum
+
+from ._utils import SECRET, SESSION_ID, create_signer
+
+PAYLOAD_SIZES = (64, 1024, 16 * 1024)
+KEY_COUNTS = (1, 16, 256)
+# A number of distinct session ids, it exceeds default namespace caches of encryptors
+NAMESPACES = 4096
+SALT = "fastapi-session-benchmark"
+
+
+def aead_variants() -> typing.Iterator[typing.Tuple[str, EncryptorInterface]]:
+    for algorithm in (EncryptorEnum.chacha20_poly1305, EncryptorEnum.aes_gcm_siv):
+        try:
+            encryptor = AEADEncryptor(SECRET, SALT, algorithm=algorithm)
+        except ValueError:  # AES-GCM-SIV depends on a version of cryptography
+            continue
+        yield f"AEADEncryptor[{algorithm.value}]", encryptor
+
+
+def aes_siv_variants() -> typing.Iterator[typing.Tuple[str, EncryptorInterface]]:
+    yield "AES_SIV_Encryptor", AES_SIV_Encryptor(SECRET, SALT)
+    yield "AES_SIV_Encryptor[compact]", AES_SIV_Encryptor(SECRET, SALT, compact=True)
+
+
+# Factories of encryptors which take more than a secret and a salt to vary
+VARIANTS: typing.Dict[
+    typing.Type[EncryptorInterface],
+    typing.Callable[[], typing.Iterable[typing.Tuple[str, EncryptorInterface]]],
+] = {AEADEncryptor: aead_variants, AES_SIV_Encryptor: aes_siv_variants}
+
+
+def discover_encryptors() -> typing.Dict[str, EncryptorInterface]:
+    """Create every concrete encryptor subclassing EncryptorInterface."""
+    found, pending = {}, list(EncryptorInterface.__subclasses__())
+    while pending:
+        cls = pending.pop(0)
+        pending.extend(cls.__subclasses__())
+        if inspect.isabstract(cls):
+            continue
+        factory = VARIANTS.get(cls)
+        if factory is not None:
+            found.update(factory())
+            continue
+        try:
+            found[cls.__name__] = cls(SECRET, SALT)
+        except Exception as exc:
+            print(f"  {cls.__name__} is skipped, it can't be created: {exc!r}")
+    return dict(sorted(found.items()))
+
+
+class Runner:
+    """A collector of timings of benchmark cases."""
+
+    def __init__(self, budget: float = 0.2, repeat: int = 5):
+        """
+        :param budget: A minimum time (in seconds) of a single repeat of a case
+        :param repeat: A number of repeats, the best one is reported
+        """
+        self.budget = budget
+        self.repeat = repeat
+        self.results: typing.Dict[str, typing.Dict[str, float]] = {}
+
+    def run(self, name: str, func: typing.Callable[[], typing.Any], items: int = 1):
+        """Time a case.
+
+        :param name: A name of a case
+        :param func: A callable running a case once
+        :param items: A number of items processed by a single call
+        """
+        timer = timeit.Timer(func)
+        number, seconds = timer.autorange()
+        number = max(1, round(number * self.budget / seconds))
+        timings = [seconds / number for seconds in timer.repeat(self.repeat, number)]
+        best = min(timings)
+        self.results[name] = result = {
+            "ns": round(best * 1e9, 1),
+            "median_ns": round(statistics.median(timings) * 1e9, 1),
+            "ns_per_item": round(best * 1e9 / items, 1),
+        }
+        print(
+            f"  {name:<64} {result['ns']:>14,.0f} ns"
+            f" {result['ns_per_item']:>12,.0f} ns/item"
+        )
+
+
+def bench_encryptors(
+    runner: Runner, encryptors: typing.Dict[str, EncryptorInterface]
+) -> None:
+    for name, encryptor in encryptors.items():
+        for size in PAYLOAD_SIZES:
+            message = "x" * size
+            encrypted = encryptor.encrypt(message)
+            runner.run(
+                f"encryptor/{name}/encrypt/{size}B", lambda: encryptor.encrypt(message)
+            )
+            runner.run(
+                f"encryptor/{name}/decrypt/{size}B",
+                lambda: encryptor.decrypt(encrypted),
+            )
+        for count in KEY_COUNTS:
+            messages = [f'"value {index}"' for index in range(count)]
+            keys = [
+                f"{SESSION_ID}:key{index}".encode("utf-8") for index in range(count)
+            ]
+            encrypted = encryptor.encrypt_many(messages, keys)
+            runner.run(
+                f"encryptor/{name}/encrypt_many/{count}keys",
+                lambda: encryptor.encrypt_many(messages, keys),
+                count,
+            )
+            runner.run(
+                f"encryptor/{name}/decrypt_many/{count}keys",
+                lambda: encryptor.decrypt_many(encrypted, keys),
+                count,
+            )
+
+
+def bench_namespaces(
+    runner: Runner, encryptors: typing.Dict[str, EncryptorInterface]
+) -> None:
+    session_ids = [f"{SESSION_ID}-{index}" for index in range(NAMESPACES)]
+    for name, encryptor in encryptors.items():
+        ids = itertools.cycle(session_ids)
+        runner.run(
+            f"namespace/{name}/new",
+            lambda: create_namespace(encryptor=encryptor, session_id=next(ids)),
+        )
+        runner.run(
+            f"namespace/{name}/memoized",
+            lambda: create_namespace(encryptor=encryptor, session_id=SESSION_ID),
+        )
+
+
+def bench_cookies(runner: Runner) -> None:
+    signer = create_signer()
+    timestamp = int(pendulum.now().timestamp())
+    token = encrypt_session(signer, SESSION_ID)
+    runner.run(
+        "cookie/encrypt_session/now", lambda: encrypt_session(signer, SESSION_ID)
+    )
+    runner.run(
+        "cookie/encrypt_session/timestamp",
+        lambda: encrypt_session(signer, SESSION_ID, timestamp),
+    )
+    runner.run("cookie/decrypt_session", lambda: decrypt_session(signer, token))
+    runner.run(
+        "cookie/decrypt_session/max_age", lambda: decrypt_session(signer, token, 3600)
+    )
+
+
+def bench_json(runner: Runner) -> None:
+    for size in PAYLOAD_SIZES:
+        value = {"user": SESSION_ID, "items": ["x" * 16] * max(1, size // 20)}
+        dumped = json.dumps(value)
+        runner.run(f"json/dumps/{size}B", lambda: json.dumps(value))
+        runner.run(f"json/loads/{size}B", lambda: json.loads(dumped))
+    for count in KEY_COUNTS:
+        # AsyncSession serializes every value of a session separately
+        values = [{"id": index, "name": f"value {index}"} for index in range(count)]
+        dumped = [json.dumps(value) for value in values]
+        runner.run(
+            f"json/dumps_many/{count}keys",
+            lambda: [json.dumps(value) for value in values],
+            count,
+        )
+        runner.run(
+            f"json/loads_many/{count}keys",
+            lambda: [json.loads(value) for value in dumped],
+            count,
+        )
+
+
+def compare(
+    results: typing.Dict[str, typing.Dict[str, float]],
+    base: typing.Dict[str, typing.Dict[str, float]],
+) -> None:
+    """Print changes of timings relative to a previous run."""
+    print("Changes relative to the base run")
+    for name, result in results.items():
+        if name in base:
+            print(f"  {name:<64} {result['ns'] / base[name]['ns'] - 1:>+8.1%}")
+
+
+def main(args: argparse.Namespace) -> None:
+    for module in args.module:
+        importlib.import_module(module)
+    runner = Runner(budget=args.budget, repeat=args.repeat)
+    groups = set(args.groups)
+    encryptors = discover_encryptors()
+    if "encryptor" in groups:
+        bench_encryptors(runner, encryptors)
+    if "namespace" in groups:
+        bench_namespaces(runner, encryptors)
+    if "cookie" in groups:
+        bench_cookies(runner)
+    if "json" in groups:
+        bench_json(runner)
+
+    if args.compare:
+        with open(args.compare) as base:
+            compare(runner.results, json.load(base)["results"])
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": runner.results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--groups",
+        nargs="+",
+        choices=("encryptor", "namespace", "cookie", "json"),
+        default=("encryptor", "namespace", "cookie", "json"),
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        default=[],
+        help="A module imported before discovering encryptors",
+    )
+    parser.add_argument("--budget", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="A file results are written to as JSON")
+    parser.add_argument("--compare", help="A JSON file of a previous run")
+    main(parser.parse_args())
@@ -0,0 +1,68 @@
+"""Compare round trips and latency of buffered and unbuffered session writes.
+
+A handler changing five keys is emulated against an in-process redis stand-in
+with a fixed latency per round trip.
+
+Run it with ``python -m benchmarks.write_buffering``.
+"""
+
+import asyncio
+import time
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    AsyncSession,
+    RedisBackend,
+    SessionSettings,
+    create_namespace,
+)
+
+from tests.fakes import FakeRedis
+
+from ._utils import SECRET, SESSION_ID
+
+LATENCY = 0.0005
+REQUESTS = 200
+
+
+async def handler(session: AsyncSession) -> None:
+    await session.set("user_id", 42)
+    await session.set("cart", ["apple", "pear"])
+    await session.update({"currency": "EUR", "locale": "en"})
+    await session.delete("flash")
+    await session.set("visited", True)
+
+
+async def run(layout: str, buffered: bool) -> None:
+    redis = FakeRedis(latency=LATENCY)
+    backend = await RedisBackend.create(
+        redis, settings=SessionSettings(SESSION_REDIS_LAYOUT=layout)
+    )
+    encryptor = AES_SIV_Encryptor(SECRET, SESSION_ID)
+    namespace = create_namespace(encryptor, SESSION_ID)
+
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        session = await AsyncSession.create(
+            namespace, encryptor, backend, buffered=buffered
+        )
+        await handler(session)
+        await session.commit()
+    elapsed = (time.perf_counter() - started) / REQUESTS
+
+    mode = "buffered" if buffered else "unbuffered"
+    print(
+        f"  {layout:<8} {mode:<12} {redis.round_trips / REQUESTS:>6.1f} RTT/request"
+        f" {elapsed * 1e3:>8.3f} ms/request"
+    )
+
+
+async def main() -> None:
+    print(f"A handler changing 5 keys, {LATENCY * 1e3:.1f} ms per round trip")
+    for layout in ("string", "hash"):
+        for buffered in (False, True):
+            await run(layout, buffered)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
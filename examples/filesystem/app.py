@@ -68,11 +68,6 @@ connect(
 )
 
 
-@app.on_event("shutdown")
-async def close_session():
-    await app.session.save()
-
-
 @app.post("/init/")
 async def init_session(
     response: Response, manager: SessionManager = Depends(get_session_manager)
@@ -90,7 +85,6 @@ async def add_to_session(
 ) -> Response:
     """Add the value to the session by the key"""
     await session.set(key, value)
-    await session.save()
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -112,14 +106,12 @@ async def remove_from_session(
     if not await session.exists(key):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     await session.delete(key)
-    await session.save()
     return Response(status_code=status.HTTP_200_OK)
 
 
 @app.post("/flush/")
 async def flush_session(session: AsyncSession = Depends(get_user_session)) -> Response:
     await session.clear()
-    await session.save()
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -2,58 +2,101 @@ from pathlib import Path
 
 from .backends import (
     BackendInterface,
+    CookieBackend,
     DBBackend,
     FSBackend,
+    InstrumentedBackend,
+    MemoryBackend,
     RedisBackend,
+    RedisHashBackend,
+    TieredRedisBackend,
+)
+from .constants import (
+    COOKIE_BACKEND_TYPE,
+    FS_BACKEND_TYPE,
+    MEMORY_BACKEND_TYPE,
+    DATABASE_BACKEND_TYPE,
+    REDIS_BACKEND_TYPE,
+    TIERED_REDIS_BACKEND_TYPE,
 )
-from .constants import FS_BACKEND_TYPE, DATABASE_BACKEND_TYPE, REDIS_BACKEND_TYPE
 from .dependencies import get_session_manager, get_user_session
 from .encryptors import EncryptorInterface, AES_SIV_Encryptor
 from .exceptions import (
     BackendImportException,
     MissingSessionException,
     InvalidCookieException,
+    SessionTooLargeException,
 )
 from .managers import SessionManager, create_session_manager
+from .metrics import (
+    MetricsSink,
+    NoopMetricsSink,
+    PrometheusMetricsSink,
+    PROMETHEUS_CONTENT_TYPE,
+)
 from .middlewares import SessionMiddleware
-from .sessions import AsyncSession
+from .sessions import AsyncSession, LazySession
 from .settings import get_session_settings, SessionSettings
+from .stats import CacheStats, ExecutorStats, SessionStats
 from .types import Connection
 from .utils import (
+    check_session_age,
     create_backend,
     create_namespace,
+    decode_session,
     decrypt_session,
     encrypt_session,
     import_backend,
+    resolve_backend,
 )
 
 __all__ = (
     AES_SIV_Encryptor,
     AsyncSession,
     BackendInterface,
+    CacheStats,
     BackendImportException,
+    check_session_age,
     Connection,
+    COOKIE_BACKEND_TYPE,
+    CookieBackend,
     create_backend,
     create_namespace,
     create_session_manager,
     DATABASE_BACKEND_TYPE,
     DBBackend,
+    decode_session,
     decrypt_session,
     encrypt_session,
     EncryptorInterface,
+    ExecutorStats,
     FSBackend,
     FS_BACKEND_TYPE,
     get_session_manager,
     get_session_settings,
     get_user_session,
+    InstrumentedBackend,
     InvalidCookieException,
     import_backend,
+    LazySession,
+    MemoryBackend,
+    MEMORY_BACKEND_TYPE,
+    MetricsSink,
     MissingSessionException,
+    NoopMetricsSink,
+    PrometheusMetricsSink,
+    PROMETHEUS_CONTENT_TYPE,
     RedisBackend,
+    RedisHashBackend,
     REDIS_BACKEND_TYPE,
+    resolve_backend,
     SessionManager,
     SessionManager,
     SessionMiddleware,
+    SessionStats,
+    SessionTooLargeException,
+    TieredRedisBackend,
+    TIERED_REDIS_BACKEND_TYPE,
 )
 
 __version__ = "0.8.4"
@@ -5,6 +5,7 @@ from fastapi import FastAPI, Request, Response
 from cryptography.fernet import Fernet
 
 from ..managers import create_session_manager
+from ..metrics import MetricsSink
 from ..middlewares import SessionMiddleware
 from ..settings import SessionSettings
 from ..types import Connection
@@ -22,6 +23,7 @@ def connect(
         typing.Callable[[FastAPI], Connection]
     ] = None,
     loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+    metrics: typing.Optional[MetricsSink] = None,
 ) -> None:
     """An adapter to connect session components to a FastAPI instance.
 
@@ -33,10 +35,13 @@ def connect(
     :param Callable leon_invalid_cookie:
     :param Callable on_undefined_error:
     :param AbstractEventLoop loop:
+    :param MetricsSink metrics: A sink of timings of session operations
     """
+    sweeper: typing.Optional[asyncio.Task] = None
 
     @app.on_event("startup")
     async def on_startup():
+        nonlocal sweeper
         app.session = create_session_manager(
             secret=secret,
             signer=signer,
@@ -46,9 +51,20 @@ def connect(
             ),
             on_load_cookie=on_load_cookie,
             loop=loop,
+            metrics=metrics,
         )
 
         app.add_middleware(
             SessionMiddleware,
             manager=app.session,
         )
+
+        if app.session.sweep_interval:
+            sweeper = asyncio.ensure_future(app.session.run_sweeper())
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        if sweeper is not None:
+            sweeper.cancel()
+            await asyncio.gather(sweeper, return_exceptions=True)
+        await app.session.close()
@@ -1,4 +1,8 @@
-from .database import DBBackend
-from .fs import FSBackend
+from .cookie import CookieBackend
+from .database import DBBackend, create_database
+from .fs import FSBackend, reshard_storage, sweep_storage
+from .instrumented import InstrumentedBackend
 from .interfaces import BackendInterface, FactoryInterface
-from .redis import RedisBackend
+from .memory import MemoryBackend, MemoryStore, get_memory_store
+from .redis import RedisBackend, RedisHashBackend, migrate_to_hash_layout
+from .tiered import TieredRedisBackend
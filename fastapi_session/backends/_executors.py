@@ -0,0 +1,124 @@
+"""A dedicated executor for blocking operations with session files."""
+
+import asyncio
+import threading
+import time
+import typing
+import weakref
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+
+from ..stats import ExecutorStats
+
+__all__ = ("BoundedExecutor", "get_io_executor")
+
+
+@asynccontextmanager
+async def _unlimited() -> typing.AsyncIterator[None]:
+    yield
+
+
+class BoundedExecutor(Executor):
+    """A thread pool which limits a number of queued operations and measures their waiting."""
+
+    def __init__(
+        self,
+        max_workers: typing.Optional[int] = None,
+        queue_size: typing.Optional[int] = None,
+    ):
+        """
+        :param max_workers: A number of worker threads, see ThreadPoolExecutor
+        :param queue_size: A number of operations allowed to wait for a free worker,
+            callers are suspended when the queue is full, None keeps it unbounded
+        """
+        self._pool = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="fastapi-session-io"
+        )
+        self.max_workers: int = self._pool._max_workers
+        self.queue_size = queue_size
+        self.stats = ExecutorStats()
+        self._lock = threading.Lock()
+        # Numbers of submitted operations which haven't started and which are running
+        self._pending = 0
+        self._running = 0
+        # Semaphores are bound to an event loop, so every loop gets its own one
+        self._limits = weakref.WeakKeyDictionary()
+
+    def _count(self, pending: int, running: int) -> None:
+        """Update numbers of operations and the depth of the queue under the lock.
+
+        Operations which idle or starting workers are about to pick up aren't queued,
+        so only operations beyond a number of free workers count as waiting.
+        """
+        self._pending += pending
+        self._running += running
+        self.stats.queue_depth = max(
+            0, self._pending + self._running - self.max_workers
+        )
+        self.stats.max_queue_depth = max(
+            self.stats.max_queue_depth, self.stats.queue_depth
+        )
+
+    def submit(self, fn: typing.Callable, /, *args, **kwargs) -> Future:
+        """Schedule an operation counting the time it waits for a free worker."""
+        submitted = time.perf_counter()
+        with self._lock:
+            self._count(1, 0)
+
+        def run() -> typing.Any:
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                self._count(-1, 1)
+                self.stats.tasks += 1
+                self.stats.wait_time += waited
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._count(0, -1)
+
+        def dequeue(future: Future) -> None:
+            if future.cancelled():
+                with self._lock:
+                    self._count(-1, 0)
+
+        future = self._pool.submit(run)
+        future.add_done_callback(dequeue)
+        return future
+
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        self._pool.shutdown(wait=wait, **kwargs)
+
+    def limit(
+        self, loop: typing.Optional[asyncio.AbstractEventLoop] = None
+    ) -> typing.AsyncContextManager:
+        """Get a limit of operations in flight submitted from the event loop."""
+        if self.queue_size is None:
+            return _unlimited()
+        loop = loop or asyncio.get_running_loop()
+        semaphore = self._limits.get(loop)
+        if semaphore is None:
+            semaphore = self._limits[loop] = asyncio.Semaphore(
+                self.max_workers + self.queue_size
+            )
+        return semaphore
+
+    async def run(
+        self,
+        func: typing.Callable,
+        *args: typing.Any,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+    ) -> typing.Any:
+        """Run a blocking operation waiting for a free place in the queue first."""
+        loop = loop or asyncio.get_running_loop()
+        async with self.limit(loop):
+            return await loop.run_in_executor(self, partial(func, *args))
+
+
+@lru_cache(maxsize=None)
+def get_io_executor(
+    max_workers: typing.Optional[int] = None, queue_size: typing.Optional[int] = None
+) -> BoundedExecutor:
+    """Get an executor shared by filesystem backends with the same configuration."""
+    return BoundedExecutor(max_workers, queue_size)
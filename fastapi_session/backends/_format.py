@@ -0,0 +1,181 @@
+"""An indexed binary format of session files.
+
+A file starts with a header followed by an index and value segments::
+
+    magic (4 bytes) | version (1 byte) | entries (uint32) | index size (uint32)
+    index: [tag (uint8) | key size (uint16) | offset (uint64) | size (uint32) | key]*
+    segments: [value]*
+
+Offsets of segments are counted from the end of the index, so a single value
+is read from a memory mapped file without loading and decoding the whole file.
+Files without the magic prefix are read as legacy pickled dictionaries.
+"""
+
+import mmap
+import pickle
+import struct
+import typing
+from collections.abc import Mapping, MutableMapping
+
+__all__ = ("IndexedFile", "SessionData", "dump", "load", "loads")
+
+MAGIC: bytes = b"FSES"
+VERSION: int = 1
+
+HEADER = struct.Struct(">4sBII")
+ENTRY = struct.Struct(">BHQI")
+
+# Tags of value encodings
+TAG_STR: int = 0
+TAG_PICKLE: int = 1
+
+Segment = typing.Tuple[int, typing.Union[bytes, memoryview]]
+
+
+def encode_value(value: typing.Any) -> Segment:
+    """Encode a value into a tagged segment."""
+    if isinstance(value, str):
+        return TAG_STR, value.encode("utf-8")
+    return TAG_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_value(tag: int, segment: typing.Union[bytes, memoryview]) -> typing.Any:
+    """Decode a value from a tagged segment."""
+    if tag == TAG_STR:
+        return str(segment, "utf-8")
+    return pickle.loads(segment)
+
+
+class IndexedFile(Mapping):
+    """A read-only mapping over a buffer of an indexed session file."""
+
+    def __init__(self, buffer: typing.Union[bytes, mmap.mmap]):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        magic, version, entries, index_size = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("A session file has an unknown format")
+        if version != VERSION:
+            raise ValueError(f"Unsupported version {version} of a session file")
+
+        self._index: typing.Dict[str, typing.Tuple[int, int, int]] = {}
+        position, data_offset = HEADER.size, HEADER.size + index_size
+        for _ in range(entries):
+            tag, key_size, offset, size = ENTRY.unpack_from(buffer, position)
+            position += ENTRY.size
+            key = str(self._view[position : position + key_size], "utf-8")
+            position += key_size
+            self._index[key] = (tag, data_offset + offset, size)
+
+    def segment(self, key: str) -> Segment:
+        """Get a tagged raw segment of a value without copying it."""
+        tag, offset, size = self._index[key]
+        return tag, self._view[offset : offset + size]
+
+    def __getitem__(self, key: str) -> typing.Any:
+        return decode_value(*self.segment(key))
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class SessionData(MutableMapping):
+    """A mutable mapping keeping changes on top of loaded session data."""
+
+    def __init__(self, base: typing.Optional[typing.Mapping] = None):
+        """
+        :param base: Session data loaded from a session file, it is never modified
+        """
+        self._base = base if base is not None else {}
+        self._changes: typing.Dict[str, typing.Any] = {}
+        self._deleted: typing.Set[str] = set()
+
+    @property
+    def base(self) -> typing.Mapping:
+        return self._base
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key in self._changes:
+            return self._changes[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._base[key]
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._changes:
+            return True
+        return key not in self._deleted and key in self._base
+
+    def __iter__(self) -> typing.Iterator[str]:
+        yield from self._changes
+        for key in self._base:
+            if key not in self._changes and key not in self._deleted:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        self._base, self._changes, self._deleted = {}, {}, set()
+
+    def segments(self) -> typing.Iterator[typing.Tuple[str, Segment]]:
+        """Iterate over tagged segments, unchanged ones are copied from a session file as is."""
+        for key in self:
+            if key not in self._changes and isinstance(self._base, IndexedFile):
+                yield key, self._base.segment(key)
+            else:
+                yield key, encode_value(self[key])
+
+
+def dump(data: typing.Mapping[str, typing.Any], fp: typing.BinaryIO) -> None:
+    """Write session data to a file in the indexed format."""
+    if isinstance(data, SessionData):
+        segments = list(data.segments())
+    else:
+        segments = [(key, encode_value(value)) for key, value in data.items()]
+
+    index, offset = [], 0
+    for key, (tag, segment) in segments:
+        encoded_key = key.encode("utf-8")
+        size = len(segment)
+        index.append(ENTRY.pack(tag, len(encoded_key), offset, size))
+        index.append(encoded_key)
+        offset += size
+    index = b"".join(index)
+
+    fp.write(HEADER.pack(MAGIC, VERSION, len(segments), len(index)))
+    fp.write(index)
+    for _, (_, segment) in segments:
+        fp.write(segment)
+
+
+def load(fp: typing.BinaryIO) -> typing.Mapping[str, typing.Any]:
+    """Read session data from a file in either the indexed or the legacy pickle format."""
+    if fp.read(len(MAGIC)) != MAGIC:
+        fp.seek(0)
+        return pickle.load(fp)
+    return IndexedFile(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def loads(content: bytes) -> typing.Mapping[str, typing.Any]:
+    """Read session data from the content of a file in either format."""
+    if content[: len(MAGIC)] != MAGIC:
+        return pickle.loads(content)
+    return IndexedFile(content)
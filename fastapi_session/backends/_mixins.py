@@ -1,58 +1,217 @@
-import asyncio
+import hashlib
+import io
+import os
 import pickle
+import secrets
 import tempfile
 import typing
 from abc import ABC, abstractmethod
 from functools import cached_property, partial
 from pathlib import Path
 
-import portalocker
+import aiofiles
+
+from . import _format
+from ..caches import LRUCache
+from ._executors import BoundedExecutor, get_io_executor
+from ..enums import FSFormatEnum
+
+
+# A number of hex digits naming a shard directory
+SHARD_WIDTH: int = 2
+
+
+def shard_parts(session_id: str, depth: int) -> typing.Tuple[str, ...]:
+    """Get names of nested shard directories of a session file, e.g. ("ab", "cd")."""
+    if depth <= 0:
+        return ()
+    digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+    return tuple(
+        digest[level * SHARD_WIDTH : (level + 1) * SHARD_WIDTH]
+        for level in range(depth)
+    )
+
+
+def fsync_directory(path: Path) -> None:
+    """Flush entries of a directory to disk, so a replaced file survives a crash."""
+    if not hasattr(os, "O_DIRECTORY"):
+        # Directories can't be opened on Windows
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class FileStorageMixin:
     """A mixin for adding capabilities of a file manipulation."""
 
     def __init__(
-        self, session_id: str, storage_path: Path = Path(tempfile.gettempdir())
+        self,
+        session_id: str,
+        storage_path: Path = Path(tempfile.gettempdir()),
+        shard_depth: int = 0,
+        storage_format: FSFormatEnum = FSFormatEnum.indexed,
+        executor: typing.Optional[BoundedExecutor] = None,
+        async_files: bool = False,
+        cache: typing.Optional[LRUCache] = None,
     ):
         """
         :param session_id: An id of a user session
         :param storage_path: A base path to session data source files
+        :param shard_depth: A number of nested directories spreading session files
+        :param storage_format: A format of written session files
+        :param executor: An executor of blocking file operations
+        :param async_files: Use asynchronous file operations instead of memory mapping
+        :param cache: A cache of loaded session files validated by their stats
         """
         self.session_id = session_id
         self.storage_path = storage_path
-        self.storage_path.mkdir(exist_ok=True)
+        self.shard_depth = shard_depth
+        self.storage_format = storage_format
+        self.executor = executor or get_io_executor()
+        self.async_files = async_files
+        self.cache = cache
+        self.storage_path.mkdir(parents=True, exist_ok=True)
 
     @cached_property
     def source(self) -> Path:
         """Generate an absolute path to the session data source file."""
-        source_path = self.storage_path.joinpath(self.session_id)
-        source_path.touch(exist_ok=True)
+        source_path = self.storage_path.joinpath(
+            *shard_parts(self.session_id, self.shard_depth), self.session_id
+        )
+        if source_path.exists():
+            # Touching an existing file would change a stamp of cached session data
+            return source_path
+        try:
+            source_path.touch(exist_ok=True)
+        except FileNotFoundError:
+            # A shard directory is created on the first access only
+            source_path.parent.mkdir(parents=True, exist_ok=True)
+            source_path.touch(exist_ok=True)
         return source_path
 
-    async def load(self) -> typing.Dict[str, typing.Any]:
-        """Load serialized session data from a session data source."""
-        return await asyncio.wait_for(
-            self._loop.run_in_executor(None, self.__load),
-            timeout=None,
-        )
+    @staticmethod
+    def __stamp(stat: os.stat_result) -> typing.Tuple[int, int, int]:
+        """Get a stamp of a session file changed by every replacement of the file."""
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def __cache(
+        self, stamp: typing.Tuple[int, int, int], data: typing.Mapping[str, typing.Any]
+    ) -> None:
+        if self.cache is not None:
+            self.cache.set(str(self.source), (stamp, data), size=stamp[-1])
 
-    def __load(self) -> typing.Dict[str, typing.Any]:
-        """Load and unpickle session data from a file."""
-        with portalocker.Lock(self.source, "rb", flags=portalocker.LOCK_EX) as fp:
-            return pickle.load(fp)
+    async def load(self) -> typing.Mapping[str, typing.Any]:
+        """Load serialized session data from a session data source.
 
-    async def save(self, data: typing.Dict[str, typing.Any]):
+        Cached data is returned without reading if the session file is unchanged.
+        Loaded data is never modified, so it is shared by backends of the same session.
+        """
+        if self.cache is not None:
+            stamp = self.__stamp(
+                await self.executor.run(os.stat, self.source, loop=self._loop)
+            )
+            entry = self.cache.get(
+                str(self.source), valid=lambda entry: entry[0] == stamp
+            )
+            if entry is not None:
+                return entry[1]
+        if self.async_files:
+            return await self.__aload()
+        return await self.executor.run(self.__load, loop=self._loop)
+
+    def __load(self) -> typing.Mapping[str, typing.Any]:
+        """Load session data from a file.
+
+        A session file is replaced atomically on every save,
+        so readers don't need to lock it and never see a partially written file.
+        Indexed files are memory mapped and values are decoded on access only.
+        Cached files are read into memory instead, since every memory mapped file
+        keeps a file descriptor open as long as it is cached.
+        """
+        with open(self.source, "rb") as fp:
+            if self.cache is None:
+                return _format.load(fp)
+            data = _format.loads(fp.read())
+            self.__cache(self.__stamp(os.fstat(fp.fileno())), data)
+        return data
+
+    async def __aload(self) -> typing.Mapping[str, typing.Any]:
+        """Read the whole session file with asynchronous file operations."""
+        async with self.executor.limit(self._loop):
+            async with aiofiles.open(
+                self.source, "rb", loop=self._loop, executor=self.executor
+            ) as fp:
+                data = _format.loads(await fp.read())
+                self.__cache(self.__stamp(os.fstat(fp.fileno())), data)
+        return data
+
+    async def save(self, data: typing.Mapping[str, typing.Any]):
         """Serialize session data to a file."""
-        await asyncio.wait_for(
-            self._loop.run_in_executor(None, partial(self.__save, data=data)),
-            timeout=None,
+        if self.async_files:
+            await self.__asave(data)
+        else:
+            await self.executor.run(partial(self.__save, data=data), loop=self._loop)
+
+    def __dump(self, data: typing.Mapping[str, typing.Any], fp: typing.BinaryIO):
+        """Write session data to a file in the configured format."""
+        if self.storage_format is FSFormatEnum.pickle:
+            pickle.dump(obj=dict(data), file=fp)
+        else:
+            _format.dump(data, fp)
+
+    def __save(self, data: typing.Mapping[str, typing.Any]) -> None:
+        """Save session data to a temporary file and replace the session file with it."""
+        fd, path = tempfile.mkstemp(
+            prefix=f".{self.session_id}.", suffix=".tmp", dir=self.source.parent
         )
-
-    def __save(self, data: typing.Dict[str, typing.Any]) -> None:
-        """Save session data to a file."""
-        with portalocker.Lock(self.source, "wb", flags=portalocker.LOCK_EX) as fp:
-            pickle.dump(obj=self._data, file=fp)
+        try:
+            with os.fdopen(fd, "w+b") as fp:
+                self.__dump(data, fp)
+                # The content has to reach the disk before the file is renamed,
+                # otherwise a crash may leave an empty session file
+                fp.flush()
+                os.fsync(fd)
+                if self.cache is not None:
+                    # The written file is cached to spare reading it on the next load
+                    stamp = self.__stamp(os.fstat(fd))
+                    fp.seek(0)
+                    written = _format.loads(fp.read())
+            os.replace(path, self.source)
+        except BaseException:
+            os.unlink(path)
+            raise
+        fsync_directory(self.source.parent)
+        if self.cache is not None:
+            self.__cache(stamp, written)
+
+    async def __asave(self, data: typing.Mapping[str, typing.Any]) -> None:
+        """Write a temporary file with asynchronous file operations and replace the session file with it."""
+        buffer = io.BytesIO()
+        self.__dump(data, buffer)
+        path = self.source.with_name(f".{self.session_id}.{secrets.token_hex(8)}.tmp")
+        try:
+            async with self.executor.limit(self._loop):
+                async with aiofiles.open(
+                    path, "xb", loop=self._loop, executor=self.executor
+                ) as fp:
+                    await fp.write(buffer.getbuffer())
+                    await fp.flush()
+                    # The executor is entered directly, since its limit is taken
+                    await self._loop.run_in_executor(
+                        self.executor, os.fsync, fp.fileno()
+                    )
+                    stamp = self.__stamp(os.fstat(fp.fileno()))
+            await self.executor.run(os.replace, path, self.source, loop=self._loop)
+        except BaseException:
+            await self.executor.run(
+                partial(path.unlink, missing_ok=True), loop=self._loop
+            )
+            raise
+        await self.executor.run(fsync_directory, self.source.parent, loop=self._loop)
+        self.__cache(stamp, _format.loads(buffer.getvalue()))
 
 
 class DisableMethodsMixin:
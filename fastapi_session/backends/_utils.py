@@ -0,0 +1,33 @@
+import typing
+from collections import defaultdict
+
+# A separator between a session namespace and a key name
+KEY_SEPARATOR: str = ":"
+
+
+def split_key(key: str) -> typing.Tuple[str, str]:
+    """Split a storage key into a session namespace and a key name."""
+    namespace, _, name = key.partition(KEY_SEPARATOR)
+    return namespace, name
+
+
+def group_keys(
+    keys: typing.Iterable[str],
+) -> typing.Dict[str, typing.List[str]]:
+    """Group key names of storage keys by their session namespaces."""
+    groups = defaultdict(list)
+    for key in keys:
+        namespace, name = split_key(key)
+        groups[namespace].append(name)
+    return groups
+
+
+def group_expiring(
+    mapping: typing.Mapping[str, typing.Any],
+    expire: typing.Optional[typing.Mapping[str, int]] = None,
+) -> typing.Dict[typing.Optional[int], typing.Dict[str, typing.Any]]:
+    """Group keys and values by numbers of seconds they expire in."""
+    groups = defaultdict(dict)
+    for key, value in mapping.items():
+        groups[expire.get(key) if expire else None][key] = value
+    return groups
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+import typing
+import zlib
+from base64 import urlsafe_b64decode
+
+from cryptography.fernet import Fernet, InvalidToken
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
+
+from ..exceptions import SessionTooLargeException
+from ..settings import SessionSettings, get_session_settings
+from .interfaces import BackendInterface, FactoryInterface
+
+__all__ = ("CookieBackend",)
+
+# Flags of an encoded payload
+RAW_PAYLOAD: bytes = b"\x00"
+COMPRESSED_PAYLOAD: bytes = b"\x01"
+
+
+def encode_payload(data: typing.Mapping[str, typing.Any]) -> bytes:
+    """Serialize session data compressing it unless compression makes it larger."""
+    content = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    compressed = zlib.compress(content)
+    if len(compressed) < len(content):
+        return COMPRESSED_PAYLOAD + compressed
+    return RAW_PAYLOAD + content
+
+
+def decode_payload(payload: bytes) -> typing.Dict[str, typing.Any]:
+    """Deserialize session data from a payload in either form."""
+    flag, content = payload[:1], payload[1:]
+    if flag == COMPRESSED_PAYLOAD:
+        content = zlib.decompress(content)
+    elif flag != RAW_PAYLOAD:
+        raise ValueError("A session payload has an unknown format")
+    return json.loads(content)
+
+
+class CookieBackend(FactoryInterface, BackendInterface):
+    """
+    A backend keeping a whole user session in cookies of a client without any storage I/O.
+
+    Session data is compressed, encrypted with the session signer and split
+    into cookies named after the session cookie with an index suffix.
+    Stored keys are prefixed with a session namespace, so data sent along
+    with a cookie of another session is never read.
+
+    Sessions don't encrypt values kept in cookies one by one, so they are
+    compressed as plain text. Default limits fit about 5 KiB of JSON values
+    which don't compress and several times more of repetitive ones.
+    """
+
+    client_side = True
+
+    def __init__(
+        self,
+        signer: typing.Type[Fernet],
+        settings: typing.Optional[SessionSettings] = None,
+        cookies: typing.Optional[typing.Mapping[str, str]] = None,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        """
+        :param signer: A fernet instance for encrypting and signing session data
+        :param settings: Session settings
+        :param cookies: Cookies of a request carrying session data
+        :param loop: A running event loop
+        """
+        self._signer = signer
+        self._settings = settings or get_session_settings()
+        self._loop = loop if loop else asyncio.get_running_loop()
+        self._data: typing.Dict[str, typing.Any] = {}
+        # A number of cookies session data has been split into by a client
+        self._chunks = 0
+        # A timestamp of loaded session data
+        self._issued_at: typing.Optional[int] = None
+        self._dirty = False
+        self._headers: typing.List[typing.Tuple[bytes, bytes]] = []
+        if cookies:
+            self._load(cookies)
+
+    @classmethod
+    async def create(
+        cls,
+        adapter: HTTPConnection,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
+        signer: typing.Optional[typing.Type[Fernet]] = None,
+    ) -> "CookieBackend":
+        """A factory method for creating the backend from a request.
+
+        :param adapter: A user HTTP request
+        :param loop: A running event loop
+        :param settings: Session settings
+        :param signer: A fernet instance of a session manager
+        """
+        if signer is None:
+            raise ValueError("A signer is required for encrypting session cookies")
+        return cls(signer, settings, adapter.cookies, loop)
+
+    def chunk_name(self, index: int) -> str:
+        """Get a name of a cookie carrying a chunk of session data."""
+        return f"{self._settings.SESSION_COOKIE_NAME}_{index}"
+
+    @property
+    def dirty(self) -> bool:
+        """Check whether session data has unsent changes."""
+        return self._dirty
+
+    def _load(self, cookies: typing.Mapping[str, str]) -> None:
+        chunks = []
+        for index in range(self._settings.SESSION_COOKIE_BACKEND_MAX_CHUNKS):
+            chunk = cookies.get(self.chunk_name(index))
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        self._chunks = len(chunks)
+        if not chunks:
+            return
+        token = "".join(chunks).encode("utf-8")
+        try:
+            payload = self._signer.decrypt(
+                token, ttl=self._settings.SESSION_COOKIE_MAX_AGE
+            )
+            self._data = decode_payload(payload)
+        except (InvalidToken, ValueError, zlib.error):
+            # Invalid data is dropped and its cookies are removed on the next write
+            self._dirty = True
+            return
+        # The token has been verified, so its timestamp is read without verifying it again
+        self._issued_at = int.from_bytes(urlsafe_b64decode(token)[1:9], "big")
+
+    def _expiring(self) -> bool:
+        """Check whether session cookies have passed the refresh fraction of their max age."""
+        fraction = self._settings.SESSION_COOKIE_REFRESH_FRACTION
+        max_age = self._settings.SESSION_COOKIE_MAX_AGE
+        if not (fraction and max_age and self._issued_at is not None):
+            return False
+        return time.time() - self._issued_at >= max_age * fraction
+
+    def _dump(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        """Encode session data into raw headers setting and removing session cookies."""
+        settings = self._settings
+        chunks = []
+        if self._data:
+            token = self._signer.encrypt(encode_payload(self._data)).decode("utf-8")
+            size = settings.SESSION_COOKIE_BACKEND_CHUNK_SIZE
+            chunks = [token[i : i + size] for i in range(0, len(token), size)]
+            if len(chunks) > settings.SESSION_COOKIE_BACKEND_MAX_CHUNKS:
+                raise SessionTooLargeException(
+                    detail=(
+                        f"A user session of {len(token)} bytes exceeds "
+                        f"{size * settings.SESSION_COOKIE_BACKEND_MAX_CHUNKS} bytes "
+                        "allowed in cookies"
+                    )
+                )
+
+        response = Response()
+        for index, chunk in enumerate(chunks):
+            response.set_cookie(
+                self.chunk_name(index),
+                chunk,
+                max_age=settings.SESSION_COOKIE_MAX_AGE,
+                expires=settings.SESSION_COOKIE_EXPIRES,
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=settings.SESSION_COOKIE_HTTPONLY,
+                samesite=settings.SESSION_COOKIE_SAMESITE.value,
+            )
+        # Remove cookies left from larger session data
+        for index in range(len(chunks), self._chunks):
+            response.delete_cookie(
+                self.chunk_name(index),
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+            )
+        self._chunks = len(chunks)
+        self._issued_at = int(time.time()) if chunks else None
+        return [header for header in response.raw_headers if header[0] == b"set-cookie"]
+
+    async def persist(self) -> bool:
+        """Prepare session cookies if session data has been changed or is about to expire."""
+        if not (self._dirty or self._expiring()):
+            return False
+        self._headers = self._dump()
+        self._dirty = False
+        return True
+
+    def headers(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        """Get raw headers of session cookies prepared by the last persisting."""
+        return self._headers
+
+    async def clear(self, pattern: str) -> None:
+        self._data.clear()
+        self._dirty = True
+
+    async def keys(self, pattern: str) -> typing.Sequence[str]:
+        return self._data.keys()
+
+    async def delete(self, *keys: typing.Sequence[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+        self._dirty = True
+
+    async def exists(self, *keys: typing.Sequence[str]) -> int:
+        return sum(key in self._data for key in set(keys))
+
+    async def get(self, *keys: typing.Sequence[str]) -> typing.Sequence[typing.Any]:
+        """Get values by the passed keys from session cookies."""
+        return [self._data.get(key, None) for key in keys]
+
+    async def set(self, key: str, value: typing.Any, **kwargs) -> None:
+        self._data[key] = value
+        self._dirty = True
+
+    async def update(self, mapping: typing.Dict, **kwargs) -> None:
+        self._data.update(mapping)
+        self._dirty = True
+
+    async def len(self, pattern: str) -> int:
+        return len(self._data)
+
+    def __getitem__(self, name: str) -> typing.Any:
+        return self._data[name]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
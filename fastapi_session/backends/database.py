@@ -1,22 +1,277 @@
 import asyncio
+import time
 import typing
 from dataclasses import dataclass, field
 
+try:
+    from databases import Database
+except ImportError:  # databases is an optional dependency
+    Database = None
+
 from ._mixins import DisableMethodsMixin
-from .interfaces import BackendInterface
+from ._utils import KEY_SEPARATOR, group_keys
+from ..exceptions import BackendImportException
+from ..settings import SessionSettings
+from .interfaces import BackendInterface, FactoryInterface
+
+__all__ = ("DBBackend", "create_database")
+
+DEFAULT_TABLE: str = "fastapi_sessions"
+# A number of rows written by a single statement,
+# it keeps statements below the limit of bound parameters of SQLite
+BATCH_SIZE: int = 200
+# Dialects which don't support connection pool options
+UNPOOLED_DIALECTS: typing.Tuple[str, ...] = ("sqlite",)
+
+
+def create_database(
+    url: str, settings: typing.Optional[SessionSettings] = None
+) -> Database:
+    """Create a database with a connection pool sized by session settings.
+
+    :param url: A database URL
+    :param settings: Session settings
+    """
+    if Database is None:
+        raise BackendImportException(detail="DBBackend requires the databases package")
+    database = Database(url)
+    if settings is None or database.url.dialect in UNPOOLED_DIALECTS:
+        return database
+    return Database(
+        url,
+        min_size=settings.SESSION_DB_POOL_MIN_SIZE,
+        max_size=settings.SESSION_DB_POOL_MAX_SIZE,
+    )
 
 
 @dataclass(order=False, eq=False, repr=False)
-class DBBackend(DisableMethodsMixin, BackendInterface):
-    """A backend for managing database based session storage."""
+class DBBackend(DisableMethodsMixin, FactoryInterface, BackendInterface):
+    """
+    A backend for managing database based session storage.
+
+    Every stored key is a row with a primary key of a session namespace
+    and a key name, values with passed expiration are hidden once they expire.
+    """
 
-    adapter: typing.Any
+    adapter: Database
     loop: typing.Optional[asyncio.AbstractEventLoop] = field(default=None)
+    table: str = field(default=DEFAULT_TABLE)
 
     @classmethod
     async def create(
         cls,
-        adapter: typing.Any,
+        adapter: typing.Union[str, Database],
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
     ) -> "DBBackend":
-        return cls(adapter, loop)
\ No newline at end of file
+        """
+        A factory method for creating and initializing the backend.
+
+        :param adapter: A database instance or a database URL
+        :param loop: An instance of event loop
+        :param settings: Session settings defining a table and a connection pool
+        """
+        if isinstance(adapter, str):
+            adapter = create_database(adapter, settings)
+        if not adapter.is_connected:
+            await adapter.connect()
+        self = cls(
+            adapter,
+            loop,
+            settings.SESSION_DB_TABLE if settings is not None else DEFAULT_TABLE,
+        )
+        await self.create_table()
+        return self
+
+    @property
+    def dialect(self) -> str:
+        return self.adapter.url.dialect
+
+    @property
+    def _key(self) -> str:
+        """A quoted name of the key column."""
+        return "`key`" if self.dialect == "mysql" else '"key"'
+
+    async def create_table(self) -> None:
+        """Create a session table and its index unless they exist."""
+        if self.dialect == "mysql":
+            await self.adapter.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "namespace VARCHAR(255) NOT NULL, `key` VARCHAR(255) NOT NULL, "
+                "value TEXT NOT NULL, expires_at BIGINT NULL, "
+                "PRIMARY KEY (namespace, `key`), INDEX (expires_at))"
+            )
+            return
+        await self.adapter.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            'namespace TEXT NOT NULL, "key" TEXT NOT NULL, '
+            "value TEXT NOT NULL, expires_at BIGINT NULL, "
+            'PRIMARY KEY (namespace, "key"))'
+        )
+        await self.adapter.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at "
+            f"ON {self.table} (expires_at)"
+        )
+
+    def _match(
+        self, keys: typing.Iterable[str], values: typing.Dict[str, typing.Any]
+    ) -> str:
+        """Build a condition matching storage keys and bind its parameters."""
+        clauses = []
+        for namespace, names in group_keys(keys).items():
+            index = len(values)
+            values[f"p{index}"] = namespace
+            params = []
+            for offset, name in enumerate(names, index + 1):
+                values[f"p{offset}"] = name
+                params.append(f":p{offset}")
+            clauses.append(
+                f"(namespace = :p{index} AND {self._key} IN ({', '.join(params)}))"
+            )
+        return " OR ".join(clauses)
+
+    @staticmethod
+    def _alive(values: typing.Dict[str, typing.Any]) -> str:
+        """Build a condition skipping expired rows and bind its parameters."""
+        values["now"] = int(time.time())
+        return "(expires_at IS NULL OR expires_at > :now)"
+
+    @staticmethod
+    def _batches(
+        items: typing.Sequence[typing.Any],
+    ) -> typing.Iterator[typing.Sequence[typing.Any]]:
+        for index in range(0, len(items), BATCH_SIZE):
+            yield items[index : index + BATCH_SIZE]
+
+    async def clear(self, namespace: str) -> None:
+        await self.adapter.execute(
+            f"DELETE FROM {self.table} WHERE namespace = :namespace",
+            values={"namespace": namespace},
+        )
+
+    async def keys(self, namespace: str) -> typing.List[str]:
+        values = {"namespace": namespace}
+        rows = await self.adapter.fetch_all(
+            f"SELECT {self._key} FROM {self.table} "
+            f"WHERE namespace = :namespace AND {self._alive(values)}",
+            values=values,
+        )
+        return [f"{namespace}{KEY_SEPARATOR}{row['key']}" for row in rows]
+
+    async def exists(self, *keys: typing.Sequence[str]) -> int:
+        found = 0
+        for batch in self._batches(list(set(keys))):
+            values = {}
+            found += await self.adapter.fetch_val(
+                f"SELECT COUNT(*) FROM {self.table} "
+                f"WHERE {self._alive(values)} AND ({self._match(batch, values)})",
+                values=values,
+            )
+        return found
+
+    async def len(self, namespace: str) -> int:
+        values = {"namespace": namespace}
+        return await self.adapter.fetch_val(
+            f"SELECT COUNT(*) FROM {self.table} "
+            f"WHERE namespace = :namespace AND {self._alive(values)}",
+            values=values,
+        )
+
+    async def get(
+        self,
+        *keys: typing.Sequence[str],
+    ) -> typing.Sequence[typing.Any]:
+        """Get values by the passed keys from a storage in a single query per batch."""
+        found = {}
+        for batch in self._batches(keys):
+            values = {}
+            rows = await self.adapter.fetch_all(
+                f"SELECT namespace, {self._key}, value FROM {self.table} "
+                f"WHERE {self._alive(values)} AND ({self._match(batch, values)})",
+                values=values,
+            )
+            for row in rows:
+                found[f"{row['namespace']}{KEY_SEPARATOR}{row['key']}"] = row["value"]
+        return [found.get(key) for key in keys]
+
+    async def set(
+        self, key: str, value: typing.Any, expire: typing.Optional[int] = None, **kwargs
+    ) -> None:
+        """Set the value to the key in a storage.
+
+        :param expire: A number of seconds the value expires in
+        """
+        await self.update({key: value}, expire=expire)
+
+    async def update(
+        self,
+        mapping: typing.Dict[str, typing.Any],
+        expire: typing.Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """Upsert the passed mapping with a multi-row statement per batch.
+
+        :param expire: A number of seconds the values expire in
+        """
+        expires_at = int(time.time()) + expire if expire else None
+        if self.dialect == "mysql":
+            conflict = (
+                "ON DUPLICATE KEY UPDATE value = VALUES(value), "
+                "expires_at = VALUES(expires_at)"
+            )
+        else:
+            conflict = (
+                f"ON CONFLICT (namespace, {self._key}) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at"
+            )
+        for batch in self._batches(list(mapping.items())):
+            values, rows = {"expires_at": expires_at}, []
+            for index, (key, value) in enumerate(batch):
+                namespace, _, name = key.partition(KEY_SEPARATOR)
+                values.update({f"n{index}": namespace, f"k{index}": name})
+                values[f"v{index}"] = value
+                rows.append(f"(:n{index}, :k{index}, :v{index}, :expires_at)")
+            await self.adapter.execute(
+                f"INSERT INTO {self.table} (namespace, {self._key}, value, expires_at) "
+                f"VALUES {', '.join(rows)} {conflict}",
+                values=values,
+            )
+
+    async def delete(self, *keys: typing.Sequence[str]) -> None:
+        for batch in self._batches(keys):
+            values = {}
+            await self.adapter.execute(
+                f"DELETE FROM {self.table} WHERE {self._match(batch, values)}",
+                values=values,
+            )
+
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        """Apply a batch of buffered changes in a single transaction."""
+        async with self.adapter.transaction():
+            await super().commit(
+                namespace, mapping, deleted, clear=clear, expire=expire
+            )
+
+    async def sweep(self) -> int:
+        """Remove expired rows looking them up by the index of expiration times.
+
+        :return: A number of removed rows
+        """
+        values = {"now": int(time.time())}
+        condition = "expires_at IS NOT NULL AND expires_at <= :now"
+        async with self.adapter.transaction():
+            removed = await self.adapter.fetch_val(
+                f"SELECT COUNT(*) FROM {self.table} WHERE {condition}", values=values
+            )
+            if removed:
+                await self.adapter.execute(
+                    f"DELETE FROM {self.table} WHERE {condition}", values=values
+                )
+        return removed
@@ -1,19 +1,33 @@
 import asyncio
 import pickle
 import os
+import secrets
+import time
 import typing
 import tempfile
-from collections import defaultdict
 from dataclasses import dataclass, field
 from functools import partial
 from pathlib import Path
 
 
-from ._mixins import FileStorageMixin, DisableMethodsMixin
+from ._executors import BoundedExecutor, get_io_executor
+from . import _format
+from ._format import SessionData
+from ._mixins import FileStorageMixin, DisableMethodsMixin, SHARD_WIDTH, shard_parts
+from ..caches import LRUCache, get_shared_cache
+from ..enums import FSFormatEnum
+from ..settings import SessionSettings
 from .interfaces import BackendInterface, FactoryInterface
 
+__all__ = ("FSBackend", "reshard_storage", "sweep_storage")
 
-__all__ = ("FSBackend",)
+# A reserved key of session files keeping expiration times of keys,
+# storage keys never start with it
+EXPIRES_KEY: str = "\x00expires"
+# A directory of the expiry index of a storage
+EXPIRY_INDEX: str = ".expiry"
+# A time span (in seconds) of buckets of the expiry index
+EXPIRY_BUCKET: int = 60
 
 
 @dataclass(order=False, eq=False, repr=False)
@@ -32,72 +46,248 @@ class FSBackend(
         cls,
         adapter: str,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
     ) -> "FSBackend":
         """A factory method for creating and initializing the backend.
 
         :param adatper: A path to a user session file
         :param loop: A running event loop
+        :param settings: Session settings
         """
-        self = cls(adapter, loop)
+        if settings is None:
+            self = cls(adapter, loop)
+        else:
+            self = cls(
+                adapter,
+                loop,
+                storage_path=settings.SESSION_FS_STORAGE_PATH,
+                shard_depth=settings.SESSION_FS_SHARD_DEPTH,
+                storage_format=settings.SESSION_FS_FORMAT,
+                executor=get_io_executor(
+                    settings.SESSION_FS_EXECUTOR_WORKERS,
+                    settings.SESSION_FS_EXECUTOR_QUEUE_SIZE,
+                ),
+                async_files=settings.SESSION_FS_ASYNC_FILES,
+                cache=cls.get_cache(settings),
+            )
         if os.path.getsize(self.source) > 0:
             await self.load()
+        else:
+            # A new file is removed by a sweep unless session data is saved to it
+            self._expires_at = 0.0
+            await self.executor.run(
+                index_expiry,
+                self.storage_path,
+                self.source,
+                self._expires_at,
+                loop=self._loop,
+            )
         return self
 
+    @classmethod
+    async def sweep_expired(
+        cls,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
+    ) -> int:
+        """Remove expired session files of a storage configured by settings."""
+        storage_path, executor = Path(tempfile.gettempdir()), get_io_executor()
+        if settings is not None:
+            storage_path = settings.SESSION_FS_STORAGE_PATH or storage_path
+            executor = get_io_executor(
+                settings.SESSION_FS_EXECUTOR_WORKERS,
+                settings.SESSION_FS_EXECUTOR_QUEUE_SIZE,
+            )
+        return await executor.run(sweep_storage, storage_path, loop=loop)
+
+    @classmethod
+    def get_cache(cls, settings: SessionSettings) -> typing.Optional[LRUCache]:
+        """Get a cache of session files shared within a process if it is enabled."""
+        if not settings.SESSION_FS_CACHE_SIZE:
+            return None
+        return get_shared_cache(
+            cls.__name__,
+            settings.SESSION_FS_CACHE_SIZE,
+            settings.SESSION_FS_CACHE_MAX_BYTES,
+        )
+
     def __init__(
         self,
         session_id: str,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        storage_path: typing.Optional[Path] = None,
+        shard_depth: int = 0,
+        storage_format: FSFormatEnum = FSFormatEnum.indexed,
+        executor: typing.Optional[BoundedExecutor] = None,
+        async_files: bool = False,
+        cache: typing.Optional[LRUCache] = None,
     ):
         """
         :param session_key: Session key defining a path to data
         :param loop: An instance of even loop
+        :param storage_path: A directory of session files
+        :param shard_depth: A number of nested directories spreading session files
+        :param storage_format: A format of written session files
+        :param executor: An executor of blocking file operations, shared by default
+        :param async_files: Use asynchronous file operations instead of memory mapping
+        :param cache: A cache of loaded session files, disabled by default
         """
-        super().__init__(session_id)
+        super().__init__(
+            session_id,
+            storage_path=storage_path or Path(tempfile.gettempdir()),
+            shard_depth=shard_depth,
+            storage_format=storage_format or FSFormatEnum.indexed,
+            executor=executor,
+            async_files=bool(async_files),
+            cache=cache,
+        )
 
         self._loop = loop if loop else asyncio.get_running_loop()
-        # Initialize the data storage for uploading data from a session data source
-        self._data = defaultdict(None)
+        # Initialize the data storage for uploading data from a session data source,
+        # changes are kept on top of loaded data, so unchanged values are never decoded
+        self._data = SessionData()
+        # Indicates that the data storage has been changed since the last load or save
+        self._dirty = False
+        # Timestamps keys expire at
+        self._expires: typing.Dict[str, float] = {}
+        # A timestamp the saved session file expires at
+        self._expires_at: typing.Optional[float] = None
 
     @property
-    def data(self) -> typing.Dict[str, typing.Any]:
+    def data(self) -> typing.MutableMapping[str, typing.Any]:
         return self._data
 
     @data.setter
     def data(self, value: typing.Any) -> None:
         raise NotImplementedError("Modification of the internal storage is forbidden")
 
+    @property
+    def dirty(self) -> bool:
+        """Check whether session data has unsaved changes."""
+        return self._dirty
+
     async def load(self) -> None:
         """Load session data from the storage source."""
-        self._data = await super().load()
+        self._data = SessionData(await super().load())
+        self._expires = dict(self._data.get(EXPIRES_KEY) or {})
+        self._expires_at = file_expiration(self._data)
+        self._dirty = False
 
     async def save(self) -> None:
+        """Save session data dropping expired keys and index the file by its expiration."""
+        now = time.time()
+        for key, expires_at in list(self._expires.items()):
+            if expires_at <= now:
+                self._data.pop(key, None)
+            if expires_at <= now or key not in self._data:
+                del self._expires[key]
+        if self._expires:
+            self._data[EXPIRES_KEY] = dict(self._expires)
+        else:
+            self._data.pop(EXPIRES_KEY, None)
         await super().save(self._data)
 
+        expires_at = file_expiration(self._data)
+        if expires_at is not None and (
+            self._expires_at is None
+            or expiry_bucket(expires_at) != expiry_bucket(self._expires_at)
+        ):
+            await self.executor.run(
+                index_expiry,
+                self.storage_path,
+                self.source,
+                expires_at,
+                loop=self._loop,
+            )
+        self._expires_at = expires_at
+        self._dirty = False
+
+    async def sweep(self) -> int:
+        """Remove expired session files of the storage."""
+        return await self.executor.run(
+            sweep_storage, self.storage_path, loop=self._loop
+        )
+
+    def _expire(self, keys: typing.Iterable[str], expire: typing.Optional[int]) -> None:
+        """Set or reset expiration of keys."""
+        if expire:
+            expires_at = time.time() + expire
+            self._expires.update(dict.fromkeys(keys, expires_at))
+        else:
+            for key in keys:
+                self._expires.pop(key, None)
+
+    def _alive(self, now: typing.Optional[float] = None) -> typing.List[str]:
+        """Get keys which haven't expired."""
+        if now is None:
+            now = time.time()
+        return [
+            key
+            for key in self._data
+            if key != EXPIRES_KEY and self._expires.get(key, now + 1) > now
+        ]
+
+    async def persist(self) -> bool:
+        """Save session data only if it has been changed."""
+        if not self._dirty:
+            return False
+        await self.save()
+        return True
+
     async def clear(self, pattern: str) -> None:
         """Clear session storage."""
         self._data.clear()
+        self._expires.clear()
+        self._dirty = True
 
     async def keys(self, pattern: str) -> typing.Sequence[str]:
-        return self._data.keys()
+        return self._alive()
 
-    async def delete(self, key: str):
-        del self._data[key]
+    async def delete(self, *keys: typing.Sequence[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        self._dirty = True
 
     async def exists(self, *keys: typing.Sequence[str]) -> int:
-        return len(set(keys) & set(self._data.keys()))
+        now = time.time()
+        return sum(
+            key in self._data and self._expires.get(key, now + 1) > now
+            for key in set(keys)
+        )
 
     async def get(
         self,
         *keys: typing.Sequence[str],
     ) -> typing.Sequence[typing.Any]:
-        """Get values by the passed keys from a storage."""
-        return [self._data.get(key, None) for key in keys]
+        """Get values by the passed keys from a storage, expired values are None."""
+        now = time.time()
+        return [
+            self._data.get(key, None) if self._expires.get(key, now + 1) > now else None
+            for key in keys
+        ]
+
+    async def set(
+        self, key: str, value: typing.Any, expire: typing.Optional[int] = None, **kwargs
+    ) -> None:
+        """Set the value to the key in a storage.
 
-    async def set(self, key: str, value: typing.Any, **kwargs) -> None:
+        :param expire: A number of seconds the value expires in
+        """
         self._data[key] = value
+        self._expire([key], expire)
+        self._dirty = True
+
+    async def update(
+        self, mapping: typing.Dict, expire: typing.Optional[int] = None, **kwargs
+    ) -> None:
+        """Update a storage with the passed mapping.
 
-    async def update(self, mapping: typing.Dict, **kwargs) -> None:
+        :param expire: A number of seconds values expire in
+        """
         self._data.update(mapping)
+        self._expire(mapping, expire)
+        self._dirty = True
 
     async def len(self, pattern: str) -> int:
         return self.__len__()
@@ -118,4 +308,145 @@ class FSBackend(
             return True
 
     def __len__(self) -> int:
-        return len(self._data.keys())
+        return len(self._alive())
+
+
+def file_expiration(data: typing.Mapping[str, typing.Any]) -> typing.Optional[float]:
+    """Get a timestamp session data expires at, None if some of its keys never expire.
+
+    Empty session data has expired already, so its file is removed by the next sweep.
+    """
+    expires = data.get(EXPIRES_KEY) or {}
+    keys = [key for key in data if key != EXPIRES_KEY]
+    if not keys:
+        return 0.0
+    if any(key not in expires for key in keys):
+        return None
+    return max(expires[key] for key in keys)
+
+
+def expiry_bucket(expires_at: float) -> int:
+    """Get a timestamp a bucket of the expiry index listing an expiration ends at."""
+    return (int(expires_at) // EXPIRY_BUCKET + 1) * EXPIRY_BUCKET
+
+
+def index_expiry(storage_path: Path, source: Path, expires_at: float) -> None:
+    """List a session file in a bucket of the expiry index of a storage.
+
+    Files which have expired already are listed in the current bucket,
+    since sweepers may be removing buckets which have ended.
+
+    :param storage_path: A directory of session files
+    :param source: A path to a session file
+    :param expires_at: A timestamp the session file expires at
+    """
+    index = storage_path / EXPIRY_INDEX
+    index.mkdir(exist_ok=True)
+    bucket = expiry_bucket(max(expires_at, time.time()))
+    with open(index / str(bucket), "a") as fp:
+        fp.write(f"{source.relative_to(storage_path)}\n")
+
+
+def _remove_expired(source: Path, current_time: float) -> bool:
+    """Remove a session file if all of its keys have expired."""
+    try:
+        with open(source, "rb") as fp:
+            stat = os.fstat(fp.fileno())
+            # A file created for a session which has never been saved is empty
+            expires_at = file_expiration(_format.load(fp)) if stat.st_size else 0.0
+            inode = stat.st_ino
+    except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+        return False
+    if expires_at is None or expires_at > current_time:
+        return False
+    try:
+        if os.stat(source).st_ino != inode:
+            # The session file has been replaced since it was read
+            return False
+        os.unlink(source)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def sweep_storage(
+    storage_path: Path, current_time: typing.Optional[float] = None
+) -> int:
+    """Remove expired session files of a storage listed by the expiry index.
+
+    Saved session files are listed in buckets by their expiration time,
+    so only buckets which have ended are read and the storage is never scanned.
+    A listed file is removed only if all of its keys have expired,
+    a file saved with later expiration is listed in a later bucket.
+    Sweepers of several workers may run at once, every bucket is read by one of them.
+
+    :param storage_path: A directory of session files
+    :param current_time: A current timestamp, now by default
+    :return: A number of removed session files
+    """
+    if current_time is None:
+        current_time = time.time()
+    index = storage_path / EXPIRY_INDEX
+    try:
+        buckets = sorted(int(name) for name in os.listdir(index) if name.isdigit())
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for bucket in buckets:
+        if bucket > current_time:
+            break
+        # A bucket is claimed by renaming it, so sweepers of other workers skip it
+        claimed = index / f".{bucket}.{secrets.token_hex(8)}"
+        try:
+            os.replace(index / str(bucket), claimed)
+        except FileNotFoundError:
+            continue
+        with open(claimed) as fp:
+            sources = set(fp.read().splitlines())
+        for source in sources:
+            removed += _remove_expired(storage_path / source, current_time)
+        claimed.unlink()
+    return removed
+
+
+def reshard_storage(storage_path: Path, depth: int, pattern: str = "*") -> int:
+    """Move session files of a storage into a layout with the passed shard depth.
+
+    Session files are looked up in the storage directory and in nested shard
+    directories, so a storage may be resharded from any depth. Emptied shard
+    directories are removed. Make sure that the storage directory is dedicated
+    to session files or narrow matched files with a pattern.
+
+    :param storage_path: A directory of session files
+    :param depth: A target number of nested shard directories
+    :param pattern: A glob pattern of session file names
+    :return: A number of moved session files
+    """
+
+    def is_shard(path: Path) -> bool:
+        return len(path.name) == SHARD_WIDTH and all(
+            char in "0123456789abcdef" for char in path.name
+        )
+
+    def is_temporary(path: Path) -> bool:
+        # Temporary files of saves in progress are renamed by their writers
+        return path.name.startswith(".") and path.name.endswith(".tmp")
+
+    moved = 0
+    for directory, directories, files in os.walk(storage_path, topdown=False):
+        directory = Path(directory)
+        relative = directory.relative_to(storage_path)
+        if not all(is_shard(Path(part)) for part in relative.parts):
+            continue
+        for path in directory.glob(pattern):
+            if not path.is_file() or is_temporary(path):
+                continue
+            target = storage_path.joinpath(*shard_parts(path.name, depth), path.name)
+            if target == path:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+            moved += 1
+        if relative.parts and not any(directory.iterdir()):
+            directory.rmdir()
+    return moved
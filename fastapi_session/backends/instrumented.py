@@ -0,0 +1,129 @@
+import time
+import typing
+
+from ..metrics import MetricsSink
+from .interfaces import BackendInterface
+
+__all__ = ("InstrumentedBackend",)
+
+
+def _size(values: typing.Iterable[typing.Any]) -> int:
+    """Count bytes of stored values, values of other types aren't counted."""
+    return sum(len(value) for value in values if isinstance(value, (str, bytes)))
+
+
+class InstrumentedBackend(BackendInterface):
+    """
+    A proxy of a backend recording every operation into a metrics sink.
+
+    A session manager wraps backends only if instrumentation is enabled,
+    so backends run without any overhead otherwise.
+    Attributes which aren't backend operations are taken from a wrapped backend.
+    """
+
+    def __init__(self, backend: BackendInterface, metrics: MetricsSink):
+        """
+        :param backend: A wrapped backend
+        :param metrics: A sink of timings of backend operations
+        """
+        self.backend = backend
+        self.metrics = metrics
+        self.client_side = backend.client_side
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self.backend, name)
+
+    async def _run(
+        self,
+        operation: str,
+        call: typing.Awaitable[typing.Any],
+        size: typing.Optional[int] = None,
+    ) -> typing.Any:
+        started = time.perf_counter()
+        try:
+            result = await call
+        except BaseException:
+            self.metrics.record(
+                operation, time.perf_counter() - started, error=True, size=size
+            )
+            raise
+        self.metrics.record(operation, time.perf_counter() - started, size=size)
+        return result
+
+    async def clear(self, pattern: str):
+        return await self._run("backend.clear", self.backend.clear(pattern))
+
+    async def keys(self, *args, **kwargs) -> typing.List[str]:
+        return await self._run("backend.keys", self.backend.keys(*args, **kwargs))
+
+    async def exists(self, *keys: typing.Sequence[str]) -> typing.Union[int, bool]:
+        return await self._run("backend.exists", self.backend.exists(*keys))
+
+    async def len(self, pattern: str) -> int:
+        return await self._run("backend.len", self.backend.len(pattern))
+
+    async def get(self, *keys: typing.Sequence[str]) -> typing.Sequence[typing.Any]:
+        started = time.perf_counter()
+        try:
+            values = await self.backend.get(*keys)
+        except BaseException:
+            self.metrics.record(
+                "backend.get", time.perf_counter() - started, error=True
+            )
+            raise
+        values = list(values)
+        self.metrics.record(
+            "backend.get", time.perf_counter() - started, size=_size(values)
+        )
+        return values
+
+    async def set(self, key: str, value: typing.Any, **kwargs) -> typing.Any:
+        return await self._run(
+            "backend.set", self.backend.set(key, value, **kwargs), _size([value])
+        )
+
+    async def update(self, data: typing.Dict, **kwargs) -> typing.Any:
+        return await self._run(
+            "backend.update",
+            self.backend.update(data, **kwargs),
+            _size(data.values()),
+        )
+
+    async def delete(self, *keys: typing.Sequence[str]) -> typing.Any:
+        return await self._run("backend.delete", self.backend.delete(*keys))
+
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        options = {"expire": expire} if expire else {}
+        return await self._run(
+            "backend.commit",
+            self.backend.commit(namespace, mapping, deleted, clear=clear, **options),
+            _size(mapping.values()),
+        )
+
+    async def sweep(self) -> int:
+        return await self._run("backend.sweep", self.backend.sweep())
+
+    async def persist(self) -> typing.Optional[bool]:
+        return await self._run("backend.persist", self.backend.persist())
+
+    def headers(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        return self.backend.headers()
+
+    async def close(self) -> None:
+        return await self.backend.close()
+
+    def __getitem__(self, key: str) -> typing.Any:
+        return self.backend[key]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.backend)
+
+    def __len__(self) -> int:
+        return len(self.backend)
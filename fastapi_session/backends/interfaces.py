@@ -7,6 +7,9 @@ from collections.abc import (
     Mapping,
 )
 
+from ..settings import SessionSettings
+from ._utils import group_expiring
+
 __all__ = (
     "BackendInterface",
     "FactoryInterface",
@@ -16,6 +19,10 @@ __all__ = (
 class BackendInterface(Mapping, ABC):
     """An abstract interface for a session backend."""
 
+    # Whether a backend keeps session data in cookies of a client,
+    # such a backend is created for every request instead of a session id
+    client_side: bool = False
+
     @abstractmethod
     async def clear(self, pattern: str):
         """Flush a user session data."""
@@ -60,6 +67,54 @@ class BackendInterface(Mapping, ABC):
         """Remove a key and its associated value from a storage."""
         raise NotImplementedError
 
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        """Apply a batch of buffered changes of a user session to a storage.
+
+        :param namespace: A user session namespace
+        :param mapping: Keys and values to be set
+        :param deleted: Keys to be removed
+        :param clear: Whether a user session must be flushed before applying changes
+        :param expire: Numbers of seconds set keys expire in
+        """
+        if clear:
+            await self.clear(namespace)
+        if deleted:
+            await self.delete(*deleted)
+        for ttl, group in group_expiring(mapping, expire).items():
+            if ttl is None:
+                await self.update(group)
+            else:
+                await self.update(group, expire=ttl)
+
+    async def sweep(self) -> int:
+        """Remove expired keys from a storage which doesn't expire them by itself.
+
+        :return: A number of removed entries
+        """
+        return 0
+
+    async def persist(self) -> typing.Optional[bool]:
+        """Save changes of a user session which are not written to a storage yet.
+
+        :return: True if changes have been written, False if there were no changes
+            and None if a backend writes changes immediately
+        """
+        return None
+
+    def headers(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        """Get raw response headers carrying persisted changes to a client."""
+        return []
+
+    async def close(self) -> None:
+        """Release resources of a backend shared between sessions."""
+
 
 class FactoryInterface(ABC):
     """An interface for adding an abstract factory method in order to instantiate a backend."""
@@ -69,5 +124,20 @@ class FactoryInterface(ABC):
         cls,
         adapter: typing.Optional[typing.Any],
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
     ) -> BackendInterface:
         raise NotImplementedError
+
+    @classmethod
+    async def sweep_expired(
+        cls,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
+    ) -> int:
+        """Remove expired sessions of a storage of backends created per session.
+
+        A storage of a shared backend adapter is swept by its backend instead.
+
+        :return: A number of removed sessions
+        """
+        return 0
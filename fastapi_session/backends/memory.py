@@ -0,0 +1,287 @@
+import asyncio
+import heapq
+import sys
+import threading
+import time
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from ._mixins import DisableMethodsMixin
+from ._utils import KEY_SEPARATOR, split_key
+from ..settings import SessionSettings
+from ..stats import CacheStats
+from .interfaces import BackendInterface, FactoryInterface
+
+__all__ = ("MemoryBackend", "MemoryStore", "get_memory_store")
+
+# A maximum number of expired keys removed by a single operation
+EXPIRY_BATCH: int = 64
+
+
+def _sizeof(name: str, value: typing.Any) -> int:
+    """Estimate a size of a stored key and its value in bytes."""
+    if isinstance(value, (str, bytes)):
+        return len(name) + len(value)
+    return len(name) + sys.getsizeof(value)
+
+
+class MemoryStore:
+    """A thread-safe store of session namespaces evicting least recently used ones.
+
+    A store is bounded by a number of keys and a total size of keys and values,
+    whole namespaces are evicted, so a session is never left partially stored.
+    Expiration times are kept in a heap, every operation removes a bounded
+    number of expired keys, and expired keys are never returned.
+    """
+
+    def __init__(
+        self,
+        max_entries: typing.Optional[int] = None,
+        max_bytes: typing.Optional[int] = None,
+    ):
+        """
+        :param max_entries: A maximum number of stored keys, None keeps it unbounded
+        :param max_bytes: A maximum total size of stored keys and values, None keeps it unbounded
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._namespaces: "OrderedDict[str, typing.Dict[str, typing.Any]]" = (
+            OrderedDict()
+        )
+        self._sizes: typing.Dict[str, int] = {}
+        self._expires: typing.Dict[typing.Tuple[str, str], float] = {}
+        self._heap: typing.List[typing.Tuple[float, str, str]] = []
+        self._entries = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Get a total size of stored keys and values in bytes."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        """Get a number of stored keys."""
+        return self._entries
+
+    def _remove(self, namespace: str, name: str) -> None:
+        data = self._namespaces[namespace]
+        size = _sizeof(name, data.pop(name))
+        self._sizes[namespace] -= size
+        self._bytes -= size
+        self._entries -= 1
+        self._expires.pop((namespace, name), None)
+        if not data:
+            del self._namespaces[namespace], self._sizes[namespace]
+
+    def _drop(self, namespace: str) -> None:
+        data = self._namespaces.pop(namespace)
+        self._bytes -= self._sizes.pop(namespace)
+        self._entries -= len(data)
+        for name in data:
+            self._expires.pop((namespace, name), None)
+
+    def _expire(self, now: float) -> None:
+        """Remove a bounded number of expired keys in the order of their expiration."""
+        heap = self._heap
+        for _ in range(EXPIRY_BATCH):
+            if not heap or heap[0][0] > now:
+                break
+            expires_at, namespace, name = heapq.heappop(heap)
+            # Entries of reset or removed keys are left in the heap and skipped
+            if self._expires.get((namespace, name)) == expires_at:
+                self._remove(namespace, name)
+        if len(heap) > 2 * len(self._expires) + EXPIRY_BATCH:
+            self._heap = [(at, *key) for key, at in self._expires.items()]
+            heapq.heapify(self._heap)
+
+    def _evict(self) -> None:
+        """Evict least recently used namespaces until the store fits its budget."""
+        while self._namespaces and (
+            (self.max_entries is not None and self._entries > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            self._drop(next(iter(self._namespaces)))
+            self.stats.evictions += 1
+
+    def _alive(self, namespace: str, name: str, now: float) -> bool:
+        expires_at = self._expires.get((namespace, name))
+        if expires_at is not None and expires_at <= now:
+            self._remove(namespace, name)
+            return False
+        return name in self._namespaces.get(namespace, ())
+
+    def get(self, keys: typing.Sequence[str]) -> typing.List[typing.Any]:
+        """Get values of storage keys marking their namespaces as recently used."""
+        now = time.time()
+        values = []
+        with self._lock:
+            self._expire(now)
+            for key in keys:
+                namespace, name = split_key(key)
+                if self._alive(namespace, name, now):
+                    self._namespaces.move_to_end(namespace)
+                    values.append(self._namespaces[namespace][name])
+                    self.stats.hits += 1
+                else:
+                    values.append(None)
+                    self.stats.misses += 1
+        return values
+
+    def update(
+        self, mapping: typing.Mapping[str, typing.Any], expire: typing.Optional[int]
+    ) -> None:
+        """Store values of storage keys.
+
+        :param mapping: Storage keys and their values
+        :param expire: A number of seconds values expire in, None keeps them
+        """
+        now = time.time()
+        expires_at = now + expire if expire else None
+        with self._lock:
+            self._expire(now)
+            for key, value in mapping.items():
+                namespace, name = split_key(key)
+                data = self._namespaces.get(namespace)
+                if data is None:
+                    data = self._namespaces[namespace] = {}
+                    self._sizes[namespace] = 0
+                elif name in data:
+                    size = _sizeof(name, data[name])
+                    self._sizes[namespace] -= size
+                    self._bytes -= size
+                    self._entries -= 1
+                self._namespaces.move_to_end(namespace)
+                data[name] = value
+                size = _sizeof(name, value)
+                self._sizes[namespace] += size
+                self._bytes += size
+                self._entries += 1
+                if expires_at is None:
+                    self._expires.pop((namespace, name), None)
+                else:
+                    self._expires[namespace, name] = expires_at
+                    heapq.heappush(self._heap, (expires_at, namespace, name))
+            self._evict()
+
+    def delete(self, keys: typing.Sequence[str]) -> int:
+        """Remove storage keys."""
+        deleted = 0
+        with self._lock:
+            for key in keys:
+                namespace, name = split_key(key)
+                if name in self._namespaces.get(namespace, ()):
+                    self._remove(namespace, name)
+                    deleted += 1
+        return deleted
+
+    def clear(self, namespace: str) -> None:
+        """Remove a whole namespace."""
+        with self._lock:
+            if namespace in self._namespaces:
+                self._drop(namespace)
+
+    def keys(self, namespace: str) -> typing.List[str]:
+        """Get storage keys of a namespace which haven't expired."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return [
+                f"{namespace}{KEY_SEPARATOR}{name}"
+                for name in list(self._namespaces.get(namespace, ()))
+                if self._alive(namespace, name, now)
+            ]
+
+
+@lru_cache(maxsize=None)
+def get_memory_store(
+    name: str,
+    max_entries: typing.Optional[int] = None,
+    max_bytes: typing.Optional[int] = None,
+) -> MemoryStore:
+    """Get a store shared within a process by its name and budget.
+
+    :param name: A name of a store
+    :param max_entries: A maximum number of stored keys
+    :param max_bytes: A maximum total size of stored keys and values
+    """
+    return MemoryStore(max_entries, max_bytes)
+
+
+@dataclass(order=False, eq=False, repr=False)
+class MemoryBackend(DisableMethodsMixin, FactoryInterface, BackendInterface):
+    """
+    A backend for managing session storage in memory of a process.
+    """
+
+    adapter: MemoryStore
+    loop: typing.Optional[asyncio.AbstractEventLoop] = field(default=None)
+
+    @classmethod
+    async def create(
+        cls,
+        adapter: typing.Optional[typing.Union[MemoryStore, str]] = None,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
+    ) -> "MemoryBackend":
+        """
+        A factory method for creating the backend.
+
+        :param adapter: A store of sessions, a store shared within a process is used
+            if it is missing or a session id is passed
+        :param loop: An instance of event loop
+        :param settings: Session settings defining a budget of a shared store
+        """
+        if not isinstance(adapter, MemoryStore):
+            if settings is None:
+                adapter = get_memory_store(cls.__name__)
+            else:
+                adapter = get_memory_store(
+                    cls.__name__,
+                    settings.SESSION_MEMORY_MAX_ENTRIES,
+                    settings.SESSION_MEMORY_MAX_BYTES,
+                )
+        return cls(adapter, loop)
+
+    async def clear(self, namespace: str) -> None:
+        self.adapter.clear(namespace)
+
+    async def keys(self, namespace: str) -> typing.List[str]:
+        return self.adapter.keys(namespace)
+
+    async def exists(self, *keys: typing.Sequence[str]) -> int:
+        return sum(value is not None for value in self.adapter.get(list(set(keys))))
+
+    async def len(self, namespace: str) -> int:
+        return len(self.adapter.keys(namespace))
+
+    async def get(self, *keys: typing.Sequence[str]) -> typing.Sequence[typing.Any]:
+        """Get values by the passed keys from a storage."""
+        return self.adapter.get(keys)
+
+    async def set(
+        self, key: str, value: typing.Any, expire: typing.Optional[int] = None, **kwargs
+    ) -> None:
+        """Set the value to the key in a storage.
+
+        :param expire: A number of seconds the value expires in
+        """
+        self.adapter.update({key: value}, expire)
+
+    async def update(
+        self,
+        mapping: typing.Dict[str, typing.Any],
+        expire: typing.Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """Update a storage with the passed mapping.
+
+        :param expire: A number of seconds values expire in
+        """
+        self.adapter.update(mapping, expire)
+
+    async def delete(self, *keys: typing.Sequence[str]) -> int:
+        return self.adapter.delete(keys)
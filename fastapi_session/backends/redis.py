@@ -6,10 +6,13 @@ from dataclasses import dataclass, field
 from itertools import chain
 
 from ._mixins import DisableMethodsMixin
+from ._utils import KEY_SEPARATOR, group_keys, split_key
+from ..enums import RedisLayoutEnum
+from ..settings import SessionSettings
 from .interfaces import BackendInterface, FactoryInterface
 
 
-__all__ = ("RedisBackend",)
+__all__ = ("RedisBackend", "RedisHashBackend", "migrate_to_hash_layout")
 
 
 @dataclass(order=False, eq=False, repr=False)
@@ -26,13 +29,21 @@ class RedisBackend(DisableMethodsMixin, FactoryInterface, BackendInterface):
         cls,
         adapter: RedisConnection,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
     ) -> "RedisBackend":
         """
         A factory method for creating and initializing the backend.
 
         :param adapter: An opened connection to a redis server
         :param loop: An instance of event loop
+        :param settings: Session settings defining a storage layout
         """
+        if (
+            cls is RedisBackend
+            and settings is not None
+            and settings.SESSION_REDIS_LAYOUT is RedisLayoutEnum.hash
+        ):
+            cls = RedisHashBackend
         return cls(adapter, loop)
 
     async def clear(self, namespace: str) -> None:
@@ -49,22 +60,281 @@ class RedisBackend(DisableMethodsMixin, FactoryInterface, BackendInterface):
         return await self.adapter.exists(*key)
 
     async def len(self, namespace: str) -> int:
-        return len(await self.adapter.keys(namespace))
+        return len(await self.keys(namespace))
 
     async def get(
         self,
         *keys: typing.Sequence[str],
     ) -> typing.Sequence[typing.Any]:
         """Get values by the passed keys from a storage."""
-        return [key.decode("utf-8") for key in await self.adapter.mget(*keys)]
+        return [
+            value.decode("utf-8") if value is not None else None
+            for value in await self.adapter.mget(*keys)
+        ]
+
+    async def ttls(
+        self, *keys: typing.Sequence[str]
+    ) -> typing.List[typing.Optional[float]]:
+        """Get numbers of seconds keys expire in, None if keys never expire."""
+        pipeline = self.adapter.pipeline()
+        for key in keys:
+            pipeline.pttl(self._expiring_key(key))
+        return [ttl / 1000 if ttl >= 0 else None for ttl in await pipeline.execute()]
+
+    def _expiring_key(self, key: str) -> str:
+        """Get a redis key which expiration a key of a session follows."""
+        return key
 
     async def set(self, key: str, value: typing.Any, **kwargs) -> None:
         """Set the value to the key in a storage."""
         return await self.adapter.set(key, value, **kwargs)
 
-    async def update(self, mapping: typing.Dict[str, typing.Any], **kwargs) -> None:
-        """Update a storage with the passed mapping."""
-        return await self.adapter.mset(*chain.from_iterable(mapping.items()))
+    async def update(
+        self,
+        mapping: typing.Dict[str, typing.Any],
+        expire: typing.Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """Update a storage with the passed mapping.
+
+        :param expire: A number of seconds keys expire in
+        """
+        if not expire:
+            return await self.adapter.mset(*chain.from_iterable(mapping.items()))
+        transaction = self.adapter.multi_exec()
+        transaction.mset(*chain.from_iterable(mapping.items()))
+        for key in mapping:
+            transaction.expire(key, expire)
+        await transaction.execute()
 
     async def delete(self, *keys: typing.Sequence[str]) -> str:
         return await self.adapter.delete(*keys)
+
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        """Apply a batch of buffered changes in a single MULTI/EXEC transaction."""
+        deleted = list(deleted)
+        if clear:
+            # SCAN doesn't block the server unlike KEYS
+            async for key in self.adapter.iscan(match=f"{namespace}:*"):
+                deleted.append(key)
+        transaction = self.adapter.multi_exec()
+        if deleted:
+            transaction.delete(*deleted)
+        if mapping:
+            transaction.mset(*chain.from_iterable(mapping.items()))
+        for key, ttl in (expire or {}).items():
+            transaction.expire(key, ttl)
+        await transaction.execute()
+
+
+@dataclass(order=False, eq=False, repr=False)
+class RedisHashBackend(RedisBackend):
+    """
+    A backend for managing redis based session storage
+    which keeps every session namespace in a single redis hash.
+
+    Fields of a hash can't expire, so a session expires as a whole.
+    Writes with a TTL only extend expiration of a session and a session
+    holding keys written without a TTL never expires, so a short TTL
+    of a single key never drops other keys of a session.
+    """
+
+    async def _ttls(self, namespaces: typing.Iterable[str]) -> typing.Dict[str, int]:
+        """Get remaining TTLs of session hashes in a single round trip."""
+        namespaces = list(namespaces)
+        if not namespaces:
+            return {}
+        pipeline = self.adapter.pipeline()
+        for namespace in namespaces:
+            pipeline.ttl(namespace)
+        return dict(zip(namespaces, await pipeline.execute()))
+
+    @staticmethod
+    def _expire(
+        transaction: typing.Any, namespace: str, ttl: typing.Optional[int], current: int
+    ) -> None:
+        """Extend expiration of a session hash within a transaction.
+
+        :param ttl: A TTL of written keys, None if keys never expire
+        :param current: A remaining TTL of a hash as the TTL command reports it
+        """
+        if not ttl:
+            transaction.persist(namespace)
+        elif current == -2 or ttl > current >= 0:
+            transaction.expire(namespace, ttl)
+
+    def _expiring_key(self, key: str) -> str:
+        return split_key(key)[0]
+
+    async def clear(self, namespace: str) -> None:
+        await self.adapter.delete(namespace)
+
+    async def keys(self, namespace: str) -> typing.List[str]:
+        return [
+            f"{namespace}{KEY_SEPARATOR}{name.decode('utf-8')}"
+            for name in await self.adapter.hkeys(namespace)
+        ]
+
+    async def exists(self, *keys: typing.Sequence[str]) -> int:
+        return sum(value is not None for value in await self.get(*keys))
+
+    async def len(self, namespace: str) -> int:
+        return await self.adapter.hlen(namespace)
+
+    async def get(
+        self,
+        *keys: typing.Sequence[str],
+    ) -> typing.Sequence[typing.Any]:
+        """Get values by the passed keys from a storage."""
+        values = {}
+        for namespace, names in group_keys(keys).items():
+            for name, value in zip(names, await self.adapter.hmget(namespace, *names)):
+                values[namespace, name] = (
+                    value.decode("utf-8") if value is not None else None
+                )
+        return [values[split_key(key)] for key in keys]
+
+    async def set(
+        self, key: str, value: typing.Any, expire: typing.Optional[int] = None, **kwargs
+    ) -> None:
+        """Set the value to the key in a storage.
+
+        :param expire: A number of seconds a session expires in at least
+        """
+        namespace, name = split_key(key)
+        ttls = await self._ttls([namespace]) if expire else {}
+        transaction = self.adapter.multi_exec()
+        transaction.hset(namespace, name, value)
+        self._expire(transaction, namespace, expire, ttls.get(namespace, -2))
+        await transaction.execute()
+
+    async def update(
+        self,
+        mapping: typing.Dict[str, typing.Any],
+        expire: typing.Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """Update a storage with the passed mapping.
+
+        :param expire: A number of seconds sessions expire in at least
+        """
+        namespaces = {}
+        for key, value in mapping.items():
+            namespace, name = split_key(key)
+            namespaces.setdefault(namespace, {})[name] = value
+        ttls = await self._ttls(namespaces) if expire else {}
+        transaction = self.adapter.multi_exec()
+        for namespace, data in namespaces.items():
+            transaction.hmset_dict(namespace, data)
+            self._expire(transaction, namespace, expire, ttls.get(namespace, -2))
+        await transaction.execute()
+
+    async def delete(self, *keys: typing.Sequence[str]) -> int:
+        deleted = 0
+        for namespace, names in group_keys(keys).items():
+            deleted += await self.adapter.hdel(namespace, *names)
+        return deleted
+
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        """Apply a batch of buffered changes in a single MULTI/EXEC transaction.
+
+        A session expires in the longest TTL of its changed keys at least
+        and never expires if some of them are written without a TTL.
+        """
+        expire = expire or {}
+        namespaces, ttls = {}, {}
+        for key, value in mapping.items():
+            name, field = split_key(key)
+            namespaces.setdefault(name, {})[field] = value
+            ttl = expire.get(key)
+            if name in ttls:
+                ttl = max(ttl, ttls[name]) if ttl and ttls[name] else None
+            ttls[name] = ttl
+        current = await self._ttls(name for name, ttl in ttls.items() if ttl)
+        if clear:
+            current.pop(namespace, None)
+
+        transaction = self.adapter.multi_exec()
+        if clear:
+            transaction.delete(namespace)
+        for name, names in group_keys(deleted).items():
+            transaction.hdel(name, *names)
+        for name, data in namespaces.items():
+            transaction.hmset_dict(name, data)
+            self._expire(transaction, name, ttls[name], current.get(name, -2))
+        await transaction.execute()
+
+
+async def migrate_to_hash_layout(
+    adapter: RedisConnection,
+    match: str = f"*{KEY_SEPARATOR}*",
+    batch_size: int = 1000,
+) -> int:
+    """Move sessions stored as "namespace:key" strings into a hash per namespace.
+
+    Keys are iterated with SCAN, so the server is not blocked during a migration.
+    Every batch is moved in a MULTI/EXEC transaction. Make sure that the matched
+    keys belong to sessions only, e.g. by keeping sessions in a dedicated database.
+    A hash expires like RedisHashBackend expires it, in the longest TTL of its keys,
+    and never expires if some of its keys never expire.
+
+    :param adapter: An opened connection to a redis server
+    :param match: A pattern of string keys to migrate
+    :param batch_size: A number of keys moved in a single transaction
+    :return: A number of migrated keys
+    """
+
+    async def move(keys: typing.List[bytes]) -> int:
+        namespaces = list({split_key(key.decode("utf-8"))[0]: None for key in keys})
+        pipeline = adapter.pipeline()
+        pipeline.mget(*keys)
+        for key in [*keys, *namespaces]:
+            pipeline.pttl(key)
+        values, *ttls = await pipeline.execute()
+        current = dict(zip(namespaces, ttls[len(keys) :]))
+
+        transaction = adapter.multi_exec()
+        moved, expire = 0, {}
+        for key, value, ttl in zip(keys, values, ttls):
+            # Skip keys holding other data types or removed in the meantime
+            if value is None or ttl == -2:
+                continue
+            namespace, name = split_key(key.decode("utf-8"))
+            transaction.hset(namespace, name, value)
+            transaction.delete(key)
+            expire.setdefault(namespace, []).append(ttl if ttl >= 0 else None)
+            moved += 1
+        for namespace, namespace_ttls in expire.items():
+            # Expiration of a hash is only extended like RedisHashBackend does it
+            if None in namespace_ttls:
+                transaction.persist(namespace)
+                continue
+            ttl = max(namespace_ttls)
+            if current[namespace] == -2 or ttl > current[namespace] >= 0:
+                transaction.pexpire(namespace, ttl)
+        await transaction.execute()
+        return moved
+
+    migrated, batch = 0, []
+    async for key in adapter.iscan(match=match, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            migrated += await move(batch)
+            batch = []
+    if batch:
+        migrated += await move(batch)
+    return migrated
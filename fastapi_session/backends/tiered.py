@@ -0,0 +1,338 @@
+import asyncio
+import json
+import secrets
+import time
+import typing
+from dataclasses import dataclass, field
+
+from aioredis import RedisConnection
+
+from ._mixins import DisableMethodsMixin
+from ._utils import group_keys, split_key
+from ..caches import LRUCache
+from ..enums import NearCacheInvalidationEnum
+from ..settings import SessionSettings
+from ..stats import CacheStats
+from .interfaces import BackendInterface, FactoryInterface
+from .redis import RedisBackend
+
+__all__ = ("TieredRedisBackend",)
+
+# A channel of invalidation messages of near caches
+INVALIDATION_CHANNEL: str = "fastapi-session:invalidations"
+# A prefix of version keys of namespaces, it has no key separator,
+# so version keys never match patterns of session keys
+VERSION_PREFIX: str = "fastapi-session-version."
+# A number of seconds version keys expire in, cached namespaces never outlive them
+VERSION_TTL: int = 24 * 60 * 60
+
+
+@dataclass
+class _Entry:
+    """Cached values of a namespace, None marks a missing key."""
+
+    data: typing.Dict[str, typing.Optional[str]]
+    version: typing.Optional[bytes] = None
+    filled_at: float = field(default_factory=time.monotonic)
+    checked_at: float = field(default_factory=time.monotonic)
+    # A time the earliest expiring value expires at, None if values never expire
+    expires_at: typing.Optional[float] = None
+
+    def expire(self, ttls: typing.Iterable[typing.Optional[float]], now: float) -> None:
+        """Make an entry expire with the earliest of values expiring in passed TTLs."""
+        for ttl in ttls:
+            if ttl and (self.expires_at is None or now + ttl < self.expires_at):
+                self.expires_at = now + ttl
+
+
+class TieredRedisBackend(DisableMethodsMixin, FactoryInterface, BackendInterface):
+    """
+    A redis backend with a near cache of namespaces within a worker.
+
+    Writes go through to redis and update the near cache of a writer,
+    near caches of other workers are invalidated either by messages published
+    to a channel or by version keys of namespaces checked once per staleness window.
+    Messages are received by a dedicated connection of a pool of connections.
+    """
+
+    def __init__(
+        self,
+        backend: RedisBackend,
+        max_entries: int = 1024,
+        invalidation: NearCacheInvalidationEnum = NearCacheInvalidationEnum.pubsub,
+        staleness: float = 5.0,
+    ):
+        """
+        :param backend: A redis backend keeping session data
+        :param max_entries: A maximum number of namespaces cached by a worker
+        :param invalidation: A way of invalidating near caches of other workers
+        :param staleness: A maximum number of seconds a cached value may be stale for
+        """
+        self.backend = backend
+        self.adapter: RedisConnection = backend.adapter
+        self.invalidation = invalidation
+        self.staleness = staleness
+        self.stats = CacheStats()
+        self._cache: LRUCache[str, _Entry] = LRUCache(max_entries)
+        self._worker = secrets.token_hex(8)
+        # A number of invalidations, values fetched during an invalidation aren't cached
+        self._invalidations = 0
+        self._listener: typing.Optional[asyncio.Task] = None
+
+    @classmethod
+    async def create(
+        cls,
+        adapter: RedisConnection,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        settings: typing.Optional[SessionSettings] = None,
+    ) -> "TieredRedisBackend":
+        """
+        A factory method for creating and initializing the backend.
+
+        :param adapter: An opened pool of connections to a redis server,
+            a single connection serves pubsub invalidation only
+        :param loop: An instance of event loop
+        :param settings: Session settings defining a storage layout and a near cache
+        """
+        backend = await RedisBackend.create(adapter, loop, settings)
+        if settings is None:
+            self = cls(backend)
+        else:
+            self = cls(
+                backend,
+                max_entries=settings.SESSION_NEAR_CACHE_SIZE,
+                invalidation=settings.SESSION_NEAR_CACHE_INVALIDATION,
+                staleness=settings.SESSION_NEAR_CACHE_STALENESS,
+            )
+        if self.invalidation is NearCacheInvalidationEnum.pubsub:
+            if isinstance(getattr(adapter, "connection", adapter), RedisConnection):
+                # A subscribed connection can't run other commands
+                raise ValueError(
+                    "Pubsub invalidation of near caches requires a pool of redis "
+                    "connections, use create_redis_pool or version invalidation"
+                )
+            (channel,) = await adapter.subscribe(INVALIDATION_CHANNEL)
+            self._listener = asyncio.ensure_future(self._listen(channel), loop=loop)
+        return self
+
+    async def close(self) -> None:
+        """Stop receiving invalidation messages."""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+            await self.adapter.unsubscribe(INVALIDATION_CHANNEL)
+
+    async def _listen(self, channel: typing.Any) -> None:
+        while await channel.wait_message():
+            message = json.loads(await channel.get())
+            if message["worker"] != self._worker:
+                self._invalidate(message["namespaces"], message["keys"])
+
+    def _invalidate(
+        self, namespaces: typing.Iterable[str], keys: typing.Iterable[str]
+    ) -> None:
+        self._invalidations += 1
+        for namespace in namespaces:
+            self._cache.pop(namespace)
+        for key in keys:
+            namespace, name = split_key(key)
+            entry = self._cache.get(namespace)
+            if entry is not None:
+                entry.data.pop(name, None)
+
+    async def _notify(
+        self,
+        namespaces: typing.Iterable[str] = (),
+        keys: typing.Iterable[str] = (),
+        written: typing.Optional[typing.Mapping[str, typing.Any]] = None,
+        expire: typing.Optional[typing.Mapping[str, typing.Optional[int]]] = None,
+    ) -> None:
+        """Update the near cache of a writer and invalidate near caches of other workers.
+
+        :param namespaces: Cleared namespaces
+        :param keys: Removed or set keys
+        :param written: Set keys and their values
+        :param expire: Numbers of seconds set keys expire in
+        """
+        now = time.monotonic()
+        namespaces, keys, expire = list(namespaces), list(keys), expire or {}
+        self._invalidations += 1
+        for namespace in namespaces:
+            self._cache.pop(namespace)
+        changed = {}
+        for key in keys:
+            namespace, name = split_key(key)
+            changed.setdefault(namespace, {})[name] = (written or {}).get(key)
+
+        if self.invalidation is NearCacheInvalidationEnum.pubsub:
+            message = {"worker": self._worker, "namespaces": namespaces, "keys": keys}
+            await self.adapter.publish(INVALIDATION_CHANNEL, json.dumps(message))
+            versions = {}
+        else:
+            changed_namespaces = [*namespaces, *changed]
+            transaction = self.adapter.multi_exec()
+            futures = []
+            for namespace in changed_namespaces:
+                futures.append(transaction.incr(f"{VERSION_PREFIX}{namespace}"))
+                transaction.expire(f"{VERSION_PREFIX}{namespace}", VERSION_TTL)
+            await transaction.execute()
+            versions = {
+                namespace: await future
+                for namespace, future in zip(changed_namespaces, futures)
+            }
+
+        for namespace, data in changed.items():
+            entry = self._cache.get(namespace)
+            if entry is None:
+                continue
+            if namespace in versions:
+                if int(entry.version or 0) + 1 != versions[namespace]:
+                    # Another worker has changed the namespace since it was checked
+                    self._cache.pop(namespace)
+                    continue
+                entry.version = str(versions[namespace]).encode("utf-8")
+            entry.data.update(data)
+            entry.expire((expire.get(f"{namespace}:{name}") for name in data), now)
+
+    async def _validate(
+        self, namespaces: typing.Iterable[str], now: float
+    ) -> typing.Dict[str, typing.Optional[bytes]]:
+        """Drop cached namespaces which are stale or have been changed by other workers.
+
+        :return: Current versions of namespaces which aren't cached or have been checked
+        """
+        expired, unchecked = [], []
+        for namespace in namespaces:
+            entry = self._cache.get(namespace)
+            if entry is None:
+                unchecked.append(namespace)
+            elif entry.expires_at is not None and now >= entry.expires_at:
+                # Keys expired by redis don't change versions of namespaces
+                expired.append(namespace)
+            elif self.invalidation is NearCacheInvalidationEnum.pubsub:
+                if now - entry.filled_at >= self.staleness:
+                    expired.append(namespace)
+            elif now - entry.filled_at >= VERSION_TTL:
+                expired.append(namespace)
+            elif now - entry.checked_at >= self.staleness:
+                unchecked.append(namespace)
+        for namespace in expired:
+            self._cache.pop(namespace)
+        if self.invalidation is NearCacheInvalidationEnum.pubsub:
+            return {}
+
+        unchecked.extend(expired)
+        if not unchecked:
+            return {}
+        versions = dict(
+            zip(
+                unchecked,
+                await self.adapter.mget(
+                    *(f"{VERSION_PREFIX}{namespace}" for namespace in unchecked)
+                ),
+            )
+        )
+        for namespace, version in versions.items():
+            entry = self._cache.get(namespace)
+            if entry is None:
+                continue
+            if entry.version != version:
+                self._cache.pop(namespace)
+            else:
+                entry.checked_at = now
+        return versions
+
+    async def get(self, *keys: typing.Sequence[str]) -> typing.Sequence[typing.Any]:
+        """Get values from the near cache fetching missed ones from redis at once."""
+        now = time.monotonic()
+        invalidations = self._invalidations
+        groups = group_keys(keys)
+        versions = await self._validate(groups, now)
+
+        values, missed = {}, []
+        for namespace, names in groups.items():
+            entry = self._cache.get(namespace)
+            for name in names:
+                key = f"{namespace}:{name}"
+                if entry is not None and name in entry.data:
+                    values[key] = entry.data[name]
+                    self.stats.hits += 1
+                else:
+                    missed.append(key)
+                    self.stats.misses += 1
+        if not missed:
+            return [values[key] for key in keys]
+
+        if self.invalidation is NearCacheInvalidationEnum.version:
+            # Expiration of fetched keys isn't seen by version checks
+            fetched, ttls = await asyncio.gather(
+                self.backend.get(*missed), self.backend.ttls(*missed)
+            )
+        else:
+            fetched, ttls = await self.backend.get(*missed), []
+        values.update(zip(missed, fetched))
+        ttls = dict(zip(missed, ttls))
+        if invalidations == self._invalidations:
+            # Values fetched during an invalidation might be stale, so they aren't cached
+            for namespace, names in group_keys(missed).items():
+                entry = self._cache.get(namespace)
+                if entry is None:
+                    entry = _Entry({}, versions.get(namespace), now, now)
+                    self._cache.set(namespace, entry)
+                entry.data.update(
+                    (name, values[f"{namespace}:{name}"]) for name in names
+                )
+                entry.expire((ttls.get(f"{namespace}:{name}") for name in names), now)
+        return [values[key] for key in keys]
+
+    async def set(self, key: str, value: typing.Any, **kwargs) -> None:
+        """Set the value to the key in redis and the near cache."""
+        await self.backend.set(key, value, **kwargs)
+        await self._notify(
+            keys=[key], written={key: value}, expire={key: kwargs.get("expire")}
+        )
+
+    async def update(self, mapping: typing.Dict[str, typing.Any], **kwargs) -> None:
+        """Update redis and the near cache with the passed mapping."""
+        await self.backend.update(mapping, **kwargs)
+        await self._notify(
+            keys=mapping,
+            written=mapping,
+            expire=dict.fromkeys(mapping, kwargs.get("expire")),
+        )
+
+    async def delete(self, *keys: typing.Sequence[str]) -> typing.Any:
+        result = await self.backend.delete(*keys)
+        await self._notify(keys=keys)
+        return result
+
+    async def clear(self, namespace: str) -> None:
+        await self.backend.clear(namespace)
+        await self._notify(namespaces=[namespace])
+
+    async def commit(
+        self,
+        namespace: str,
+        mapping: typing.Dict[str, typing.Any],
+        deleted: typing.Sequence[str],
+        clear: bool = False,
+        expire: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        """Apply a batch of buffered changes to redis and the near cache."""
+        options = {"expire": expire} if expire else {}
+        await self.backend.commit(namespace, mapping, deleted, clear=clear, **options)
+        await self._notify(
+            namespaces=[namespace] if clear else [],
+            keys=[*deleted, *mapping],
+            written=mapping,
+            expire=expire,
+        )
+
+    async def keys(self, namespace: str) -> typing.List[str]:
+        return await self.backend.keys(namespace)
+
+    async def exists(self, *keys: typing.Sequence[str]) -> int:
+        return await self.backend.exists(*keys)
+
+    async def len(self, namespace: str) -> int:
+        return await self.backend.len(namespace)
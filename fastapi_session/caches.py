@@ -0,0 +1,113 @@
+"""A module which contains in-process caches of session data."""
+
+import threading
+import typing
+from collections import OrderedDict
+from functools import lru_cache
+
+from .stats import CacheStats
+
+__all__ = ("LRUCache", "get_shared_cache")
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+
+
+class LRUCache(typing.Generic[K, V]):
+    """A thread-safe cache evicting least recently used entries.
+
+    A cache is bounded by a number of entries and optionally by a total size
+    of entries in bytes, sizes are passed explicitly on setting entries.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: typing.Optional[int] = None):
+        """
+        :param max_entries: A maximum number of cached entries
+        :param max_bytes: A maximum total size of cached entries, None keeps it unbounded
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[K, typing.Tuple[V, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Get a total size of cached entries in bytes."""
+        return self._bytes
+
+    def get(
+        self,
+        key: K,
+        default: typing.Optional[V] = None,
+        valid: typing.Optional[typing.Callable[[V], bool]] = None,
+    ) -> typing.Optional[V]:
+        """Get a cached value marking it as recently used.
+
+        :param key: A key of a cached value
+        :param default: A value returned if the key is missing
+        :param valid: A check of a cached value, invalid values are removed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and valid is not None and not valid(entry[0]):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def set(self, key: K, value: V, size: int = 0) -> None:
+        """Cache a value evicting least recently used entries if limits are exceeded.
+
+        :param key: A key of a cached value
+        :param value: A cached value
+        :param size: A size of a cached value in bytes
+        """
+        with self._lock:
+            self._remove(key)
+            if self.max_entries <= 0 or (
+                self.max_bytes is not None and size > self.max_bytes
+            ):
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.stats.evictions += 1
+
+    def pop(self, key: K) -> None:
+        """Remove a cached value if it exists."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=None)
+def get_shared_cache(
+    name: str, max_entries: int, max_bytes: typing.Optional[int] = None
+) -> LRUCache:
+    """Get a cache shared within a process by everyone using the same name and limits."""
+    return LRUCache(max_entries, max_bytes)
@@ -1,4 +1,13 @@
 # Types of backend
 FS_BACKEND_TYPE: str = "fastapi_session.backends.FSBackend"
+MEMORY_BACKEND_TYPE: str = "fastapi_session.backends.MemoryBackend"
 REDIS_BACKEND_TYPE: str = "fastapi_session.backends.RedisBackend"
+TIERED_REDIS_BACKEND_TYPE: str = "fastapi_session.backends.TieredRedisBackend"
 DATABASE_BACKEND_TYPE: str = "fastapi_session.backends.DBBackend"
+COOKIE_BACKEND_TYPE: str = "fastapi_session.backends.CookieBackend"
+
+# A maximum number of nested directories for session files
+MAX_SHARD_DEPTH: int = 8
+
+# A maximum difference (in seconds) between a token timestamp in the future and now
+MAX_CLOCK_SKEW: int = 60
@@ -1,2 +1,9 @@
+from .aead import AEADEncryptor
 from .aes import AES_SIV_Encryptor
+from .hashers import (
+    BLAKE2bKeyEncoder,
+    HMACKeyEncoder,
+    KeyEncoderInterface,
+    create_key_encoder,
+)
 from .interfaces import EncryptorInterface
@@ -0,0 +1,131 @@
+import os
+import typing
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCMSIV
+except ImportError:  # cryptography < 42
+    AESGCMSIV = None
+
+from ..caches import LRUCache
+from ..enums import EncryptorEnum
+from .hashers import HMACKeyEncoder, KeyEncoderInterface
+from .interfaces import EncryptorInterface
+
+__all__ = ("AEADEncryptor",)
+
+# A version byte of AEAD messages
+AEAD_VERSION: bytes = b"\x02"
+NONCE_SIZE: int = 12
+
+
+class AEADEncryptor(EncryptorInterface):
+    """An encryptor using AEAD ciphers of the cryptography package.
+
+    Every message gets a random nonce, so messages are not deterministic
+    and key names are produced by a keyed digest instead of encryption.
+    A storage key of a value is bound to it as associated data,
+    so a value copied under another key or into another session is rejected.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        salt: typing.Union[str, bytes],
+        algorithm: EncryptorEnum = EncryptorEnum.chacha20_poly1305,
+        key_cache_size: int = 1024,
+        key_encoder: typing.Optional[KeyEncoderInterface] = None,
+        namespace_cache_size: int = 1024,
+    ):
+        """
+        :param secret: A secret deriving an encryption key
+        :param salt: A salt deriving an encryption key
+        :param algorithm: An AEAD cipher, either ChaCha20-Poly1305 or AES-GCM-SIV
+        :param key_cache_size: A number of memoized key names, 0 disables memoization
+        :param key_encoder: An encoder of key names, HMAC-SHA256 by default
+        :param namespace_cache_size: A number of memoized namespaces, 0 disables memoization
+        """
+        if isinstance(salt, str):
+            salt = salt.encode("utf-8")
+        key = PBKDF2HMAC(
+            algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100_000
+        ).derive(secret.encode("utf-8"))
+        if algorithm is EncryptorEnum.aes_gcm_siv:
+            if AESGCMSIV is None:
+                raise ValueError(
+                    "AES-GCM-SIV is not supported by the cryptography package"
+                )
+            self._cipher = AESGCMSIV(key)
+        elif algorithm is EncryptorEnum.chacha20_poly1305:
+            self._cipher = ChaCha20Poly1305(key)
+        else:
+            raise ValueError(f"Algorithm {algorithm} is not an AEAD cipher")
+        self.key_cache: LRUCache[str, str] = LRUCache(key_cache_size)
+        # Session ids are memoized apart, so ids of many users never evict hot keys
+        self.namespace_cache: LRUCache[str, str] = LRUCache(namespace_cache_size)
+        self._key_encoder = key_encoder or HMACKeyEncoder(secret)
+
+    def encrypt(
+        self, message: str, associated_data: typing.Optional[bytes] = None
+    ) -> str:
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._cipher.encrypt(nonce, message.encode("utf-8"), associated_data)
+        return urlsafe_b64encode(AEAD_VERSION + nonce + sealed).rstrip(b"=").decode()
+
+    def decrypt(
+        self,
+        message: typing.Union[str, bytes],
+        associated_data: typing.Optional[bytes] = None,
+    ) -> bytes:
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        message = urlsafe_b64decode(message + b"=" * (-len(message) % 4))
+        if message[:1] != AEAD_VERSION:
+            raise ValueError("Unsupported version of an encrypted message")
+        nonce, sealed = message[1 : NONCE_SIZE + 1], message[NONCE_SIZE + 1 :]
+        try:
+            return self._cipher.decrypt(nonce, sealed, associated_data)
+        except InvalidTag:
+            raise ValueError("MAC check failed") from None
+
+    def encrypt_many(
+        self,
+        messages: typing.Sequence[str],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[str]:
+        """Encrypt a batch of messages binding associated data to every message."""
+        encrypt = self.encrypt
+        if associated_data is None:
+            return [encrypt(message) for message in messages]
+        return [encrypt(*pair) for pair in zip(messages, associated_data)]
+
+    def decrypt_many(
+        self,
+        messages: typing.Sequence[typing.Union[str, bytes]],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[bytes]:
+        """Decrypt a batch of messages verifying associated data of every message."""
+        decrypt = self.decrypt
+        if associated_data is None:
+            return [decrypt(message) for message in messages]
+        return [decrypt(*pair) for pair in zip(messages, associated_data)]
+
+    def encrypt_key(self, key: str) -> str:
+        """Encode a session key with a keyed digest memoizing the result."""
+        return self._memoize(self.key_cache, key)
+
+    def encrypt_namespace(self, session_id: str) -> str:
+        """Encode a session id memoizing the result apart from session keys."""
+        return self._memoize(self.namespace_cache, session_id)
+
+    def _memoize(self, cache: LRUCache[str, str], key: str) -> str:
+        encoded = cache.get(key)
+        if encoded is None:
+            encoded = self._key_encoder.encode(key)
+            cache.set(key, encoded)
+        return encoded
@@ -1,39 +1,163 @@
 import json
 import typing
 from binascii import hexlify, unhexlify
-from base64 import b64encode, b64decode
+from base64 import b64encode, b64decode, urlsafe_b64decode, urlsafe_b64encode
 
 from Cryptodome.Cipher import AES
 from Cryptodome.Protocol.KDF import PBKDF2
+from cryptography.exceptions import InvalidTag
 
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESSIV
+except ImportError:  # cryptography < 37
+    AESSIV = None
+
+from ..caches import LRUCache
+from .hashers import KeyEncoderInterface
 from .interfaces import EncryptorInterface
 
 
 __all__ = ("AES_SIV_Encryptor",)
 
+# A version byte of compact messages, legacy messages never start with it
+COMPACT_VERSION: bytes = b"\x01"
+# A first character of base64 encoded compact messages, it never starts legacy ones
+COMPACT_PREFIX: bytes = urlsafe_b64encode(COMPACT_VERSION)[:1]
+TAG_SIZE: int = 16
+
 
 class AES_SIV_Encryptor(EncryptorInterface):
     """An encryptor using AES algorithm with SIV mode providing deterministically encrypted messages."""
 
     def __init__(
-        self, secret: str, salt: bytes, header: typing.Optional[bytes] = "fastsession"
+        self,
+        secret: str,
+        salt: bytes,
+        header: typing.Optional[bytes] = "fastsession",
+        key_cache_size: int = 1024,
+        compact: bool = False,
+        key_encoder: typing.Optional[KeyEncoderInterface] = None,
+        namespace_cache_size: int = 1024,
     ):
+        """
+        :param secret: A secret deriving an encryption key
+        :param salt: A salt deriving an encryption key
+        :param header: An associated header authenticated with every message
+        :param key_cache_size: A number of memoized encrypted keys, 0 disables memoization
+        :param compact: Encrypt messages into the compact format instead of the legacy one
+        :param key_encoder: An encoder of key names used instead of their encryption
+        :param namespace_cache_size: A number of memoized namespaces, 0 disables memoization
+        """
         self._components = ["ciphertext", "tag"]
         self._key = PBKDF2(secret, salt, 32)
         self._factory = AES
         self._mode = AES.MODE_SIV
         self._header = header
+        self._associated_data = [header.encode("utf-8")]
+        # A reusable cipher producing the same messages as a new cipher per message
+        self._siv = AESSIV(self._key) if AESSIV is not None else None
+        self.key_cache: LRUCache[str, str] = LRUCache(key_cache_size)
+        # Session ids are memoized apart, so ids of many users never evict hot keys
+        self.namespace_cache: LRUCache[str, str] = LRUCache(namespace_cache_size)
+        self._compact = compact
+        self._key_encoder = key_encoder
 
-    def encrypt(self, message: str) -> bytes:
+    def _cipher(self) -> typing.Any:
         cipher = self._factory.new(self._key, self._mode, None)
         cipher.update(self._header.encode("utf-8"))
-        ciphertext, tag = cipher.encrypt_and_digest(message.encode("utf-8"))
+        return cipher
+
+    def _seal(self, plaintext: bytes) -> typing.Tuple[bytes, bytes]:
+        """Encrypt a plaintext into a tag and a ciphertext."""
+        if self._siv is not None and plaintext:
+            sealed = self._siv.encrypt(plaintext, self._associated_data)
+            return sealed[:TAG_SIZE], sealed[TAG_SIZE:]
+        ciphertext, tag = self._cipher().encrypt_and_digest(plaintext)
+        return tag, ciphertext
+
+    def _open(self, tag: bytes, ciphertext: bytes) -> bytes:
+        """Decrypt a ciphertext verifying its tag."""
+        if self._siv is not None and ciphertext:
+            try:
+                return self._siv.decrypt(tag + ciphertext, self._associated_data)
+            except InvalidTag:
+                raise ValueError("MAC check failed") from None
+        return self._cipher().decrypt_and_verify(ciphertext, tag)
+
+    def _encode(self, tag: bytes, ciphertext: bytes) -> str:
+        if self._compact:
+            message = urlsafe_b64encode(COMPACT_VERSION + tag + ciphertext)
+            return message.rstrip(b"=").decode()
         payload = [hexlify(x).decode("utf-8") for x in (ciphertext, tag)]
         return b64encode(":".join(payload).encode("utf-8")).decode("utf-8")
 
-    def decrypt(self, message: str) -> str:
-        cipher = self._factory.new(self._key, self._mode, None)
-        cipher.update(self._header.encode("utf-8"))
-        data = b64decode(message.encode("utf-8")).decode("utf-8").split(":")
-        ciphertext, tag = [unhexlify(x) for x in data]
-        return cipher.decrypt_and_verify(ciphertext, tag)
+    @staticmethod
+    def _decode(message: typing.Union[str, bytes]) -> typing.Tuple[bytes, bytes]:
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        if message[:1] == COMPACT_PREFIX:
+            message = urlsafe_b64decode(message + b"=" * (-len(message) % 4))
+        if message[:1] == COMPACT_VERSION:
+            return message[1 : TAG_SIZE + 1], message[TAG_SIZE + 1 :]
+        ciphertext, tag = [
+            unhexlify(x) for x in b64decode(message).decode("utf-8").split(":")
+        ]
+        return tag, ciphertext
+
+    def encrypt_bytes(self, message: str) -> bytes:
+        """Encrypt a message into the compact binary format.
+
+        A message consists of a version byte, a tag and a ciphertext.
+        """
+        tag, ciphertext = self._seal(message.encode("utf-8"))
+        return COMPACT_VERSION + tag + ciphertext
+
+    def encrypt(self, message: str) -> str:
+        return self._encode(*self._seal(message.encode("utf-8")))
+
+    def decrypt(self, message: typing.Union[str, bytes]) -> bytes:
+        """Decrypt a message in either the compact (raw or base64 encoded) or the legacy format."""
+        return self._open(*self._decode(message))
+
+    def encrypt_many(
+        self,
+        messages: typing.Sequence[str],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[str]:
+        """Encrypt a batch of messages reusing a single cipher.
+
+        Associated data is ignored to keep messages compatible with single encryption.
+        """
+        seal, encode = self._seal, self._encode
+        return [encode(*seal(message.encode("utf-8"))) for message in messages]
+
+    def decrypt_many(
+        self,
+        messages: typing.Sequence[typing.Union[str, bytes]],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[bytes]:
+        """Decrypt a batch of messages reusing a single cipher."""
+        open_, decode = self._open, self._decode
+        return [open_(*decode(message)) for message in messages]
+
+    def encrypt_key(self, key: str) -> str:
+        """Encrypt a session key memoizing the result.
+
+        SIV mode is deterministic, so hot keys are encrypted only once.
+        A key encoder replaces encryption with a keyed digest if it is set.
+        """
+        return self._memoize(self.key_cache, key)
+
+    def encrypt_namespace(self, session_id: str) -> str:
+        """Encrypt a session id memoizing the result apart from session keys."""
+        return self._memoize(self.namespace_cache, session_id)
+
+    def _memoize(self, cache: LRUCache[str, str], key: str) -> str:
+        encrypted = cache.get(key)
+        if encrypted is None:
+            if self._key_encoder is not None:
+                encrypted = self._key_encoder.encode(key)
+            else:
+                encrypted = self.encrypt(key)
+            cache.set(key, encrypted)
+        return encrypted
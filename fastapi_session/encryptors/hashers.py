@@ -0,0 +1,89 @@
+import hashlib
+import hmac
+import typing
+from abc import ABC, abstractmethod
+from base64 import urlsafe_b64encode
+
+from ..enums import KeyEncoderEnum
+
+__all__ = (
+    "BLAKE2bKeyEncoder",
+    "HMACKeyEncoder",
+    "KeyEncoderInterface",
+    "create_key_encoder",
+)
+
+
+class KeyEncoderInterface(ABC):
+    """An interface of one-way encoders of session key names and session ids."""
+
+    # A size (in bytes) of a full digest of a hash function
+    max_digest_size: int = 32
+
+    def __init__(self, secret: str, digest_size: int = 16):
+        """
+        :param secret: A secret keying a hash function
+        :param digest_size: A number of bytes a digest is truncated to
+        """
+        if not 1 <= digest_size <= self.max_digest_size:
+            raise ValueError(
+                f"Digest size {digest_size} must be between 1 and "
+                f"{self.max_digest_size}"
+            )
+        # A key of a hash function is derived so it never matches the secret itself
+        self._key = hashlib.sha256(
+            f"fastsession:keys:{secret}".encode("utf-8")
+        ).digest()
+        self._digest_size = digest_size
+
+    @abstractmethod
+    def digest(self, key: bytes) -> bytes:
+        """Calculate a keyed digest of a key."""
+        raise NotImplementedError
+
+    def encode(self, key: str) -> str:
+        """Encode a key into a fixed-length name."""
+        digest = self.digest(key.encode("utf-8"))[: self._digest_size]
+        return urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class HMACKeyEncoder(KeyEncoderInterface):
+    """An encoder of key names using a truncated HMAC-SHA256 digest."""
+
+    def digest(self, key: bytes) -> bytes:
+        return hmac.digest(self._key, key, "sha256")
+
+
+class BLAKE2bKeyEncoder(KeyEncoderInterface):
+    """An encoder of key names using a keyed BLAKE2b digest."""
+
+    max_digest_size = hashlib.blake2b.MAX_DIGEST_SIZE
+
+    def __init__(self, secret: str, digest_size: int = 16):
+        super().__init__(secret, digest_size)
+        self._blake2b = hashlib.blake2b(key=self._key, digest_size=digest_size)
+
+    def digest(self, key: bytes) -> bytes:
+        mac = self._blake2b.copy()
+        mac.update(key)
+        return mac.digest()
+
+
+def create_key_encoder(
+    kind: KeyEncoderEnum, secret: str, digest_size: int = 16
+) -> typing.Optional[KeyEncoderInterface]:
+    """Create an encoder of key names, None means that key names are encrypted.
+
+    :param kind: A type of an encoder
+    :param secret: A secret keying a hash function
+    :param digest_size: A number of bytes a digest is truncated to
+    """
+    cls = KEY_ENCODERS.get(kind)
+    return cls(secret, digest_size) if cls is not None else None
+
+
+# Encoders of key names by their types
+KEY_ENCODERS: typing.Dict[KeyEncoderEnum, typing.Type[KeyEncoderInterface]] = {
+    KeyEncoderEnum.hmac_sha256: HMACKeyEncoder,
+    KeyEncoderEnum.blake2b: BLAKE2bKeyEncoder,
+}
@@ -25,4 +25,32 @@ class EncryptorInterface(ABC):
     @abstractmethod
     def decrypt(self, message: str, **kwargs: typing.Optional[typing.Any]) -> str:
         """Decrypt the encrypted message using the current cipher."""
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def encrypt_key(self, key: str) -> str:
+        """Encrypt a session key or a session id, the result must be deterministic."""
+        return self.encrypt(key)
+
+    def encrypt_namespace(self, session_id: str) -> str:
+        """Encrypt a session id into a namespace of session keys, see encrypt_key."""
+        return self.encrypt_key(session_id)
+
+    def encrypt_many(
+        self,
+        messages: typing.Sequence[str],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[str]:
+        """Encrypt a batch of messages.
+
+        AEAD encryptors bind associated data (e.g. storage keys) to every message,
+        others ignore it.
+        """
+        return [self.encrypt(message) for message in messages]
+
+    def decrypt_many(
+        self,
+        messages: typing.Sequence[str],
+        associated_data: typing.Optional[typing.Sequence[bytes]] = None,
+    ) -> typing.List[str]:
+        """Decrypt a batch of messages verifying associated data if it is bound."""
+        return [self.decrypt(message) for message in messages]
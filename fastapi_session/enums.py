@@ -6,3 +6,45 @@ class SameSiteEnum(Enum):
     strict: str = "strict"
     lax: str = "lax"
     none: str = "none"
+
+
+@unique
+class RedisLayoutEnum(Enum):
+    # Every session key is stored as a separate string under "namespace:key"
+    string: str = "string"
+    # Every session namespace is stored as a single hash
+    hash: str = "hash"
+
+
+@unique
+class NearCacheInvalidationEnum(Enum):
+    # Writers publish changed keys to a channel every worker listens to
+    pubsub: str = "pubsub"
+    # Writers increment version keys of namespaces which readers check periodically
+    version: str = "version"
+
+
+@unique
+class FSFormatEnum(Enum):
+    # A single pickled dictionary, the legacy format which is still readable
+    pickle: str = "pickle"
+    # A header index of value segments read through a memory mapped file
+    indexed: str = "indexed"
+
+
+@unique
+class KeyEncoderEnum(Enum):
+    # Key names are encrypted by a value encryptor
+    encrypt: str = "encrypt"
+    # Key names are truncated keyed digests
+    hmac_sha256: str = "hmac_sha256"
+    blake2b: str = "blake2b"
+
+
+@unique
+class EncryptorEnum(Enum):
+    # Deterministic AES-SIV encryption of values and key names
+    aes_siv: str = "aes_siv"
+    # AEAD encryption of values with a random nonce, key names are keyed digests
+    chacha20_poly1305: str = "chacha20_poly1305"
+    aes_gcm_siv: str = "aes_gcm_siv"
@@ -37,3 +37,14 @@ class InvalidCookieException(BaseSessionException):
         detail: str = None,
     ) -> None:
         super().__init__(status_code, detail)
+
+
+class SessionTooLargeException(BaseSessionException):
+    """An exception for notifying a user session exceeding the size of its storage."""
+
+    def __init__(
+        self,
+        status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail: str = None,
+    ) -> None:
+        super().__init__(status_code, detail)
@@ -1,19 +1,39 @@
 import asyncio
+import logging
+import time
 import typing
 from datetime import datetime
-from functools import cached_property, lru_cache
+from functools import cached_property, lru_cache, partial
 from hashlib import sha256
 from typing import Hashable
 
 from cryptography.fernet import Fernet, InvalidToken
 from fastapi import Request, Response
 
-from .encryptors import AES_SIV_Encryptor
+from .backends import BackendInterface, InstrumentedBackend
+from .caches import LRUCache
+from .encryptors import (
+    AEADEncryptor,
+    AES_SIV_Encryptor,
+    EncryptorInterface,
+    create_key_encoder,
+)
+from .enums import EncryptorEnum
 from .exceptions import InvalidCookieException, MissingSessionException
-from .sessions import AsyncSession
+from .metrics import MetricsSink, active_sink
+from .sessions import AsyncSession, LazySession
 from .settings import SessionSettings, get_session_settings
+from .stats import SessionStats
 from .types import Connection
-from .utils import create_namespace, create_backend, encrypt_session, decrypt_session
+from .utils import (
+    check_session_age,
+    create_namespace,
+    decode_session,
+    encrypt_session,
+    resolve_backend,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
@@ -32,6 +52,7 @@ class SessionManager:
         ] = None,
         backend_adapter: typing.Optional[Connection] = None,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        metrics: typing.Optional[MetricsSink] = None,
     ):
         """
         :param str secret: A session secret key for encryption
@@ -40,6 +61,7 @@ class SessionManager:
         :param Callable on_load_cookie: A callable for post processing a session cookie
         :param Connection backend_adapter: A type of backend for managing a session storage
         :param AbstractEventLoop loop: A running event loop
+        :param MetricsSink metrics: A sink of timings of session operations, None disables it
         """
         self._secret = secret
         self._signer = signer
@@ -47,19 +69,86 @@ class SessionManager:
         self._backend_adapter = backend_adapter
         self._on_load_cookie = on_load_cookie
         self._loop = loop if loop is not None else asyncio.get_running_loop()
+        # Resolve a backend class once instead of importing it on every request
+        self._backend_class = resolve_backend(settings.SESSION_BACKEND)
+        self._backend: typing.Optional[BackendInterface] = None
+        # Concurrent first requests create a single shared backend
+        self._backend_lock = asyncio.Lock()
+        self.stats = SessionStats()
+        # None unless instrumentation is enabled, so hot paths check a single attribute
+        self.metrics = active_sink(metrics)
+        # Verified tokens mapped to session ids and timestamps, ages are checked on every hit
+        self.cookie_cache: LRUCache[str, typing.Tuple[str, int]] = LRUCache(
+            settings.SESSION_COOKIE_CACHE_SIZE or 0
+        )
 
     async def __call__(self, request: Request) -> AsyncSession:
         """Try to load a user session from the incoming request."""
-        if request["session"] is None:
+        session = request["session"]
+        if isinstance(session, LazySession):
+            session = await session.materialize()
+        if session is None:
             raise MissingSessionException(detail="A user session is missing")
-        return request["session"]
+        return session
 
     @cached_property
-    def encryptor(self):
-        return AES_SIV_Encryptor(
-            self._secret, sha256(self._secret.encode("utf-8")).hexdigest()
+    def encryptor(self) -> EncryptorInterface:
+        salt = sha256(self._secret.encode("utf-8")).hexdigest()
+        key_encoder = create_key_encoder(
+            self._settings.SESSION_KEY_ENCODER,
+            self._secret,
+            self._settings.SESSION_KEY_DIGEST_SIZE or 16,
+        )
+        if self._settings.SESSION_ENCRYPTOR in (None, EncryptorEnum.aes_siv):
+            return AES_SIV_Encryptor(
+                self._secret,
+                salt,
+                key_cache_size=self._settings.SESSION_KEY_CACHE_SIZE or 0,
+                compact=self._settings.SESSION_COMPACT_ENCRYPTION,
+                key_encoder=key_encoder,
+                namespace_cache_size=self._settings.SESSION_NAMESPACE_CACHE_SIZE or 0,
+            )
+        return AEADEncryptor(
+            self._secret,
+            salt,
+            algorithm=self._settings.SESSION_ENCRYPTOR,
+            key_cache_size=self._settings.SESSION_KEY_CACHE_SIZE or 0,
+            key_encoder=key_encoder,
+            namespace_cache_size=self._settings.SESSION_NAMESPACE_CACHE_SIZE or 0,
         )
 
+    @cached_property
+    def backend_factory(
+        self,
+    ) -> typing.Callable[[typing.Hashable], typing.Awaitable[BackendInterface]]:
+        """A factory for making a session backend for a user session id."""
+        if self._backend_adapter is None:
+            # If this is a filesystem backend
+            # then a session id will be used
+            # as a source of a session file
+            return partial(
+                self._backend_class.create, loop=self._loop, settings=self._settings
+            )
+        return self._get_shared_backend
+
+    async def _get_shared_backend(self, session_id: Hashable) -> BackendInterface:
+        """Get a backend bound to the backend adapter which is shared between sessions."""
+        if self._backend is None:
+            async with self._backend_lock:
+                if self._backend is None:
+                    self._backend = await self._backend_class.create(
+                        adapter=self._backend_adapter,
+                        loop=self._loop,
+                        settings=self._settings,
+                    )
+        return self._backend
+
+    async def close(self) -> None:
+        """Release resources of a backend shared between sessions."""
+        if self._backend is not None:
+            backend, self._backend = self._backend, None
+            await backend.close()
+
     async def postprocess_cookie(
         self, request: Request, cookie: typing.Hashable
     ) -> typing.Hashable:
@@ -68,6 +157,15 @@ class SessionManager:
         if self._on_load_cookie is None:
             return cookie
 
+        if self.metrics is not None:
+            # Only the callback is timed, so both paths share a single implementation
+            if asyncio.iscoroutinefunction(self._on_load_cookie):
+                return await self.metrics.acall(
+                    "manager.postprocess_cookie", self._on_load_cookie, request, cookie
+                )
+            return self.metrics.call(
+                "manager.postprocess_cookie", self._on_load_cookie, request, cookie
+            )
         if asyncio.iscoroutinefunction(self._on_load_cookie):
             cookie = await self._on_load_cookie(request, cookie)
         else:
@@ -79,28 +177,84 @@ class SessionManager:
         self, request: Request, session_id: Hashable
     ) -> AsyncSession:
         """Initialize a session storage for a user session."""
-        return await AsyncSession.create(
+        if self.metrics is not None:
+            return await self._load_instrumented_session(request, session_id)
+        return await self._create_session(
+            create_namespace(encryptor=self.encryptor, session_id=session_id),
+            await self._create_backend(request, session_id),
+        )
+
+    async def _load_instrumented_session(
+        self, request: Request, session_id: Hashable
+    ) -> AsyncSession:
+        """Initialize a session storage recording timings of every step."""
+        namespace = self.metrics.call(
+            "manager.create_namespace",
+            create_namespace,
             encryptor=self.encryptor,
-            namespace=create_namespace(
-                encryptor=self.encryptor,
-                session_id=session_id,
-            ),
-            backend=await create_backend(
-                # If this is a filesystem backend
-                # then a session id will be used
-                # as a source of a session file
-                # @TODO: Invert resolving dependecies for a backend
-                self._settings.SESSION_BACKEND,
-                adapter=(
-                    self._backend_adapter
-                    if self._backend_adapter is not None
-                    else session_id
-                ),
-                loop=self._loop,
-            ),
+            session_id=session_id,
+        )
+        backend = await self.metrics.acall(
+            "manager.create_backend", self._create_backend, request, session_id
+        )
+        return await self._create_session(
+            namespace, InstrumentedBackend(backend, self.metrics)
+        )
+
+    def _create_backend(
+        self, request: Request, session_id: Hashable
+    ) -> typing.Awaitable[BackendInterface]:
+        """Start creating a backend of a session.
+
+        Helpers of load_session return awaitables instead of being coroutines,
+        so they add no coroutine frames to loading a session.
+        """
+        if self._backend_class.client_side:
+            # Session data is carried by cookies of the request
+            return self._backend_class.create(
+                request, loop=self._loop, settings=self._settings, signer=self._signer
+            )
+        return self.backend_factory(session_id)
+
+    def _create_session(
+        self, namespace: str, backend: BackendInterface
+    ) -> typing.Awaitable[AsyncSession]:
+        """Start creating a session with a namespace and a backend."""
+        return AsyncSession.create(
+            encryptor=self.encryptor,
+            namespace=namespace,
+            backend=backend,
             loop=self._loop,
+            buffered=self._settings.SESSION_BUFFERED_WRITES,
+            offload_threshold=self._settings.SESSION_ENCRYPTION_OFFLOAD_THRESHOLD,
+            ttl=self._settings.SESSION_TTL,
+        )
+
+    async def sweep(self) -> int:
+        """Remove expired sessions from a storage which doesn't expire them by itself.
+
+        :return: A number of removed sessions or their keys
+        """
+        if self._backend_adapter is not None:
+            backend = await self._get_shared_backend(None)
+            return await backend.sweep()
+        return await self._backend_class.sweep_expired(
+            loop=self._loop, settings=self._settings
         )
 
+    async def run_sweeper(self) -> None:
+        """Sweep a storage every sweep interval until the task is cancelled."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                if self.metrics is None:
+                    await self.sweep()
+                else:
+                    await self.metrics.acall("manager.sweep", self.sweep)
+            except Exception:
+                # A failed sweep is retried after the interval
+                logger.exception("Sweeping expired sessions has failed")
+
     def has_cookie(self, request: Request) -> bool:
         """Check whether a session cookie exist in the request."""
         return self._settings.SESSION_COOKIE_NAME in request.cookies
@@ -114,20 +268,75 @@ class SessionManager:
         :param timestamp: a cookie signature timestamp
         :param max_age: a cookie max age param
         """
+        return self.get_token(request, **options)[0]
+
+    def get_token(
+        self, request: Request, **options: typing.Mapping[str, typing.Any]
+    ) -> typing.Tuple[str, int]:
+        """Get a session id and a timestamp of a session cookie from the request.
+
+        :param request: a user HTTP request
+        :param max_age: a cookie max age param
+        :param expires: a cookie expiration param
+        """
+        token = request.cookies[self._settings.SESSION_COOKIE_NAME]
         try:
-            return decrypt_session(
-                self._signer,
-                request.cookies[self._settings.SESSION_COOKIE_NAME],
+            entry = self.cookie_cache.get(token)
+            if entry is None:
+                if self.metrics is None:
+                    entry = decode_session(self._signer, token)
+                else:
+                    entry = self.metrics.call(
+                        "manager.decode_cookie", decode_session, self._signer, token
+                    )
+                self.cookie_cache.set(token, entry)
+            check_session_age(
+                entry[1],
                 (
                     options.get("max_age", self._settings.SESSION_COOKIE_MAX_AGE)
                     or options.get("expires", self._settings.SESSION_COOKIE_EXPIRES)
                 ),
             )
+            return entry
         except InvalidToken as exc:
             raise InvalidCookieException(
                 detail="Session token is outdated or malformed"
             ) from exc
 
+    @property
+    def cookie_name(self) -> str:
+        return self._settings.SESSION_COOKIE_NAME
+
+    @property
+    def sweep_interval(self) -> typing.Optional[float]:
+        """Get a number of seconds between sweeps of a storage, None if it is disabled."""
+        return self._settings.SESSION_SWEEP_INTERVAL
+
+    @property
+    def refreshes_cookie(self) -> bool:
+        """Check whether session cookies are re-issued before they expire."""
+        return bool(
+            self._settings.SESSION_COOKIE_REFRESH_FRACTION
+            and self._settings.SESSION_COOKIE_MAX_AGE
+        )
+
+    def should_refresh_cookie(
+        self, issued_at: int, current_time: typing.Optional[float] = None
+    ) -> bool:
+        """Check whether a session cookie has passed the refresh fraction of its max age.
+
+        :param issued_at: a timestamp of a session cookie
+        :param current_time: a current timestamp, now by default
+        """
+        if not self.refreshes_cookie:
+            return False
+        if current_time is None:
+            current_time = time.time()
+        return current_time - issued_at >= (
+            self._settings.SESSION_COOKIE_MAX_AGE
+            * self._settings.SESSION_COOKIE_REFRESH_FRACTION
+        )
+
     def set_cookie(
         self,
         response: Response,
@@ -186,6 +395,7 @@ def create_session_manager(
     on_load_cookie: typing.Callable[[Request, str], typing.Awaitable[str]] = None,
     backend_adapter: typing.Optional[Connection] = None,
     loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+    metrics: typing.Optional[MetricsSink] = None,
 ) -> SessionManager:
     """A factory method for making a session manager."""
     return SessionManager(
@@ -195,4 +405,5 @@ def create_session_manager(
         on_load_cookie=on_load_cookie,
         backend_adapter=backend_adapter,
         loop=loop,
+        metrics=metrics,
     )
@@ -0,0 +1,221 @@
+"""A module which contains sinks of timings of session operations."""
+import threading
+import time
+import typing
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+__all__ = (
+    "MetricsSink",
+    "NoopMetricsSink",
+    "PrometheusMetricsSink",
+    "PROMETHEUS_CONTENT_TYPE",
+    "active_sink",
+)
+
+# A content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds (in seconds) of histogram buckets of operation timings
+DEFAULT_BUCKETS: typing.Tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+T = typing.TypeVar("T")
+
+
+class MetricsSink(ABC):
+    """An interface for recording timings, errors and payload sizes of session operations.
+
+    Operations are named after a component and a method, e.g. "manager.decode_cookie"
+    or "backend.get". Components keep None instead of a disabled sink,
+    so they check a single attribute when instrumentation is disabled.
+    """
+
+    # Whether a sink records anything, disabled sinks aren't called at all
+    enabled: bool = True
+
+    @abstractmethod
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        error: bool = False,
+        size: typing.Optional[int] = None,
+    ) -> None:
+        """Record a single run of an operation.
+
+        :param operation: A name of an operation
+        :param seconds: A duration of an operation
+        :param error: Whether an operation has raised an exception
+        :param size: A number of bytes an operation has read or written
+        """
+        raise NotImplementedError
+
+    def call(self, operation: str, func: typing.Callable[..., T], *args, **kwargs) -> T:
+        """Run a function recording its duration and errors."""
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            self.record(operation, time.perf_counter() - started, error=True)
+            raise
+        self.record(operation, time.perf_counter() - started)
+        return result
+
+    async def acall(
+        self,
+        operation: str,
+        func: typing.Callable[..., typing.Awaitable[T]],
+        *args,
+        **kwargs,
+    ) -> T:
+        """Await a coroutine function recording its duration and errors."""
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException:
+            self.record(operation, time.perf_counter() - started, error=True)
+            raise
+        self.record(operation, time.perf_counter() - started)
+        return result
+
+
+class NoopMetricsSink(MetricsSink):
+    """A sink dropping everything, components treat it as disabled instrumentation."""
+
+    enabled = False
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        error: bool = False,
+        size: typing.Optional[int] = None,
+    ) -> None:
+        pass
+
+
+def active_sink(sink: typing.Optional[MetricsSink]) -> typing.Optional[MetricsSink]:
+    """Get a sink components should call or None if instrumentation is disabled."""
+    if sink is None or not sink.enabled:
+        return None
+    return sink
+
+
+@dataclass
+class _Series:
+    """Aggregated runs of a single operation."""
+
+    buckets: typing.List[int]
+    count: int = 0
+    seconds: float = 0.0
+    errors: int = 0
+    # A total number of bytes, None if an operation never reports sizes
+    size: typing.Optional[int] = field(default=None)
+
+
+class PrometheusMetricsSink(MetricsSink):
+    """A thread-safe sink aggregating operations into Prometheus metrics.
+
+    Every operation gets a histogram of durations, a counter of errors
+    and a counter of payload bytes, ``render`` exports them in the text format.
+    """
+
+    def __init__(
+        self,
+        prefix: str = "fastapi_session",
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        :param prefix: A prefix of metric names
+        :param buckets: Sorted upper bounds (in seconds) of histogram buckets
+        """
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._series: typing.Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        error: bool = False,
+        size: typing.Optional[int] = None,
+    ) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(operation)
+            if series is None:
+                series = self._series[operation] = _Series(
+                    [0] * (len(self.buckets) + 1)
+                )
+            series.buckets[index] += 1
+            series.count += 1
+            series.seconds += seconds
+            if error:
+                series.errors += 1
+            if size is not None:
+                series.size = (series.size or 0) + size
+
+    def render(self) -> str:
+        """Export recorded operations in the Prometheus text exposition format."""
+        with self._lock:
+            series = {
+                operation: _Series(
+                    list(entry.buckets),
+                    entry.count,
+                    entry.seconds,
+                    entry.errors,
+                    entry.size,
+                )
+                for operation, entry in sorted(self._series.items())
+            }
+        name = f"{self.prefix}_operation_seconds"
+        lines = [
+            f"# HELP {name} Durations of session operations.",
+            f"# TYPE {name} histogram",
+        ]
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for operation, entry in series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, entry.buckets):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{operation="{operation}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{operation="{operation}"}} {entry.seconds!r}')
+            lines.append(f'{name}_count{{operation="{operation}"}} {entry.count}')
+
+        name = f"{self.prefix}_operation_errors_total"
+        lines.extend(
+            [
+                f"# HELP {name} Session operations which have raised an exception.",
+                f"# TYPE {name} counter",
+            ]
+        )
+        for operation, entry in series.items():
+            lines.append(f'{name}{{operation="{operation}"}} {entry.errors}')
+
+        name = f"{self.prefix}_payload_bytes_total"
+        lines.extend(
+            [
+                f"# HELP {name} Bytes read or written by session operations.",
+                f"# TYPE {name} counter",
+            ]
+        )
+        for operation, entry in series.items():
+            if entry.size is not None:
+                lines.append(f'{name}{{operation="{operation}"}} {entry.size}')
+        return "\n".join(lines) + "\n"
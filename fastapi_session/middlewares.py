@@ -1,12 +1,14 @@
 import json
 import typing
+from functools import partial
 
 from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.requests import HTTPConnection
-from starlette.types import Receive, Scope, Send
+from starlette.types import Message, Receive, Scope, Send
 
 from .exceptions import InvalidCookieException
 from .managers import SessionManager
+from .sessions import AsyncSession, LazySession
 
 __all__ = ("SessionMiddleware",)
 
@@ -25,6 +27,8 @@ class SessionMiddleware:
         self.app = app
         self.manager = manager
         self.strict = strict
+        # A sink of a manager, None unless instrumentation is enabled
+        self.metrics = manager.metrics
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         WEBSOCKET_TYPE = "websocket"
@@ -38,16 +42,93 @@ class SessionMiddleware:
             request = Request(scope, receive, send)
         scope["session"] = None
 
-        if self.manager.has_cookie(request):
-            try:
-                scope["session"] = await self.manager.load_session(
-                    request,
-                    await self.manager.postprocess_cookie(
-                        request, self.manager.get_cookie(request)
-                    ),
-                )
-            except InvalidCookieException as exc:
-                if self.strict:
-                    raise exc from None
-
-        await self.app(scope, receive, send)
+        if not self.manager.has_cookie(request):
+            await self.app(scope, receive, send)
+            return
+
+        # A strict mode validates a session cookie on every request,
+        # otherwise it is decoded on the first access to a user session
+        cookie = self.manager.get_cookie(request) if self.strict else None
+        load = self.load_session
+        if self.metrics is not None:
+            load = self._load_instrumented_session
+        session = scope["session"] = LazySession(partial(load, request, cookie))
+
+        persisted = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal persisted
+            if message["type"] == "http.response.start":
+                # Save session changes before a response is sent
+                await self.persist_session(session)
+                persisted = True
+                headers = session.headers()
+                if headers:
+                    # Send session cookies of a client side backend
+                    message["headers"] = list(message.get("headers", [])) + headers
+                if self.manager.refreshes_cookie:
+                    self.refresh_cookie(request, message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if not persisted:
+            await self.persist_session(session)
+
+    def refresh_cookie(self, request: HTTPConnection, message: Message) -> None:
+        """Re-issue a session cookie if it has passed the refresh fraction of its max age."""
+        try:
+            session_id, issued_at = self.manager.get_token(request)
+        except InvalidCookieException:
+            return
+        headers = list(message.get("headers", []))
+        prefix = f"{self.manager.cookie_name}=".encode("latin-1")
+        if any(
+            name.lower() == b"set-cookie" and value.startswith(prefix)
+            for name, value in headers
+        ):
+            # A session cookie has been set or removed by an application
+            return
+        if not self.manager.should_refresh_cookie(issued_at):
+            self.manager.stats.avoided_refreshes += 1
+            return
+        response = self.manager.set_cookie(Response(), session_id)
+        headers.extend(
+            header for header in response.raw_headers if header[0] == b"set-cookie"
+        )
+        message["headers"] = headers
+        self.manager.stats.refreshed_cookies += 1
+
+    async def persist_session(self, session: LazySession) -> None:
+        """Save changes of a user session and count skipped writes."""
+        if self.metrics is None:
+            written = await session.persist()
+        else:
+            written = await self.metrics.acall(
+                "middleware.persist_session", session.persist
+            )
+        if written is True:
+            self.manager.stats.persisted_writes += 1
+        elif written is False:
+            self.manager.stats.skipped_writes += 1
+
+    async def load_session(
+        self, request: HTTPConnection, cookie: typing.Optional[str] = None
+    ) -> typing.Optional[AsyncSession]:
+        """Decode a session cookie and load a user session."""
+        try:
+            if cookie is None:
+                cookie = self.manager.get_cookie(request)
+            return await self.manager.load_session(
+                request, await self.manager.postprocess_cookie(request, cookie)
+            )
+        except InvalidCookieException as exc:
+            if self.strict:
+                raise exc from None
+        return None
+
+    async def _load_instrumented_session(
+        self, request: HTTPConnection, cookie: typing.Optional[str] = None
+    ) -> typing.Optional[AsyncSession]:
+        return await self.metrics.acall(
+            "middleware.load_session", self.load_session, request, cookie
+        )
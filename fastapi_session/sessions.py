@@ -10,9 +10,13 @@ from hashlib import sha256
 
 from .backends import BackendInterface
 from .encryptors import EncryptorInterface
+from .exceptions import MissingSessionException
 from .utils import import_backend
 
-__all__ = ("AsyncSession",)
+__all__ = ("AsyncSession", "LazySession")
+
+# A marker of a key removed in a write buffer
+_DELETED = object()
 
 
 class AsyncFileSessionMixin:
@@ -20,6 +24,7 @@ class AsyncFileSessionMixin:
 
     async def save(self) -> None:
         """Save the state of the session to a storage file."""
+        await self.commit()
         await self._backend.save()
 
     async def load(self) -> None:
@@ -38,16 +43,34 @@ class AsyncSession(AsyncFileSessionMixin):
         encryptor: typing.Type[EncryptorInterface],
         backend: typing.Type[BackendInterface],
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        buffered: bool = False,
+        offload_threshold: typing.Optional[int] = None,
+        ttl: typing.Optional[int] = None,
     ):
         """
         :param str namespace: A user session namespace
         :param callable encryptor: A callable object for session data encryption
         :param BackendInterface backend: An instance of a session backend
+        :param bool buffered: Whether changes are kept in memory until the session is committed
+        :param int offload_threshold: A number of values encrypted or decrypted at once
+            in a worker thread instead of the event loop, None disables offloading
+        :param int ttl: A number of seconds values expire in unless a TTL is passed
         """
         self._namespace = namespace
         self._encryptor = encryptor
         self._backend = backend
         self._loop = loop if loop else asyncio.get_running_loop()
+        self._buffered = buffered
+        self._offload_threshold = offload_threshold
+        self._ttl = ttl
+        # Backends keeping sessions in cookies encrypt them as a whole,
+        # encrypted values would be encrypted twice and wouldn't compress
+        self._encrypted = not backend.client_side
+        # A write buffer keeps the latest value (or a removal marker) of every changed key
+        self._writes: typing.Dict[str, typing.Any] = {}
+        # Numbers of seconds buffered values expire in
+        self._expire: typing.Dict[str, int] = {}
+        self._cleared = False
 
     @classmethod
     async def create(
@@ -56,33 +79,106 @@ class AsyncSession(AsyncFileSessionMixin):
         encryptor: typing.Type[EncryptorInterface],
         backend: typing.Type[BackendInterface],
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        buffered: bool = False,
+        offload_threshold: typing.Optional[int] = None,
+        ttl: typing.Optional[int] = None,
     ) -> "AsyncSession":
         """A method for instantiating a session storage backend.
 
         :param str namespace: A user session namespace
         :param BackendInterface backend: An instance of a particular backend
         :param AbstractEventLoop loop: An instance of the running event loop
+        :param bool buffered: Whether changes are kept in memory until the session is committed
+        :param int offload_threshold: A size of batches encrypted in a worker thread
+        :param int ttl: A number of seconds values expire in unless a TTL is passed
+        """
+        return cls(
+            namespace, encryptor, backend, loop, buffered, offload_threshold, ttl
+        )
+
+    def _key(self, key: str) -> str:
+        """Build a storage key for a session key."""
+        return f"{self._namespace}:{self._encryptor.encrypt_key(key)}"
+
+    async def _run_batch(
+        self,
+        func: typing.Callable[[typing.List, typing.List[bytes]], typing.List],
+        batch: typing.List,
+        keys: typing.List[str],
+    ) -> typing.List:
+        """Encrypt or decrypt a batch in a worker thread if it is large enough.
+
+        Storage keys are passed as associated data of values.
+        Values of client side backends are passed as is.
         """
-        return cls(namespace, encryptor, backend, loop)
+        if not batch or not self._encrypted:
+            return batch
+        associated_data = [key.encode("utf-8") for key in keys]
+        if (
+            self._offload_threshold is not None
+            and len(batch) >= self._offload_threshold
+        ):
+            return await self._loop.run_in_executor(None, func, batch, associated_data)
+        return func(batch, associated_data)
+
+    async def commit(self) -> None:
+        """Apply buffered changes to a storage at once."""
+        if not (self._writes or self._cleared):
+            return
+        writes, expire, clear = self._writes, self._expire, self._cleared
+        self._writes, self._expire, self._cleared = {}, {}, False
+        options = {"expire": expire} if expire else {}
+        await self._backend.commit(
+            self._namespace,
+            {key: value for key, value in writes.items() if value is not _DELETED},
+            [key for key, value in writes.items() if value is _DELETED],
+            clear=clear,
+            **options,
+        )
+
+    async def persist(self) -> typing.Optional[bool]:
+        """Apply buffered changes and save a session if it has been changed."""
+        await self.commit()
+        return await self._backend.persist()
+
+    def headers(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        """Get raw response headers of a backend keeping a session in cookies."""
+        return self._backend.headers()
 
     async def clear(self):
+        if self._buffered:
+            self._writes.clear()
+            self._expire.clear()
+            self._cleared = True
+            return
         return await self._backend.clear(self._namespace)
 
     async def keys(self) -> typing.List[str]:
         """Retrieve a list of all keys placed in a storage."""
-        return await self._backend.keys(self._namespace)
+        if not self._buffered:
+            return await self._backend.keys(self._namespace)
+        keys = [] if self._cleared else await self._backend.keys(self._namespace)
+        keys = [key for key in keys if key not in self._writes]
+        keys.extend(key for key, value in self._writes.items() if value is not _DELETED)
+        return keys
 
     async def exists(self, *keys: typing.Sequence[str]) -> int:
         """Check whether keys is present in a storage."""
-        return await self._backend.exists(
-            *map(
-                lambda key: f"{self._namespace}:{self._encryptor.encrypt(key)}",
-                keys,
-            )
+        keys = [self._key(key) for key in keys]
+        if not self._buffered:
+            return await self._backend.exists(*keys)
+        found = sum(
+            self._writes[key] is not _DELETED for key in keys if key in self._writes
         )
+        missed = [key for key in keys if key not in self._writes]
+        if missed and not self._cleared:
+            found += await self._backend.exists(*missed)
+        return found
 
     async def len(self) -> int:
         """Get the size of a storage key pool."""
+        if self._buffered:
+            return len(await self.keys())
         return await self._backend.len(self._namespace)
 
     async def get(
@@ -91,54 +187,164 @@ class AsyncSession(AsyncFileSessionMixin):
         loader: typing.Optional[typing.Callable] = json.loads,
     ) -> typing.Any:
         """Get the values by the keys from a storage."""
+        keys = [self._key(key) for key in keys]
+        if self._buffered:
+            # Serve the changed keys from the write buffer
+            missed = [key for key in keys if key not in self._writes]
+            values = dict.fromkeys(missed)
+            if missed and not self._cleared:
+                values.update(zip(missed, await self._backend.get(*missed)))
+            values.update(self._writes)
+            values = [
+                values[key] if values[key] is not _DELETED else None for key in keys
+            ]
+        else:
+            values = await self._backend.get(*keys)
 
-        return map(
-            lambda value: loader(self._encryptor.decrypt(value)) if value else None,
-            await self._backend.get(
-                *map(
-                    lambda key: f"{self._namespace}:{self._encryptor.encrypt(key)}",
-                    keys,
-                )
-            ),
+        decrypted = iter(
+            await self._run_batch(
+                self._encryptor.decrypt_many,
+                [value for value in values if value],
+                [key for key, value in zip(keys, values) if value],
+            )
         )
+        return map(lambda value: loader(next(decrypted)) if value else None, values)
 
     async def set(
         self,
         key: str,
         value: typing.Any,
         serializer: typing.Optional[typing.Callable] = json.dumps,
+        ttl: typing.Optional[int] = None,
         **opts: typing.Mapping[str, typing.Any],
     ) -> typing.Any:
-        """Add a key and its associated value to a storage."""
-        return await self._backend.set(
-            f"{self._namespace}:{self._encryptor.encrypt(key)}",
-            self._encryptor.encrypt(serializer(value)),
-            **opts,
+        """Add a key and its associated value to a storage.
+
+        :param ttl: A number of seconds the value expires in, the session TTL by default
+        """
+        self._check_options(opts)
+        key = self._key(key)
+        (value,) = await self._run_batch(
+            self._encryptor.encrypt_many, [serializer(value)], [key]
         )
+        ttl = ttl if ttl is not None else self._ttl
+        if self._buffered:
+            self._buffer({key: value}, ttl)
+            return
+        if ttl:
+            opts["expire"] = ttl
+        return await self._backend.set(key, value, **opts)
 
     async def update(
         self,
         data: typing.Dict,
         serializer: typing.Optional[typing.Callable] = json.dumps,
+        ttl: typing.Optional[int] = None,
         **opts,
     ) -> None:
-        """Bulk update of a storage with a passed data."""
-        return await self._backend.update(
-            map(
-                lambda key, value: (
-                    f"{self._namespace}:{self._encryptor.encrypt(key)}",
-                    self._encryptor.encrypt(serializer(value)),
-                ),
-                data.items(),
-            ),
-            **opts,
+        """Bulk update of a storage with a passed data.
+
+        :param ttl: A number of seconds values expire in, the session TTL by default
+        """
+        self._check_options(opts)
+        keys = [self._key(key) for key in data]
+        values = await self._run_batch(
+            self._encryptor.encrypt_many,
+            [serializer(value) for value in data.values()],
+            keys,
         )
+        mapping = dict(zip(keys, values))
+        ttl = ttl if ttl is not None else self._ttl
+        if self._buffered:
+            self._buffer(mapping, ttl)
+            return
+        if ttl:
+            opts["expire"] = ttl
+        return await self._backend.update(mapping, **opts)
 
     async def delete(self, *keys: typing.Sequence[str]) -> str:
         """Remove keys and its associated value from a storage."""
-        return await self._backend.delete(
-            *map(
-                lambda key: f"{self._namespace}:{self._encryptor.encrypt(key)}",
-                keys,
+        keys = [self._key(key) for key in keys]
+        if self._buffered:
+            self._writes.update(dict.fromkeys(keys, _DELETED))
+            for key in keys:
+                self._expire.pop(key, None)
+            return
+        return await self._backend.delete(*keys)
+
+    def _check_options(self, opts: typing.Mapping[str, typing.Any]) -> None:
+        """Make sure that backend options aren't dropped by the write buffer."""
+        if self._buffered and opts:
+            raise TypeError(
+                f"Options {', '.join(opts)} aren't supported by buffered sessions"
             )
-        )
+
+    def _buffer(self, mapping: typing.Dict[str, typing.Any], ttl: typing.Optional[int]):
+        """Keep values and their expiration in the write buffer."""
+        self._writes.update(mapping)
+        for key in mapping:
+            if ttl:
+                self._expire[key] = ttl
+            else:
+                self._expire.pop(key, None)
+
+
+class LazySession:
+    """
+    A proxy of a user session which loads the session on the first access.
+    """
+
+    def __init__(
+        self,
+        loader: typing.Callable[[], typing.Awaitable[typing.Optional[AsyncSession]]],
+    ):
+        """
+        :param callable loader: A coroutine function loading a user session
+        """
+        self._loader = loader
+        self._session: typing.Optional[AsyncSession] = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Check whether a user session has been already loaded."""
+        return self._loaded
+
+    async def materialize(self) -> typing.Optional[AsyncSession]:
+        """Load a user session unless it has been loaded before."""
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    self._session = await self._loader()
+                    self._loaded = True
+        return self._session
+
+    async def commit(self) -> None:
+        """Apply buffered changes of a loaded session."""
+        if self._session is not None:
+            await self._session.commit()
+
+    async def persist(self) -> typing.Optional[bool]:
+        """Save changes of a loaded session."""
+        if self._session is not None:
+            return await self._session.persist()
+        return None
+
+    def headers(self) -> typing.List[typing.Tuple[bytes, bytes]]:
+        """Get raw response headers of a loaded session."""
+        if self._session is not None:
+            return self._session.headers()
+        return []
+
+    def __getattr__(self, name: str) -> typing.Callable[..., typing.Awaitable]:
+        # Make sure that only methods of a session are proxied
+        getattr(AsyncSession, name)
+
+        async def proxy(*args, **kwargs) -> typing.Any:
+            session = await self.materialize()
+            if session is None:
+                raise MissingSessionException(detail="A user session is missing")
+            return await getattr(session, name)(*args, **kwargs)
+
+        return proxy
@@ -1,11 +1,21 @@
 """A module which contains settings for managing different parts of session storage."""
+import re
 import typing
 from functools import lru_cache
+from pathlib import Path
 
 from pydantic import BaseSettings, validator
 
-from .enums import SameSiteEnum
-from .constants import FS_BACKEND_TYPE
+from .enums import (
+    EncryptorEnum,
+    FSFormatEnum,
+    KeyEncoderEnum,
+    NearCacheInvalidationEnum,
+    RedisLayoutEnum,
+    SameSiteEnum,
+)
+from .constants import FS_BACKEND_TYPE, MAX_SHARD_DEPTH
+from .encryptors.hashers import KEY_ENCODERS, HMACKeyEncoder
 
 __all__ = ("SessionSettings", "get_session_settings")
 
@@ -13,6 +23,74 @@ __all__ = ("SessionSettings", "get_session_settings")
 class SessionSettings(BaseSettings):
     # Session settings
     SESSION_BACKEND: typing.Optional[str] = FS_BACKEND_TYPE
+    # Buffer session changes in memory and apply them at once at the end of a request
+    SESSION_BUFFERED_WRITES: typing.Optional[bool] = False
+    # A number of encrypted session keys memoized by an encryptor, 0 disables it
+    SESSION_KEY_CACHE_SIZE: typing.Optional[int] = 1024
+    # A number of encrypted session ids memoized by an encryptor, 0 disables it
+    SESSION_NAMESPACE_CACHE_SIZE: typing.Optional[int] = 1024
+    # A way of naming stored keys and namespaces: encryption or a keyed digest.
+    # Changing it changes names of stored keys, so existing sessions are not found.
+    SESSION_KEY_ENCODER: typing.Optional[KeyEncoderEnum] = KeyEncoderEnum.encrypt
+    # A number of bytes digests of key names are truncated to
+    SESSION_KEY_DIGEST_SIZE: typing.Optional[int] = 16
+    # A cipher of session values, AEAD ciphers bind every value to its storage key.
+    # Changing it makes values of existing sessions undecryptable.
+    SESSION_ENCRYPTOR: typing.Optional[EncryptorEnum] = EncryptorEnum.aes_siv
+    # Encrypt session data into the compact format, both formats are always decrypted.
+    # Enabling it changes names of stored keys, so existing sessions are not found.
+    SESSION_COMPACT_ENCRYPTION: typing.Optional[bool] = False
+    # A number of seconds session values expire in unless a TTL is passed, None keeps them
+    SESSION_TTL: typing.Optional[int] = None
+    # A number of seconds between sweeps of expired sessions by a background task
+    # of every worker, None disables it. Only storages without expiration need it.
+    SESSION_SWEEP_INTERVAL: typing.Optional[float] = None
+    # A number of values encrypted at once in a worker thread, None keeps it in an event loop
+    SESSION_ENCRYPTION_OFFLOAD_THRESHOLD: typing.Optional[int] = 512
+    # Filesystem backend settings
+    # A directory of session files (a temporary directory by default)
+    SESSION_FS_STORAGE_PATH: typing.Optional[Path] = None
+    # A number of nested directories used to spread session files, 0 keeps them flat
+    SESSION_FS_SHARD_DEPTH: typing.Optional[int] = 0
+    # A format of written session files, both formats are always readable
+    SESSION_FS_FORMAT: typing.Optional[FSFormatEnum] = FSFormatEnum.indexed
+    # A number of threads running blocking file operations (depends on CPU count by default)
+    SESSION_FS_EXECUTOR_WORKERS: typing.Optional[int] = None
+    # A number of file operations waiting for a free thread, None keeps the queue unbounded
+    SESSION_FS_EXECUTOR_QUEUE_SIZE: typing.Optional[int] = None
+    # Read and write session files with aiofiles instead of a single blocking call
+    SESSION_FS_ASYNC_FILES: typing.Optional[bool] = False
+    # A number of session files cached within a process, 0 disables the cache
+    SESSION_FS_CACHE_SIZE: typing.Optional[int] = 0
+    # A total size of cached session files in bytes, None keeps it unbounded
+    SESSION_FS_CACHE_MAX_BYTES: typing.Optional[int] = 64 * 1024 * 1024
+    # Memory backend settings
+    # A maximum number of keys stored within a process, None keeps it unbounded
+    SESSION_MEMORY_MAX_ENTRIES: typing.Optional[int] = 100_000
+    # A maximum total size of keys and values stored within a process in bytes
+    SESSION_MEMORY_MAX_BYTES: typing.Optional[int] = 64 * 1024 * 1024
+    # Redis backend settings
+    SESSION_REDIS_LAYOUT: typing.Optional[RedisLayoutEnum] = RedisLayoutEnum.string
+    # A number of session namespaces cached within a worker by a tiered redis backend
+    SESSION_NEAR_CACHE_SIZE: typing.Optional[int] = 1024
+    # A way of telling other workers to drop their cached values of changed keys
+    SESSION_NEAR_CACHE_INVALIDATION: typing.Optional[
+        NearCacheInvalidationEnum
+    ] = NearCacheInvalidationEnum.pubsub
+    # A maximum number of seconds a cached value may be served after it has changed
+    SESSION_NEAR_CACHE_STALENESS: typing.Optional[float] = 5.0
+    # Database backend settings
+    # A name of a session table, it is created on the backend initialization
+    SESSION_DB_TABLE: typing.Optional[str] = "fastapi_sessions"
+    # Sizes of a connection pool of a database created from a URL (ignored by SQLite)
+    SESSION_DB_POOL_MIN_SIZE: typing.Optional[int] = 1
+    SESSION_DB_POOL_MAX_SIZE: typing.Optional[int] = 10
+    # Cookie backend settings
+    # A maximum size of a cookie value, browsers limit a cookie with its attributes to 4KiB
+    SESSION_COOKIE_BACKEND_CHUNK_SIZE: typing.Optional[int] = 3800
+    # A maximum number of cookies a user session is split into,
+    # proxies commonly limit a cookie header to 8KiB
+    SESSION_COOKIE_BACKEND_MAX_CHUNKS: typing.Optional[int] = 2
     # Cookie settings
     SESSION_COOKIE_NAME: typing.Optional[str] = "FAPISESSID"
     SESSION_COOKIE_EXPIRES: typing.Optional[int] = None
@@ -25,6 +103,10 @@ class SessionSettings(BaseSettings):
         SameSiteEnum
     ] = SameSiteEnum.lax.value  # Only for a first-party
     SESSION_COOKIE_SECURE: typing.Optional[bool] = False
+    # A number of verified session cookies cached within a process, 0 disables the cache
+    SESSION_COOKIE_CACHE_SIZE: typing.Optional[int] = 1024
+    # A fraction of MAX_AGE after which a session cookie is re-issued, None disables it
+    SESSION_COOKIE_REFRESH_FRACTION: typing.Optional[float] = None
 
     @validator("SESSION_COOKIE_SAMESITE", pre=True, allow_reuse=True)
     def validate_cookie_samesite(cls, v: typing.Optional[str]) -> SameSiteEnum:
@@ -34,6 +116,95 @@ class SessionSettings(BaseSettings):
             )
         return SameSiteEnum(v)
 
+    @validator("SESSION_FS_SHARD_DEPTH", allow_reuse=True)
+    def validate_fs_shard_depth(cls, v: typing.Optional[int]) -> int:
+        if v is None:
+            return 0
+        if not 0 <= v <= MAX_SHARD_DEPTH:
+            raise ValueError(
+                f"Value {v} for FS_SHARD_DEPTH must be between 0 and {MAX_SHARD_DEPTH}"
+            )
+        return v
+
+    @validator("SESSION_COOKIE_REFRESH_FRACTION", allow_reuse=True)
+    def validate_cookie_refresh_fraction(
+        cls, v: typing.Optional[float]
+    ) -> typing.Optional[float]:
+        if v is not None and not 0 <= v <= 1:
+            raise ValueError(
+                f"Value {v} for COOKIE_REFRESH_FRACTION must be between 0 and 1"
+            )
+        return v
+
+    @validator(
+        "SESSION_FS_EXECUTOR_WORKERS",
+        "SESSION_FS_EXECUTOR_QUEUE_SIZE",
+        allow_reuse=True,
+    )
+    def validate_fs_executor_size(
+        cls, v: typing.Optional[int], field: typing.Any
+    ) -> typing.Optional[int]:
+        minimum = 1 if field.name == "SESSION_FS_EXECUTOR_WORKERS" else 0
+        if v is not None and v < minimum:
+            raise ValueError(f"Value {v} for {field.name} must be at least {minimum}")
+        return v
+
+    @validator("SESSION_KEY_DIGEST_SIZE", allow_reuse=True)
+    def validate_key_digest_size(
+        cls, v: typing.Optional[int], values: typing.Dict[str, typing.Any]
+    ) -> typing.Optional[int]:
+        encoder = KEY_ENCODERS.get(values.get("SESSION_KEY_ENCODER"), HMACKeyEncoder)
+        if v is not None and not 1 <= v <= encoder.max_digest_size:
+            raise ValueError(
+                f"Value {v} for KEY_DIGEST_SIZE must be between 1 and "
+                f"{encoder.max_digest_size}"
+            )
+        return v
+
+    @validator("SESSION_SWEEP_INTERVAL", allow_reuse=True)
+    def validate_sweep_interval(
+        cls, v: typing.Optional[float]
+    ) -> typing.Optional[float]:
+        if v is not None and v <= 0:
+            raise ValueError(f"Value {v} for SWEEP_INTERVAL must be positive")
+        return v
+
+    @validator("SESSION_TTL", allow_reuse=True)
+    def validate_ttl(cls, v: typing.Optional[int]) -> typing.Optional[int]:
+        if v is not None and v < 1:
+            raise ValueError(f"Value {v} for TTL must be at least 1")
+        return v
+
+    @validator(
+        "SESSION_COOKIE_BACKEND_CHUNK_SIZE",
+        "SESSION_COOKIE_BACKEND_MAX_CHUNKS",
+        allow_reuse=True,
+    )
+    def validate_cookie_backend_limits(
+        cls, v: typing.Optional[int], field: typing.Any
+    ) -> int:
+        if v is None or v < 1:
+            raise ValueError(f"Value {v} for {field.name} must be at least 1")
+        return v
+
+    @validator("SESSION_NEAR_CACHE_SIZE", allow_reuse=True)
+    def validate_near_cache_size(cls, v: typing.Optional[int]) -> int:
+        if v is None or v < 0:
+            raise ValueError(f"Value {v} for NEAR_CACHE_SIZE must be at least 0")
+        return v
+
+    @validator("SESSION_NEAR_CACHE_STALENESS", allow_reuse=True)
+    def validate_near_cache_staleness(cls, v: typing.Optional[float]) -> float:
+        if v is None or v <= 0:
+            raise ValueError(f"Value {v} for NEAR_CACHE_STALENESS must be positive")
+        return v
+
+    @validator("SESSION_DB_TABLE", allow_reuse=True)
+    def validate_db_table(cls, v: typing.Optional[str]) -> str:
+        if v is None or not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", v):
+            raise ValueError(f"Value {v} for DB_TABLE must be a plain SQL identifier")
+        return v
+
 
 @lru_cache
 def get_session_settings():
@@ -0,0 +1,55 @@
+"""A module which contains counters of session operations."""
+from dataclasses import dataclass
+
+__all__ = ("CacheStats", "ExecutorStats", "SessionStats")
+
+
+@dataclass
+class SessionStats:
+    """Counters of user sessions handled by a session manager."""
+
+    # A number of sessions saved after a request
+    persisted_writes: int = 0
+    # A number of sessions which were left untouched since nothing has been changed
+    skipped_writes: int = 0
+    # A number of session cookies re-issued since they were close to expiration
+    refreshed_cookies: int = 0
+    # A number of responses which didn't re-issue a fresh enough session cookie
+    avoided_refreshes: int = 0
+
+
+@dataclass
+class ExecutorStats:
+    """Counters of blocking operations run by an executor of session files."""
+
+    # A number of operations which have been started by workers
+    tasks: int = 0
+    # A number of submitted operations waiting for a free worker
+    queue_depth: int = 0
+    # The highest number of operations waiting for a free worker at once
+    max_queue_depth: int = 0
+    # A total time (in seconds) operations spent waiting for a free worker
+    wait_time: float = 0.0
+
+    @property
+    def average_wait_time(self) -> float:
+        """Get an average time (in seconds) an operation waits for a free worker."""
+        return self.wait_time / self.tasks if self.tasks else 0.0
+
+
+@dataclass
+class CacheStats:
+    """Counters of lookups in an in-process cache."""
+
+    # A number of lookups served from a cache
+    hits: int = 0
+    # A number of lookups of missing or outdated entries
+    misses: int = 0
+    # A number of entries removed to stay within cache limits
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Get a share of lookups served from a cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -1,14 +1,16 @@
+import time
 import typing
 import json
 from datetime import datetime
 
 import pendulum
-from base64 import b64decode, b64encode
+from base64 import b64decode, b64encode, urlsafe_b64decode
 from importlib import import_module
 
 from cryptography.fernet import Fernet, InvalidToken
 
 from .backends import BackendInterface
+from .constants import MAX_CLOCK_SKEW
 from .encryptors import EncryptorInterface
 from .exceptions import BackendImportException
 
@@ -27,20 +29,25 @@ def import_backend(backend_path: str) -> typing.Optional[BackendInterface]:
         raise BackendImportException(detail=e.args[0]) from e
 
 
+def resolve_backend(backend_path: str) -> typing.Type[BackendInterface]:
+    """Import a session backend class and check that it implements the backend interface."""
+    klass: typing.Optional[BackendInterface] = import_backend(backend_path)
+    if not issubclass(klass, BackendInterface):
+        raise TypeError(f"The unsupported backend type: {klass}")
+    return klass
+
+
 async def create_backend(
     backend_path: str, *args, **kwargs
 ) -> typing.Type[BackendInterface]:
-    klass: typing.Optional[BackendInterface] = import_backend(backend_path)
-    if not issubclass(klass, BackendInterface):
-        raise TypeError(f"The unsupported backend type: {klass.__class__}")
-    return await klass.create(*args, **kwargs)
+    return await resolve_backend(backend_path).create(*args, **kwargs)
 
 
 def create_namespace(
     encryptor: typing.Type[EncryptorInterface], session_id: str
 ) -> str:
     """Generate a session namespace based on a fernet instance and a user session id."""
-    return encryptor.encrypt(session_id)
+    return encryptor.encrypt_namespace(session_id)
 
 
 def encrypt_session(
@@ -64,6 +71,46 @@ def encrypt_session(
     )
 
 
+def decode_session(signer: typing.Type[Fernet], token: str) -> typing.Tuple[str, int]:
+    """An utility for decrypting a token once without checking its age.
+
+    :param signer: an instance of a fernet object
+    :param token: a user session token
+    :return: a user session id and a timestamp of the token
+    """
+    session_id = signer.decrypt(token.encode("utf-8")).decode("utf-8")
+    # The token has been verified, so its timestamp is read without verifying it again
+    issued_at = int.from_bytes(urlsafe_b64decode(token.encode("utf-8"))[1:9], "big")
+    return session_id, issued_at
+
+
+def check_session_age(
+    issued_at: int,
+    ttl: typing.Optional[typing.Union[int, datetime]] = None,
+    current_time: typing.Optional[int] = None,
+) -> None:
+    """An utility for checking that a token issued at the timestamp hasn't expired.
+
+    :param issued_at: a timestamp of a token
+    :param ttl: a token max age (in seconds) or a datetime of the token expiration
+    :param current_time: a current timestamp, now by default
+    """
+    if ttl is None:
+        return
+    if isinstance(ttl, datetime):
+        # if ttl is set as datetime (EXPIRES is set), then we must validate it by hand
+        if issued_at >= int(ttl.timestamp()):
+            raise InvalidToken("Token is expired.")
+        return
+    if current_time is None:
+        current_time = int(time.time())
+    # The same checks as fernet does for a token max age
+    if issued_at + ttl < current_time:
+        raise InvalidToken("Token is expired.")
+    if current_time + MAX_CLOCK_SKEW < issued_at:
+        raise InvalidToken("Token is issued in the future.")
+
+
 def decrypt_session(
     signer: typing.Type[Fernet],
     token: str,
@@ -75,10 +122,6 @@ def decrypt_session(
     :param secret: an app secret key
     :param signings: a list of allowed singing algorithms for the cookie
     """
-    if ttl is not None and isinstance(ttl, datetime):
-        # if ttl is set as datetime (EXPIRES is set), then we must validate it by hand
-        token_timestamp = signer.extract_timestamp(token.encode("utf-8"))
-        if token_timestamp >= int(ttl.timestamp()):
-            raise InvalidToken(f"Token {token} is expired.")
-        ttl = None
-    return signer.decrypt(token.encode("utf-8"), ttl).decode("utf-8")
+    session_id, issued_at = decode_session(signer, token)
+    check_session_age(issued_at, ttl)
+    return session_id
@@ -23,12 +23,14 @@ from fastapi_session import (
     AsyncSession,
     create_backend,
     create_namespace,
+    DBBackend,
     FS_BACKEND_TYPE,
     FSBackend,
     encrypt_session,
     get_session_settings,
     REDIS_BACKEND_TYPE,
     RedisBackend,
+    RedisHashBackend,
     SessionSettings,
 )
 
@@ -133,6 +135,34 @@ async def redis_backend(
         await backend.clear(f"{session_id}*")
 
 
+@pytest.fixture(scope="function")
+async def redis_hash_backend(
+    redis_connection: Redis,
+    session_id: UUID,
+    event_loop: asyncio.AbstractEventLoop,
+) -> typing.Generator[RedisHashBackend, None, None]:
+    """Create an instance of RedisBackend storing every session in a hash."""
+    backend = await RedisBackend.create(
+        adapter=redis_connection,
+        loop=event_loop,
+        settings=SessionSettings(SESSION_REDIS_LAYOUT="hash"),
+    )
+    yield backend
+    await backend.clear(session_id)
+
+
+@pytest.fixture(scope="function")
+async def db_backend(
+    tmp_path: Path, event_loop: asyncio.AbstractEventLoop
+) -> typing.Generator[DBBackend, None, None]:
+    """Create an instance of DBBackend for a SQLite database."""
+    backend = await DBBackend.create(
+        f"sqlite:///{tmp_path / 'sessions.db'}", loop=event_loop
+    )
+    yield backend
+    await backend.adapter.disconnect()
+
+
 @pytest.fixture(scope="function")
 async def fs_session(
     session_id: typing.Hashable,
@@ -0,0 +1,296 @@
+"""An in-process stand-in for an aioredis connection pool used by tests and benchmarks.
+
+It implements the subset of the aioredis 1.3 API used by the redis backends,
+counts round trips and can emulate a network latency for every round trip.
+"""
+
+import asyncio
+import fnmatch
+import time
+import typing
+
+__all__ = ("FakeRedis",)
+
+
+def _encode(value: typing.Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class _Batch:
+    """A batch of commands sent to the server in a single round trip."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._commands: typing.List[typing.Tuple[asyncio.Future, str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> typing.Callable[..., asyncio.Future]:
+        if not hasattr(self._redis, f"_{name}"):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs) -> asyncio.Future:
+            future = asyncio.get_running_loop().create_future()
+            self._commands.append((future, name, args, kwargs))
+            return future
+
+        return command
+
+    async def execute(self) -> typing.List[typing.Any]:
+        await self._redis._round_trip()
+        results = []
+        for future, name, args, kwargs in self._commands:
+            result = getattr(self._redis, f"_{name}")(*args, **kwargs)
+            future.set_result(result)
+            results.append(result)
+        return results
+
+
+class _Channel:
+    """A subscription channel receiving published messages."""
+
+    def __init__(self, name: bytes):
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.is_active = True
+
+    async def wait_message(self) -> bool:
+        if not self.is_active:
+            return False
+        message = await self._queue.get()
+        if message is None:
+            return False
+        self._queue.put_nowait(message)
+        return True
+
+    async def get(self) -> typing.Optional[bytes]:
+        message = await self._queue.get()
+        return message
+
+    def close(self) -> None:
+        self.is_active = False
+        self._queue.put_nowait(None)
+
+
+class FakeRedis:
+    """An in-memory redis stand-in with a round trip counter."""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        :param latency: A delay (in seconds) emulated for every round trip
+        """
+        self.latency = latency
+        self.round_trips = 0
+        self._data: typing.Dict[bytes, typing.Any] = {}
+        self._expires: typing.Dict[bytes, float] = {}
+        self._channels: typing.Dict[bytes, typing.List[_Channel]] = {}
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def __getattr__(self, name: str) -> typing.Callable[..., typing.Awaitable]:
+        command = getattr(type(self), f"_{name}", None)
+        if command is None:
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            await self._round_trip()
+            return command(self, *args, **kwargs)
+
+        return call
+
+    def multi_exec(self) -> _Batch:
+        return _Batch(self)
+
+    def pipeline(self) -> _Batch:
+        return _Batch(self)
+
+    # Keyspace helpers
+    def _lookup(self, key: typing.Any) -> typing.Any:
+        key = _encode(key)
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _hash(self, key: typing.Any) -> typing.Dict[bytes, bytes]:
+        value = self._lookup(key)
+        if value is None:
+            value = self._data[_encode(key)] = {}
+        return value
+
+    # String commands
+    def _get(self, key):
+        value = self._lookup(key)
+        return value if isinstance(value, bytes) else None
+
+    def _set(self, key, value, *, expire=0, pexpire=0, exist=None):
+        key = _encode(key)
+        self._data[key] = _encode(value)
+        self._expires.pop(key, None)
+        if expire:
+            self._expires[key] = time.time() + expire
+        return True
+
+    def _mget(self, key, *keys):
+        return [self._get(k) for k in (key, *keys)]
+
+    def _mset(self, *args):
+        for key, value in zip(args[::2], args[1::2]):
+            self._set(key, value)
+        return True
+
+    def _incr(self, key):
+        value = int(self._get(key) or 0) + 1
+        self._data[_encode(key)] = _encode(value)
+        return value
+
+    # Generic commands
+    def _keys(self, pattern):
+        pattern = _encode(pattern)
+        return [
+            key
+            for key in list(self._data)
+            if self._lookup(key) is not None and fnmatch.fnmatchcase(key, pattern)
+        ]
+
+    def _exists(self, key, *keys):
+        return sum(self._lookup(k) is not None for k in (key, *keys))
+
+    def _delete(self, key, *keys):
+        deleted = 0
+        for k in map(_encode, (key, *keys)):
+            if self._lookup(k) is not None:
+                deleted += 1
+            self._data.pop(k, None)
+            self._expires.pop(k, None)
+        return deleted
+
+    def _expire(self, key, timeout):
+        if self._lookup(key) is None:
+            return 0
+        self._expires[_encode(key)] = time.time() + timeout
+        return 1
+
+    def _pexpire(self, key, timeout):
+        return self._expire(key, timeout / 1000)
+
+    def _persist(self, key):
+        if self._lookup(key) is None:
+            return 0
+        return int(self._expires.pop(_encode(key), None) is not None)
+
+    def _ttl(self, key):
+        if self._lookup(key) is None:
+            return -2
+        expires_at = self._expires.get(_encode(key))
+        return -1 if expires_at is None else int(round(expires_at - time.time()))
+
+    def _pttl(self, key):
+        if self._lookup(key) is None:
+            return -2
+        expires_at = self._expires.get(_encode(key))
+        return -1 if expires_at is None else int((expires_at - time.time()) * 1000)
+
+    def _type(self, key):
+        value = self._lookup(key)
+        if value is None:
+            return b"none"
+        return b"hash" if isinstance(value, dict) else b"string"
+
+    def _scan(self, cursor=0, match=None, count=None):
+        keys = self._keys(match or b"*")
+        return 0, keys
+
+    async def iscan(self, *, match=None, count=None) -> typing.AsyncIterator[bytes]:
+        await self._round_trip()
+        for key in self._scan(match=match)[1]:
+            yield key
+
+    # Hash commands
+    def _hget(self, key, field):
+        value = self._lookup(key)
+        return value.get(_encode(field)) if isinstance(value, dict) else None
+
+    def _hmget(self, key, field, *fields):
+        return [self._hget(key, f) for f in (field, *fields)]
+
+    def _hset(self, key, field, value):
+        mapping = self._hash(key)
+        created = _encode(field) not in mapping
+        mapping[_encode(field)] = _encode(value)
+        return int(created)
+
+    def _hmset(self, key, field, value, *pairs):
+        for f, v in zip((field, *pairs[::2]), (value, *pairs[1::2])):
+            self._hset(key, f, v)
+        return True
+
+    def _hmset_dict(self, key, *args, **kwargs):
+        mapping = dict(*args, **kwargs)
+        for field, value in mapping.items():
+            self._hset(key, field, value)
+        return True
+
+    def _hdel(self, key, field, *fields):
+        mapping = self._lookup(key)
+        if not isinstance(mapping, dict):
+            return 0
+        deleted = 0
+        for f in map(_encode, (field, *fields)):
+            if mapping.pop(f, None) is not None:
+                deleted += 1
+        if not mapping:
+            self._delete(key)
+        return deleted
+
+    def _hlen(self, key):
+        value = self._lookup(key)
+        return len(value) if isinstance(value, dict) else 0
+
+    def _hkeys(self, key):
+        value = self._lookup(key)
+        return list(value) if isinstance(value, dict) else []
+
+    def _hgetall(self, key):
+        value = self._lookup(key)
+        return dict(value) if isinstance(value, dict) else {}
+
+    def _hexists(self, key, field):
+        return int(self._hget(key, field) is not None)
+
+    # Pub/Sub commands
+    def _publish(self, channel, message):
+        receivers = self._channels.get(_encode(channel), [])
+        for receiver in receivers:
+            receiver._queue.put_nowait(_encode(message))
+        return len(receivers)
+
+    async def subscribe(self, channel, *channels) -> typing.List[_Channel]:
+        await self._round_trip()
+        subscriptions = []
+        for name in map(_encode, (channel, *channels)):
+            subscription = _Channel(name)
+            self._channels.setdefault(name, []).append(subscription)
+            subscriptions.append(subscription)
+        return subscriptions
+
+    async def unsubscribe(self, channel, *channels) -> None:
+        await self._round_trip()
+        for name in map(_encode, (channel, *channels)):
+            for subscription in self._channels.pop(name, []):
+                subscription.close()
+
+    def close(self) -> None:
+        for subscriptions in self._channels.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._channels.clear()
+
+    async def wait_closed(self) -> None:
+        pass
@@ -1,15 +1,27 @@
+import asyncio
 import pytest
 import secrets
+import time
 import typing
+from pathlib import Path
 from unittest.mock import AsyncMock, patch
 
+from asgi_lifespan import LifespanManager
 from cryptography.fernet import Fernet
 from fastapi import FastAPI, HTTPException, Response, status
 from fastapi.testclient import TestClient
-from fastapi_session import SessionManager, SessionMiddleware, SessionSettings
+from fastapi_session import (
+    FSBackend,
+    SessionManager,
+    SessionMiddleware,
+    SessionSettings,
+    TIERED_REDIS_BACKEND_TYPE,
+)
 from fastapi_session.adapters.fastapi import connect
 from starlette.types import Receive, Scope, Send
 
+from .fakes import FakeRedis
+
 
 def test_fastapi_adapter(
     secret: str, signer: typing.Type[Fernet], app: FastAPI, settings: SessionSettings
@@ -44,3 +56,60 @@ def test_fastapi_adapter(
             )  # indicates that mock in SessionMiddleware has been worked
             assert hasattr(app, "session") is True
             assert isinstance(app.session, SessionManager) is True
+
+
+@pytest.mark.asyncio
+async def test_periodic_sweeps(
+    secret: str,
+    signer: typing.Type[Fernet],
+    settings: SessionSettings,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Check that a connected app sweeps expired sessions in the background."""
+    # The file is emptied in the past, so its bucket of the expiry index has ended
+    emptied_at = time.time() - 120
+    monkeypatch.setattr("fastapi_session.backends.fs.time.time", lambda: emptied_at)
+    backend = FSBackend("emptied", storage_path=tmp_path)
+    await backend.set("fast", "api")
+    await backend.save()
+    await backend.delete("fast")
+    await backend.save()
+    monkeypatch.undo()
+
+    app = FastAPI()
+    connect(
+        app=app,
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(
+            update={
+                "SESSION_FS_STORAGE_PATH": tmp_path,
+                "SESSION_SWEEP_INTERVAL": 0.01,
+            }
+        ),
+    )
+    async with LifespanManager(app):
+        await asyncio.sleep(0.1)
+        assert not backend.source.exists()
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_closed(
+    secret: str, signer: typing.Type[Fernet], settings: SessionSettings
+):
+    """Check that a shared backend stops listening to invalidations on shutdown."""
+    redis = FakeRedis()
+    app = FastAPI()
+    connect(
+        app=app,
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_BACKEND": TIERED_REDIS_BACKEND_TYPE}),
+        backend_adapter_loader=lambda app: redis,
+    )
+    async with LifespanManager(app):
+        backend = await app.session.backend_factory(None)
+        assert backend._listener is not None
+    assert backend._listener is None
+    assert app.session._backend is None
@@ -0,0 +1,105 @@
+"""A set of tests for a session storage in cookies of a client."""
+
+import asyncio
+import json
+import secrets
+import typing
+from http.cookies import SimpleCookie
+
+import pytest
+from cryptography.fernet import Fernet
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    AsyncSession,
+    SessionSettings,
+    SessionTooLargeException,
+    create_namespace,
+)
+from fastapi_session.backends import CookieBackend
+
+
+def parse_cookies(headers: typing.List[typing.Tuple[bytes, bytes]]) -> SimpleCookie:
+    cookies = SimpleCookie()
+    for _, value in headers:
+        cookies.load(value.decode("latin-1"))
+    return cookies
+
+
+@pytest.mark.asyncio
+async def test_cookie_backend(
+    signer: typing.Type[Fernet],
+    settings: SessionSettings,
+    event_loop: asyncio.AbstractEventLoop,
+):
+    """Test that session data is split into cookies and restored from them."""
+    settings = settings.copy(
+        update={
+            "SESSION_COOKIE_BACKEND_CHUNK_SIZE": 200,
+            "SESSION_COOKIE_BACKEND_MAX_CHUNKS": 8,
+        }
+    )
+    backend = CookieBackend(signer, settings, loop=event_loop)
+    assert await backend.persist() is False
+
+    data = {f"namespace:key{i}": f"value{i}" * 10 for i in range(20)}
+    await backend.update(data)
+    assert await backend.persist() is True
+    cookies = parse_cookies(backend.headers())
+    assert 1 < len(cookies) <= 8
+    assert all(len(cookie.value) <= 200 for cookie in cookies.values())
+
+    restored = CookieBackend(
+        signer,
+        settings,
+        {name: cookie.value for name, cookie in cookies.items()},
+        loop=event_loop,
+    )
+    assert {key: restored[key] for key in restored} == data
+    assert await restored.persist() is False
+
+    # Cookies left from larger session data are removed
+    await restored.delete(*list(data)[1:])
+    assert await restored.persist() is True
+    cookies = parse_cookies(restored.headers())
+    assert cookies[backend.chunk_name(0)].value
+    assert all(cookies[name]["max-age"] == "0" for name in list(cookies)[1:])
+
+    # Session data exceeding the limit is never sent
+    await restored.set("namespace:blob", secrets.token_hex(2000))
+    with pytest.raises(SessionTooLargeException):
+        await restored.persist()
+
+    # Tampered session data is dropped
+    tampered = CookieBackend(
+        signer, settings, {backend.chunk_name(0): "invalid"}, loop=event_loop
+    )
+    assert len(tampered) == 0
+    assert tampered.dirty is True
+
+
+@pytest.mark.asyncio
+async def test_cookie_session_values(
+    signer: typing.Type[Fernet],
+    settings: SessionSettings,
+    encryptor: AES_SIV_Encryptor,
+    session_id: str,
+    event_loop: asyncio.AbstractEventLoop,
+):
+    """Check that session values are encrypted once with the whole session data."""
+    backend = CookieBackend(signer, settings, loop=event_loop)
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=backend,
+    )
+    cart = [f"item {index}" for index in range(100)]
+    await session.set("cart", cart)
+    (value,) = await backend.get(session._key("cart"))
+    assert json.loads(value) == cart
+    assert list(await session.get("cart")) == [cart]
+
+    # Plain values are compressed before the encryption
+    assert await backend.persist() is True
+    (cookie,) = parse_cookies(backend.headers()).values()
+    assert len(cookie.value) < len(json.dumps(cart))
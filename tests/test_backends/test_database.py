@@ -0,0 +1,109 @@
+import time
+import uuid
+
+import pytest
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    AsyncSession,
+    DBBackend,
+    SessionSettings,
+    create_namespace,
+)
+from fastapi_session.backends.database import BATCH_SIZE
+
+
+@pytest.mark.asyncio
+async def test_keys_under_namespace(session_id: uuid.UUID, db_backend: DBBackend):
+    """Check that keys are set, looked up and removed under a namespace."""
+    keys = [f"{session_id}:key{i}" for i in range(BATCH_SIZE + 10)]
+    await db_backend.update({key: key.upper() for key in keys})
+    await db_backend.set("other:key0", "other")
+    assert await db_backend.get(*keys, "other:key0", f"{session_id}:missing") == [
+        *(key.upper() for key in keys),
+        "other",
+        None,
+    ]
+    assert sorted(await db_backend.keys(session_id)) == sorted(keys)
+    assert await db_backend.exists(keys[0], keys[0], "other:missing") == 1
+    assert await db_backend.len(session_id) == len(keys)
+
+    # A value is replaced by an upsert
+    await db_backend.set(keys[0], "replaced")
+    assert await db_backend.get(keys[0]) == ["replaced"]
+
+    await db_backend.delete(*keys[1:])
+    assert await db_backend.keys(session_id) == [keys[0]]
+    await db_backend.clear(session_id)
+    assert await db_backend.len(session_id) == 0
+    assert await db_backend.get("other:key0") == ["other"]
+
+
+@pytest.mark.asyncio
+async def test_expired_keys(session_id: uuid.UUID, db_backend: DBBackend):
+    """Check that expired values are hidden."""
+    key = f"{session_id}:expiring"
+    await db_backend.set(key, "value", expire=60)
+    assert await db_backend.get(key) == ["value"]
+    await db_backend.adapter.execute(
+        f"UPDATE {db_backend.table} SET expires_at = :now",
+        values={"now": int(time.time())},
+    )
+    assert await db_backend.get(key) == [None]
+    assert await db_backend.exists(key) == 0
+    assert await db_backend.keys(session_id) == []
+
+
+@pytest.mark.asyncio
+async def test_db_session(
+    session_id: str,
+    encryptor: AES_SIV_Encryptor,
+    db_backend: DBBackend,
+):
+    """Check that buffered changes of a session are committed to a database."""
+    session = await AsyncSession.create(
+        encryptor=encryptor,
+        namespace=create_namespace(encryptor, session_id),
+        backend=db_backend,
+        buffered=True,
+    )
+    await session.update({"user_id": 42, "cart": ["apple"]})
+    await session.delete("flash")
+    assert await db_backend.len(session._namespace) == 0
+    await session.commit()
+    assert list(await session.get("user_id", "cart", "flash")) == [
+        42,
+        ["apple"],
+        None,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_db_table_setting(tmp_path):
+    """Check that a session table is configurable."""
+    with pytest.raises(ValueError):
+        SessionSettings(SESSION_DB_TABLE="sessions; DROP TABLE users")
+    backend = await DBBackend.create(
+        f"sqlite:///{tmp_path / 'sessions.db'}",
+        settings=SessionSettings(SESSION_DB_TABLE="user_sessions"),
+    )
+    await backend.set("namespace:key", "value")
+    assert await backend.adapter.fetch_val("SELECT COUNT(*) FROM user_sessions") == 1
+    await backend.adapter.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_sweep_expired(session_id: uuid.UUID, db_backend: DBBackend):
+    """Check that only expired rows are removed."""
+    await db_backend.update({f"{session_id}:fast": "api"}, expire=60)
+    await db_backend.set(f"{session_id}:session", "kept")
+    assert await db_backend.sweep() == 0
+    await db_backend.adapter.execute(
+        f"UPDATE {db_backend.table} SET expires_at = :now WHERE expires_at IS NOT NULL",
+        values={"now": int(time.time())},
+    )
+    assert await db_backend.sweep() == 1
+    assert (
+        await db_backend.adapter.fetch_val(f"SELECT COUNT(*) FROM {db_backend.table}")
+        == 1
+    )
@@ -1,13 +1,22 @@
 """A set of tests for session storages of different types."""
+
 import asyncio
+import os
+import pickle
 import pytest
+import time
 import typing
 import sys
 import uuid
 from pathlib import Path
 from concurrent import futures
 
-from fastapi_session.backends import FSBackend
+from fastapi_session import SessionSettings
+from fastapi_session.enums import FSFormatEnum
+from fastapi_session.backends import FSBackend, reshard_storage, sweep_storage
+from fastapi_session.backends._executors import BoundedExecutor
+from fastapi_session.backends._format import IndexedFile
+from fastapi_session.backends._mixins import shard_parts
 
 
 @pytest.mark.asyncio
@@ -84,3 +93,323 @@ async def test_backend_data_key_length(
     keys_length = len(keys)
     assert await fs_backend.len(session_id) == keys_length
     assert len(fs_backend) == keys_length
+
+
+@pytest.mark.asyncio
+async def test_persist_changed_data(fs_backend: FSBackend, mocker: typing.Any):
+    """Check that session data is saved only if it has been changed."""
+    save = mocker.spy(fs_backend, "save")
+
+    assert await fs_backend.persist() is False
+    await fs_backend.set("fast", "api")
+    assert fs_backend.dirty is True
+    assert await fs_backend.persist() is True
+    assert await fs_backend.persist() is False
+
+    save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage_layout(
+    session_id: str, settings: SessionSettings, tmp_path: Path
+):
+    """Check that a session file is placed into nested shard directories."""
+    backend = await FSBackend.create(
+        session_id,
+        settings=settings.copy(
+            update={"SESSION_FS_STORAGE_PATH": tmp_path, "SESSION_FS_SHARD_DEPTH": 2}
+        ),
+    )
+    await backend.set("fast", "api")
+    await backend.save()
+
+    source = backend.source.relative_to(tmp_path)
+    assert len(source.parts) == 3
+    assert all(len(part) == 2 for part in source.parts[:2])
+    assert source.name == session_id
+
+
+def test_reshard_storage(tmp_path: Path):
+    """Check that a flat storage is resharded and flattened back."""
+    session_ids = [uuid.uuid4().hex for _ in range(10)]
+    for session_id in session_ids:
+        tmp_path.joinpath(session_id).touch()
+    # A temporary file of a save in progress stays in place
+    temporary = tmp_path.joinpath(f".{session_ids[0]}.saving.tmp")
+    temporary.touch()
+
+    assert reshard_storage(tmp_path, 2) == len(session_ids)
+    assert temporary.is_file()
+    assert reshard_storage(tmp_path, 2) == 0
+    assert all(
+        tmp_path.joinpath(*shard_parts(session_id, 2), session_id).is_file()
+        for session_id in session_ids
+    )
+
+    assert reshard_storage(tmp_path, 0) == len(session_ids)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        session_ids + [temporary.name]
+    )
+
+
+@pytest.mark.asyncio
+async def test_atomic_save(session_id: str, settings: SessionSettings, tmp_path: Path):
+    """Check that a session file is replaced by a complete file on saving."""
+    backend = await FSBackend.create(
+        session_id,
+        settings=settings.copy(update={"SESSION_FS_STORAGE_PATH": tmp_path}),
+    )
+    source = backend.source
+    inode = source.stat().st_ino
+
+    await backend.set("fast", "api")
+    await backend.save()
+
+    assert source.stat().st_ino != inode
+    # The new file is listed by the expiry index until session data is saved
+    assert sorted(path.name for path in tmp_path.iterdir()) == [".expiry", session_id]
+    await backend.load()
+    assert backend["fast"] == "api"
+
+
+@pytest.mark.asyncio
+async def test_indexed_format(
+    session_id: str,
+    session_data: typing.Dict[str, typing.Any],
+    session_source: typing.IO[bytes],
+    settings: SessionSettings,
+    tmp_path: Path,
+):
+    """Check that a legacy pickled file is rewritten in the indexed format."""
+    settings = settings.copy(update={"SESSION_FS_STORAGE_PATH": tmp_path})
+    tmp_path.joinpath(session_id).write_bytes(Path(session_source.name).read_bytes())
+    backend = await FSBackend.create(session_id, settings=settings)
+    assert not isinstance(backend.data.base, IndexedFile)
+
+    changed, deleted, *unchanged = session_data
+    await backend.update({changed: "changed", "fast": {"api": 1}})
+    await backend.delete(deleted)
+    await backend.save()
+
+    backend = await FSBackend.create(session_id, settings=settings)
+    assert isinstance(backend.data.base, IndexedFile)
+    assert await backend.get(changed, deleted, "fast") == ["changed", None, {"api": 1}]
+    # Generated values may contain NaN, so they are compared in a serialized form
+    assert pickle.dumps(await backend.get(*unchanged)) == pickle.dumps(
+        [session_data[key] for key in unchanged]
+    )
+
+    # Unchanged segments are copied from the mapped file as is
+    await backend.set(changed, "again")
+    await backend.save()
+    backend = await FSBackend.create(session_id, settings=settings)
+    assert len(backend) == len(session_data)
+    assert backend[changed] == "again"
+    assert backend["fast"] == {"api": 1}
+
+
+@pytest.mark.asyncio
+async def test_pickle_format(
+    session_id: str, settings: SessionSettings, tmp_path: Path
+):
+    """Check that session files may still be written in the legacy format."""
+    settings = settings.copy(
+        update={
+            "SESSION_FS_STORAGE_PATH": tmp_path,
+            "SESSION_FS_FORMAT": FSFormatEnum.pickle,
+        }
+    )
+    backend = await FSBackend.create(session_id, settings=settings)
+    await backend.set("fast", "api")
+    await backend.save()
+
+    assert pickle.loads(backend.source.read_bytes()) == {"fast": "api"}
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor():
+    """Check that operations over the queue limit wait for a free worker."""
+    executor = BoundedExecutor(max_workers=2, queue_size=1)
+    running, peak = 0, 0
+
+    def operation() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*(executor.run(operation) for _ in range(10)))
+    executor.shutdown()
+
+    assert peak <= 2
+    assert executor.stats.tasks == 10
+    assert executor.stats.queue_depth == 0
+    assert executor.stats.max_queue_depth <= 1
+    assert executor.stats.wait_time > 0
+
+
+@pytest.mark.asyncio
+async def test_async_files(session_id: str, settings: SessionSettings, tmp_path: Path):
+    """Check that session files are read and written with asynchronous file operations."""
+    executor = BoundedExecutor(max_workers=1)
+    backend = FSBackend(
+        session_id, storage_path=tmp_path, executor=executor, async_files=True
+    )
+    await backend.set("fast", "api")
+    await backend.save()
+    await backend.load()
+
+    assert backend["fast"] == "api"
+    assert [path.name for path in tmp_path.iterdir()] == [session_id]
+    assert executor.stats.tasks > 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_workers,queue_size", [(1, 0), (2, 2)])
+async def test_async_files_bounded_queue(
+    tmp_path: Path, max_workers: int, queue_size: int
+):
+    """Check that concurrent saves don't wait for places they hold themselves."""
+    executor = BoundedExecutor(max_workers=max_workers, queue_size=queue_size)
+    backends = [
+        FSBackend(
+            f"session-{index}",
+            storage_path=tmp_path,
+            executor=executor,
+            async_files=True,
+        )
+        for index in range(8)
+    ]
+    for backend in backends:
+        await backend.set("fast", "api")
+    await asyncio.wait_for(
+        asyncio.gather(*(backend.save() for backend in backends)), timeout=5
+    )
+    assert len(list(tmp_path.iterdir())) == len(backends)
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_session_cache(
+    session_id: str, settings: SessionSettings, tmp_path: Path
+):
+    """Check that unchanged session files are loaded from a cache."""
+    settings = settings.copy(
+        update={"SESSION_FS_STORAGE_PATH": tmp_path, "SESSION_FS_CACHE_SIZE": 8}
+    )
+    cache = FSBackend.get_cache(settings)
+    cache.clear()
+    backend = await FSBackend.create(session_id, settings=settings)
+    await backend.set("fast", "api")
+    await backend.save()
+
+    hits = cache.stats.hits
+    cached = await FSBackend.create(session_id, settings=settings)
+    assert cached["fast"] == "api"
+    assert cache.stats.hits == hits + 1
+    # Cached files aren't memory mapped, so they don't keep file descriptors open
+    assert isinstance(cached.data.base._buffer, bytes)
+
+    # A file replaced by another process invalidates a cached entry
+    other = FSBackend(session_id, storage_path=tmp_path)
+    await other.set("fast", "session")
+    await other.save()
+    assert (await FSBackend.create(session_id, settings=settings))["fast"] == "session"
+    assert cache.stats.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_key_expiration(
+    session_id: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Check that expired keys are hidden and dropped on save."""
+    backend = FSBackend(session_id, storage_path=tmp_path)
+    await backend.set("fast", "api", expire=60)
+    await backend.update({"session": "kept"})
+    assert await backend.get("fast", "session") == ["api", "kept"]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert await backend.get("fast", "session") == [None, "kept"]
+    assert await backend.exists("fast", "session") == 1
+    assert await backend.keys(session_id) == ["session"]
+
+    await backend.save()
+    monkeypatch.undo()
+    await backend.load()
+    assert list(backend._data) == ["session"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_storage(tmp_path: Path):
+    """Check that only expired session files listed by the expiry index are removed."""
+    backends = {}
+    for name, expire in [("expired", 60), ("extended", 60), ("persistent", None)]:
+        backend = backends[name] = FSBackend(name, storage_path=tmp_path, shard_depth=1)
+        await backend.set("fast", "api", expire=expire)
+        await backend.save()
+
+    # A file saved with later expiration is listed in a later bucket
+    await backends["extended"].set("fast", "api", expire=3600)
+    await backends["extended"].save()
+
+    buckets = sorted((tmp_path / ".expiry").iterdir())
+    assert len(buckets) == 2
+    assert sweep_storage(tmp_path, time.time()) == 0
+    assert sweep_storage(tmp_path, time.time() + 180) == 1
+    assert not backends["expired"].source.exists()
+    assert backends["extended"].source.exists()
+    assert backends["persistent"].source.exists()
+    assert len(list((tmp_path / ".expiry").iterdir())) == 1
+
+    assert await backends["extended"].sweep() == 0
+
+
+@pytest.mark.asyncio
+async def test_sweep_empty_files(tmp_path: Path):
+    """Check that emptied session files are listed by the expiry index and removed."""
+    backend = FSBackend("emptied", storage_path=tmp_path)
+    await backend.set("fast", "api")
+    await backend.save()
+    await backend.delete("fast")
+    await backend.save()
+
+    # Emptied files are listed in a bucket which hasn't ended yet
+    assert sweep_storage(tmp_path) == 0
+    assert sweep_storage(tmp_path, time.time() + 60) == 1
+    assert not backend.source.exists()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sweeps(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Check that buckets swept by another worker meanwhile are skipped."""
+    backend = FSBackend("expired", storage_path=tmp_path)
+    await backend.set("fast", "api", expire=60)
+    await backend.save()
+
+    listdir = os.listdir
+    # A bucket listed by both sweepers has been claimed by the other one
+    monkeypatch.setattr(
+        "fastapi_session.backends.fs.os.listdir",
+        lambda path: ["60", *listdir(path)],
+    )
+    assert sweep_storage(tmp_path, time.time() + 180) == 1
+    monkeypatch.undo()
+    assert not backend.source.exists()
+    assert list((tmp_path / ".expiry").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_sweep_unsaved_files(tmp_path: Path, settings: SessionSettings):
+    """Check that files created for sessions which are never saved are removed."""
+    settings = settings.copy(update={"SESSION_FS_STORAGE_PATH": tmp_path})
+    unsaved = await FSBackend.create("unsaved", settings=settings)
+    saved = await FSBackend.create("saved", settings=settings)
+    await saved.set("fast", "api")
+    await saved.save()
+
+    assert sweep_storage(tmp_path, time.time() + 60) == 1
+    assert not unsaved.source.exists()
+    assert saved.source.exists()
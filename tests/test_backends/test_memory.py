@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from fastapi_session import MemoryBackend, SessionSettings
+from fastapi_session.backends import MemoryStore
+
+
+@pytest.mark.asyncio
+async def test_keys_under_namespace():
+    """Check that keys are set, looked up and removed under a namespace."""
+    backend = await MemoryBackend.create(MemoryStore())
+    await backend.update({"session:fast": "api", "session:memory": "store"})
+    await backend.set("other:fast", "other")
+    assert await backend.get("session:fast", "session:missing") == ["api", None]
+    assert sorted(await backend.keys("session")) == ["session:fast", "session:memory"]
+    assert await backend.exists("session:fast", "session:fast", "other:missing") == 1
+    assert await backend.len("session") == 2
+
+    await backend.delete("session:fast")
+    assert await backend.keys("session") == ["session:memory"]
+    await backend.clear("session")
+    assert await backend.len("session") == 0
+    assert len(backend.adapter) == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """Check that least recently used namespaces are evicted as a whole."""
+    store = MemoryStore(max_entries=4, max_bytes=64)
+    backend = await MemoryBackend.create(store)
+    await backend.update({"first:a": "1", "first:b": "2"})
+    await backend.update({"second:a": "1", "second:b": "2"})
+    # A read marks a namespace as recently used
+    await backend.get("first:a")
+    await backend.set("third:a", "3")
+    assert await backend.keys("second") == []
+    assert await backend.len("first") == 2
+    assert store.stats.evictions == 1
+
+    await backend.set("first:c", "x" * 64)
+    assert len(store) <= 4 and store.nbytes <= 64
+    assert await backend.keys("first") == []
+
+
+@pytest.mark.asyncio
+async def test_key_expiration(monkeypatch: pytest.MonkeyPatch):
+    """Check that expired keys are hidden and removed incrementally."""
+    store = MemoryStore()
+    backend = await MemoryBackend.create(store)
+    await backend.update({f"session:{index}": "ttl" for index in range(100)}, expire=60)
+    await backend.set("session:kept", "value")
+    # A reset expiration leaves a stale entry in the heap
+    await backend.set("session:0", "reset", expire=600)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert await backend.get("session:1", "session:0") == [None, "reset"]
+    assert len(store) < 101
+    assert sorted(await backend.keys("session")) == ["session:0", "session:kept"]
+    assert len(store) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_store(settings: SessionSettings):
+    """Check that backends created without a store share a store of a process."""
+    first = await MemoryBackend.create("session-id", settings=settings)
+    second = await MemoryBackend.create("another-id", settings=settings)
+    assert first.adapter is second.adapter
+    assert first.adapter.max_entries == settings.SESSION_MEMORY_MAX_ENTRIES
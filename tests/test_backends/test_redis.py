@@ -3,7 +3,11 @@ import pytest
 import uuid
 import typing
 
-from fastapi_session.backends import RedisBackend
+from fastapi_session.backends import (
+    RedisBackend,
+    RedisHashBackend,
+    migrate_to_hash_layout,
+)
 
 
 @pytest.mark.asyncio
@@ -81,3 +85,95 @@ async def test_clear_session(session_id: uuid.UUID, redis_backend: RedisBackend)
 
     # Check that the session has been flushed
     assert len(await redis_backend.keys(f"{session_id}*")) == 0
+
+
+@pytest.mark.asyncio
+async def test_commit_cleared_session(
+    session_id: uuid.UUID, redis_backend: RedisBackend
+):
+    """Check that a cleared session is replaced with committed keys at once."""
+    await redis_backend.update({f"{session_id}:fast": "api", f"{session_id}:old": "1"})
+    await redis_backend.commit(
+        str(session_id), {f"{session_id}:session": "new"}, [], clear=True
+    )
+    assert await redis_backend.keys(session_id) == [f"{session_id}:session"]
+    await redis_backend.clear(session_id)
+
+
+@pytest.mark.asyncio
+async def test_hash_layout_namespace(
+    session_id: uuid.UUID, redis_hash_backend: RedisHashBackend
+):
+    """Check that all keys of a session are stored in a single hash."""
+    await redis_hash_backend.update(
+        {f"{session_id}:fast": "api", f"{session_id}:session": "hash"}
+    )
+    assert await redis_hash_backend.len(session_id) == 2
+    assert await redis_hash_backend.get(
+        f"{session_id}:session", f"{session_id}:missing"
+    ) == ["hash", None]
+    assert await redis_hash_backend.adapter.type(session_id) == b"hash"
+
+    # A whole session is dropped at once
+    await redis_hash_backend.clear(session_id)
+    assert await redis_hash_backend.keys(session_id) == []
+
+
+@pytest.mark.asyncio
+async def test_migrate_to_hash_layout(
+    session_id: uuid.UUID,
+    redis_backend: RedisBackend,
+    redis_hash_backend: RedisHashBackend,
+):
+    """Check that sessions are moved from string keys to hashes."""
+    key, value = f"{session_id}:fast", "api"
+    await redis_backend.set(key, value)
+
+    assert await migrate_to_hash_layout(redis_backend.adapter, f"{session_id}:*") == 1
+    assert await redis_backend.exists(key) == 0
+    assert await redis_hash_backend.get(key) == [value]
+    assert await redis_backend.adapter.ttl(str(session_id)) == -1
+
+    # A hash expires in the longest TTL of migrated keys
+    await redis_hash_backend.clear(str(session_id))
+    await redis_backend.set(key, value, expire=60)
+    await redis_backend.set(f"{session_id}:other", value, expire=120)
+    assert await migrate_to_hash_layout(redis_backend.adapter, f"{session_id}:*") == 2
+    assert await redis_backend.adapter.ttl(str(session_id)) == 120
+
+
+@pytest.mark.asyncio
+async def test_key_expiration(
+    session_id: uuid.UUID,
+    redis_backend: RedisBackend,
+    redis_hash_backend: RedisHashBackend,
+):
+    """Check that TTLs of keys are mapped to redis expiration."""
+    key = f"{session_id}:fast"
+    await redis_backend.set(key, "api", expire=60)
+    await redis_backend.update({f"{session_id}:session": "string"}, expire=120)
+    assert await redis_backend.adapter.ttl(key) == 60
+    assert await redis_backend.adapter.ttl(f"{session_id}:session") == 120
+
+    await redis_hash_backend.commit(
+        "hash-session",
+        {"hash-session:fast": "api", "hash-session:session": "hash"},
+        [],
+        expire={"hash-session:fast": 60, "hash-session:session": 120},
+    )
+    assert await redis_hash_backend.adapter.ttl("hash-session") == 120
+
+    # A shorter TTL never shortens a session
+    await redis_hash_backend.set("hash-session:cart", "short", expire=10)
+    await redis_hash_backend.update({"hash-session:cart": "short"}, expire=10)
+    assert await redis_hash_backend.adapter.ttl("hash-session") == 120
+    # A key without a TTL is never dropped with a session
+    await redis_hash_backend.set("hash-session:user", "persistent")
+    await redis_hash_backend.commit(
+        "hash-session",
+        {"hash-session:cart": "long"},
+        [],
+        expire={"hash-session:cart": 600},
+    )
+    assert await redis_hash_backend.adapter.ttl("hash-session") == -1
+    await redis_hash_backend.clear("hash-session")
@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from aioredis import Redis, RedisConnection
+
+from fastapi_session import SessionSettings, TieredRedisBackend
+from fastapi_session.enums import NearCacheInvalidationEnum
+
+from ..fakes import FakeRedis
+
+
+async def create_workers(redis: FakeRedis, **options):
+    """Create backends of two workers sharing a single redis server."""
+    settings = SessionSettings(**options)
+    return (
+        await TieredRedisBackend.create(redis, settings=settings),
+        await TieredRedisBackend.create(redis, settings=settings),
+    )
+
+
+@pytest.mark.asyncio
+async def test_near_cache_hits():
+    """Check that repeated reads are served by a near cache without round trips."""
+    redis = FakeRedis()
+    backend, other = await create_workers(redis)
+    await backend.update({"session:fast": "api"})
+    assert await backend.get("session:fast", "session:missing") == ["api", None]
+
+    round_trips = redis.round_trips
+    for _ in range(3):
+        assert await backend.get("session:fast", "session:missing") == ["api", None]
+    assert redis.round_trips == round_trips
+    assert backend.stats.hit_ratio == 0.75
+
+    # Own writes go through to redis and keep the near cache up to date
+    await backend.set("session:fast", "cache")
+    assert await backend.get("session:fast") == ["cache"]
+    assert await backend.keys("session") == ["session:fast"]
+    await backend.close()
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_pubsub_invalidation():
+    """Check that writes of a worker are published to near caches of other workers."""
+    redis = FakeRedis()
+    writer, reader = await create_workers(redis)
+    await writer.update({"session:fast": "api", "session:other": "value"})
+    assert await reader.get("session:fast", "session:other") == ["api", "value"]
+
+    await writer.set("session:fast", "changed")
+    await writer.delete("session:other")
+    await asyncio.sleep(0.01)
+    assert await reader.get("session:fast", "session:other") == ["changed", None]
+
+    await writer.clear("session")
+    await asyncio.sleep(0.01)
+    assert await reader.get("session:fast") == [None]
+    await writer.close()
+    await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_version_invalidation(monkeypatch: pytest.MonkeyPatch):
+    """Check that changed namespaces are re-read once a staleness window passes."""
+    now = 1000.0
+    monkeypatch.setattr("fastapi_session.backends.tiered.time.monotonic", lambda: now)
+    redis = FakeRedis()
+    writer, reader = await create_workers(
+        redis,
+        SESSION_NEAR_CACHE_INVALIDATION=NearCacheInvalidationEnum.version,
+        SESSION_NEAR_CACHE_STALENESS=1.0,
+    )
+    await writer.commit("session", {"session:fast": "api"}, [])
+    assert await reader.get("session:fast") == ["api"]
+    assert await writer.get("session:fast") == ["api"]
+
+    await writer.commit("session", {"session:fast": "changed"}, [])
+    # A stale value is served within the staleness window only
+    assert await reader.get("session:fast") == ["api"]
+    now += 1.0
+    assert await reader.get("session:fast") == ["changed"]
+    # A writer keeps its near cache as long as nobody else changes a namespace
+    round_trips = redis.round_trips
+    assert await writer.get("session:fast") == ["changed"]
+    assert redis.round_trips == round_trips + 1
+    assert writer.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_version_expiration(monkeypatch: pytest.MonkeyPatch):
+    """Check that near-cached values expire with their keys in redis."""
+    now = 1000.0
+    monkeypatch.setattr("fastapi_session.backends.tiered.time.monotonic", lambda: now)
+    redis = FakeRedis()
+    writer, reader = await create_workers(
+        redis,
+        SESSION_NEAR_CACHE_INVALIDATION=NearCacheInvalidationEnum.version,
+        SESSION_NEAR_CACHE_STALENESS=1.0,
+    )
+    await writer.commit(
+        "session", {"session:fast": "api"}, [], expire={"session:fast": 5}
+    )
+    await writer.set("session:other", "value", expire=10)
+    assert await reader.get("session:fast") == ["api"]
+    assert await writer.get("session:fast", "session:other") == ["api", "value"]
+
+    # Expired keys don't change versions of namespaces
+    await redis.delete("session:fast")
+    now += 2.0
+    assert await reader.get("session:fast") == ["api"]
+    assert await writer.get("session:fast") == ["api"]
+    now += 3.0
+    assert await reader.get("session:fast") == [None]
+    assert await writer.get("session:fast") == [None]
+    await writer.close()
+    await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_single_connection():
+    """Check that pubsub invalidation isn't subscribed on a single connection."""
+    with pytest.raises(ValueError):
+        await TieredRedisBackend.create(Redis(Mock(spec=RedisConnection)))
@@ -0,0 +1,22 @@
+"""A set of tests for in-process caches."""
+
+from fastapi_session.caches import LRUCache
+
+
+def test_lru_eviction():
+    """Check that least recently used entries are evicted over the limits."""
+    cache = LRUCache(max_entries=2, max_bytes=10)
+    cache.set("a", 1, size=4)
+    cache.set("b", 2, size=4)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3, size=4)
+    assert "b" not in cache
+    assert cache.nbytes == 8
+
+    cache.set("d", 4, size=8)
+    assert list(map(cache.get, "acd")) == [None, None, 4]
+    assert cache.get("d", valid=lambda value: value != 4) is None
+    assert len(cache) == 0
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 3, 3)
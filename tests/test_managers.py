@@ -1,5 +1,7 @@
+import asyncio
 import pytest
 import secrets
+import time
 import typing
 from base64 import b64encode
 from unittest.mock import AsyncMock, Mock
@@ -13,6 +15,9 @@ from fastapi_session import (
     encrypt_session,
     FSBackend,
     get_session_manager,
+    InvalidCookieException,
+    REDIS_BACKEND_TYPE,
+    RedisBackend,
     SessionManager,
     SessionSettings,
 )
@@ -97,3 +102,85 @@ def test_close_session(
         )
         assert response.status_code == status.HTTP_200_OK
         assert settings.SESSION_COOKIE_NAME not in response.cookies
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_factory(
+    secret: str,
+    signer: typing.Type[Fernet],
+    settings: SessionSettings,
+):
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_BACKEND": REDIS_BACKEND_TYPE}),
+        backend_adapter=Mock(),
+    )
+
+    first_session = await manager.load_session(
+        request=Mock(), session_id=secrets.token_urlsafe(8)
+    )
+    second_session = await manager.load_session(
+        request=Mock(), session_id=secrets.token_urlsafe(8)
+    )
+
+    assert isinstance(first_session._backend, RedisBackend) is True
+    assert first_session._backend is second_session._backend
+
+
+@pytest.mark.asyncio
+async def test_concurrent_shared_backend_creation(
+    secret: str,
+    signer: typing.Type[Fernet],
+    settings: SessionSettings,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Check that concurrent first requests create a single shared backend."""
+    created = []
+    create = RedisBackend.create
+
+    async def slow_create(*args, **kwargs) -> RedisBackend:
+        await asyncio.sleep(0.01)
+        created.append(await create(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(RedisBackend, "create", slow_create)
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_BACKEND": REDIS_BACKEND_TYPE}),
+        backend_adapter=Mock(),
+    )
+    sessions = await asyncio.gather(
+        *(
+            manager.load_session(request=Mock(), session_id=secrets.token_urlsafe(8))
+            for _ in range(4)
+        )
+    )
+    assert len(created) == 1
+    assert all(session._backend is created[0] for session in sessions)
+
+
+@pytest.mark.asyncio
+async def test_cookie_cache(
+    secret: str,
+    signer: typing.Type[Fernet],
+    session_id: str,
+    settings: SessionSettings,
+):
+    """Check that a verified cookie is cached and its age is still checked."""
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_COOKIE_MAX_AGE": 60}),
+    )
+    token = encrypt_session(signer, session_id, time.time() - 30)
+    request = Mock(cookies={settings.SESSION_COOKIE_NAME: token})
+
+    assert manager.get_cookie(request) == session_id
+    assert manager.get_cookie(request) == session_id
+    assert manager.cookie_cache.stats.hits == 1
+    assert manager.cookie_cache.stats.misses == 1
+
+    with pytest.raises(InvalidCookieException):
+        manager.get_cookie(request, max_age=10)
@@ -0,0 +1,104 @@
+"""A set of tests for instrumentation of session operations."""
+import typing
+
+import pytest
+from cryptography.fernet import Fernet
+from fastapi import Depends, FastAPI, Response, status
+from httpx import AsyncClient
+
+from fastapi_session import (
+    AsyncSession,
+    InstrumentedBackend,
+    MEMORY_BACKEND_TYPE,
+    NoopMetricsSink,
+    PrometheusMetricsSink,
+    SessionManager,
+    SessionMiddleware,
+    SessionSettings,
+    encrypt_session,
+    get_user_session,
+)
+
+
+def test_prometheus_rendering():
+    """Check that operations are exported as histograms and counters."""
+    sink = PrometheusMetricsSink(buckets=(0.001, 0.01))
+    sink.record("backend.get", 0.0005, size=10)
+    sink.record("backend.get", 0.005, size=5)
+    sink.record("manager.decode_cookie", 0.1, error=True)
+    assert sink.render().splitlines() == [
+        "# HELP fastapi_session_operation_seconds Durations of session operations.",
+        "# TYPE fastapi_session_operation_seconds histogram",
+        'fastapi_session_operation_seconds_bucket{operation="backend.get",le="0.001"} 1',
+        'fastapi_session_operation_seconds_bucket{operation="backend.get",le="0.01"} 2',
+        'fastapi_session_operation_seconds_bucket{operation="backend.get",le="+Inf"} 2',
+        'fastapi_session_operation_seconds_sum{operation="backend.get"} 0.0055',
+        'fastapi_session_operation_seconds_count{operation="backend.get"} 2',
+        'fastapi_session_operation_seconds_bucket{operation="manager.decode_cookie",le="0.001"} 0',
+        'fastapi_session_operation_seconds_bucket{operation="manager.decode_cookie",le="0.01"} 0',
+        'fastapi_session_operation_seconds_bucket{operation="manager.decode_cookie",le="+Inf"} 1',
+        'fastapi_session_operation_seconds_sum{operation="manager.decode_cookie"} 0.1',
+        'fastapi_session_operation_seconds_count{operation="manager.decode_cookie"} 1',
+        "# HELP fastapi_session_operation_errors_total Session operations which have raised an exception.",
+        "# TYPE fastapi_session_operation_errors_total counter",
+        'fastapi_session_operation_errors_total{operation="backend.get"} 0',
+        'fastapi_session_operation_errors_total{operation="manager.decode_cookie"} 1',
+        "# HELP fastapi_session_payload_bytes_total Bytes read or written by session operations.",
+        "# TYPE fastapi_session_payload_bytes_total counter",
+        'fastapi_session_payload_bytes_total{operation="backend.get"} 15',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_instrumented_requests(
+    signer: typing.Type[Fernet], secret: str, session_id: str, app: FastAPI
+):
+    """Check that session operations of a request are recorded into a sink."""
+
+    async def index(session: AsyncSession = Depends(get_user_session)) -> Response:
+        await session.set("visits", 1)
+        assert list(await session.get("visits")) == [1]
+        return Response(status_code=status.HTTP_200_OK)
+
+    sink = PrometheusMetricsSink()
+    settings = SessionSettings(SESSION_BACKEND=MEMORY_BACKEND_TYPE)
+    manager = SessionManager(
+        secret=secret, signer=signer, settings=settings, metrics=sink
+    )
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.session = manager
+    app.add_api_route("/", index)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get(
+            "/",
+            cookies={settings.SESSION_COOKIE_NAME: encrypt_session(signer, session_id)},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    metrics = sink.render()
+    for operation in (
+        "middleware.load_session",
+        "middleware.persist_session",
+        "manager.decode_cookie",
+        "manager.create_namespace",
+        "manager.create_backend",
+        "backend.set",
+        "backend.get",
+        "backend.persist",
+    ):
+        assert f'_count{{operation="{operation}"}} 1' in metrics
+    assert 'payload_bytes_total{operation="backend.get"}' in metrics
+
+
+@pytest.mark.asyncio
+async def test_disabled_instrumentation(
+    signer: typing.Type[Fernet], secret: str, session_id: str
+):
+    """Check that backends aren't wrapped unless instrumentation is enabled."""
+    settings = SessionSettings(SESSION_BACKEND=MEMORY_BACKEND_TYPE)
+    manager = SessionManager(
+        secret=secret, signer=signer, settings=settings, metrics=NoopMetricsSink()
+    )
+    assert manager.metrics is None
+    session = await manager.load_session(None, session_id)
+    assert not isinstance(session._backend, InstrumentedBackend)
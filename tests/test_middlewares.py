@@ -1,5 +1,6 @@
 import typing
 import secrets
+import time
 from base64 import b64encode
 from datetime import datetime
 from hashlib import sha256
@@ -8,10 +9,15 @@ from unittest.mock import AsyncMock
 import pytest
 from cryptography.fernet import Fernet
 from fastapi import FastAPI, Request, Depends, Response, HTTPException, status
+from fastapi.responses import JSONResponse
 from fastapi_session import (
+    COOKIE_BACKEND_TYPE,
+    AsyncSession,
     decrypt_session,
     encrypt_session,
+    FSBackend,
     get_session_manager,
+    get_user_session,
     InvalidCookieException,
     SessionManager,
     SessionSettings,
@@ -34,6 +40,10 @@ async def test_handling_valid_cookie(
     Check that a session middleware handles a request with a valid cookie
     """
 
+
+    async def index(session: AsyncSession = Depends(get_user_session)) -> Response:
+        return Response(status_code=status.HTTP_200_OK)
+
     on_load_cookie_mock = AsyncMock(return_value=session_id)
 
     manager = SessionManager(
@@ -46,14 +56,55 @@ async def test_handling_valid_cookie(
         SessionMiddleware,
         manager=manager,
     )
+    app.session = manager
+    app.add_api_route("/", index)
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         response = await client.get(
             "/",
             cookies={settings.SESSION_COOKIE_NAME: encrypt_session(signer, session_id)},
         )
+        assert response.status_code == status.HTTP_200_OK
         assert on_load_cookie_mock.called is True
 
 
+@pytest.mark.asyncio
+async def test_lazy_session_loading(
+    signer: typing.Type[Fernet],
+    secret: str,
+    session_id: str,
+    app: FastAPI,
+    settings: SessionSettings,
+    mocker: MockerFixture,
+):
+    """
+    Check that a session middleware doesn't load a session unused by an endpoint
+    """
+
+    async def index(request: Request) -> Response:
+        assert request["session"].loaded is False
+        return Response(status_code=status.HTTP_200_OK)
+
+    on_load_cookie_mock = AsyncMock(return_value=session_id)
+    create_backend = mocker.spy(FSBackend, "create")
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings,
+        on_load_cookie=on_load_cookie_mock,
+    )
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.add_api_route("/", index)
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get(
+            "/",
+            cookies={settings.SESSION_COOKIE_NAME: encrypt_session(signer, session_id)},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert on_load_cookie_mock.called is False
+        assert create_backend.called is False
+
+
 @pytest.mark.asyncio
 async def test_handling_invalid_cookie(
     signer: typing.Type[Fernet],
@@ -126,3 +177,160 @@ async def test_ignoring_invalid_cookie(
             },
         )
         assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_committing_buffered_writes(
+    signer: typing.Type[Fernet],
+    secret: str,
+    session_id: str,
+    app: FastAPI,
+    settings: SessionSettings,
+    mocker: MockerFixture,
+):
+    """
+    Check that a session middleware applies buffered changes once a response starts
+    """
+
+    async def index(request: Request) -> Response:
+        await request["session"].set("fast", "api")
+        await request["session"].set("session", "buffered")
+        return Response(status_code=status.HTTP_200_OK)
+
+    commit = mocker.spy(FSBackend, "commit")
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_BUFFERED_WRITES": True}),
+    )
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.add_api_route("/", index)
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get(
+            "/",
+            cookies={settings.SESSION_COOKIE_NAME: encrypt_session(signer, session_id)},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        commit.assert_called_once()
+        assert len(commit.call_args.args[2]) == 2
+
+
+@pytest.mark.asyncio
+async def test_persisting_changed_session(
+    signer: typing.Type[Fernet],
+    secret: str,
+    app: FastAPI,
+    settings: SessionSettings,
+):
+    """
+    Check that a session middleware saves a changed session once and skips unchanged ones
+    """
+
+    async def write(session: AsyncSession = Depends(get_user_session)) -> Response:
+        await session.set("fast", "api")
+        return Response(status_code=status.HTTP_200_OK)
+
+    async def read(session: AsyncSession = Depends(get_user_session)) -> Response:
+        return JSONResponse(list(await session.get("fast")))
+
+    manager = SessionManager(secret=secret, signer=signer, settings=settings)
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.session = manager
+    app.add_api_route("/write", write)
+    app.add_api_route("/read", read)
+
+    cookies = {
+        settings.SESSION_COOKIE_NAME: encrypt_session(signer, secrets.token_hex(8))
+    }
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        await client.get("/write", cookies=cookies)
+        response = await client.get("/read", cookies=cookies)
+
+        assert response.json() == ["api"]
+        assert manager.stats.persisted_writes == 1
+        assert manager.stats.skipped_writes == 1
+
+
+@pytest.mark.asyncio
+async def test_sliding_cookie_refresh(
+    signer: typing.Type[Fernet],
+    secret: str,
+    session_id: str,
+    app: FastAPI,
+    settings: SessionSettings,
+):
+    """
+    Check that a session cookie is re-issued only after the refresh fraction of its max age
+    """
+
+    async def index() -> Response:
+        return Response(status_code=status.HTTP_200_OK)
+
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(
+            update={
+                "SESSION_COOKIE_MAX_AGE": 100,
+                "SESSION_COOKIE_REFRESH_FRACTION": 0.5,
+            }
+        ),
+    )
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.session = manager
+    app.add_api_route("/", index)
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        fresh = encrypt_session(signer, session_id, time.time() - 10)
+        response = await client.get("/", cookies={manager.cookie_name: fresh})
+        assert manager.cookie_name not in response.cookies
+
+        stale = encrypt_session(signer, session_id, time.time() - 60)
+        response = await client.get("/", cookies={manager.cookie_name: stale})
+        token = response.cookies[manager.cookie_name]
+        assert decrypt_session(signer, token, 10) == session_id
+
+    assert manager.stats.avoided_refreshes == 1
+    assert manager.stats.refreshed_cookies == 1
+
+
+@pytest.mark.asyncio
+async def test_cookie_backend_session(
+    signer: typing.Type[Fernet],
+    secret: str,
+    session_id: str,
+    app: FastAPI,
+    settings: SessionSettings,
+):
+    """
+    Check that a session kept in cookies is written out and read back by the middleware
+    """
+
+    async def write(session: AsyncSession = Depends(get_user_session)) -> Response:
+        await session.set("counter", 1)
+        return Response(status_code=status.HTTP_200_OK)
+
+    async def read(session: AsyncSession = Depends(get_user_session)) -> Response:
+        (counter,) = await session.get("counter")
+        return JSONResponse({"counter": counter})
+
+    manager = SessionManager(
+        secret=secret,
+        signer=signer,
+        settings=settings.copy(update={"SESSION_BACKEND": COOKIE_BACKEND_TYPE}),
+    )
+    app.add_middleware(SessionMiddleware, manager=manager)
+    app.session = manager
+    app.add_api_route("/write", write)
+    app.add_api_route("/read", read)
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        client.cookies[manager.cookie_name] = encrypt_session(signer, session_id)
+        response = await client.get("/write")
+        assert f"{manager.cookie_name}_0" in response.cookies
+        response = await client.get("/read")
+        assert response.json() == {"counter": 1}
+        assert f"{manager.cookie_name}_0" not in response.cookies
+
+    assert manager.stats.persisted_writes == 1
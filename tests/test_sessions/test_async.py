@@ -1,4 +1,14 @@
-from fastapi_session import AsyncSession, FSBackend, RedisBackend
+import pytest
+from pytest_mock import MockerFixture
+
+from fastapi_session import (
+    AES_SIV_Encryptor,
+    AsyncSession,
+    create_namespace,
+    FSBackend,
+    RedisBackend,
+)
+from fastapi_session.encryptors import AEADEncryptor
 
 
 def test_create_fs_backend(fs_session: AsyncSession):
@@ -10,3 +20,135 @@ def test_create_redis_backend(redis_session: AsyncSession):
 
 
 # @TODO: Add unit tests for AsyncSession operations
+
+
+@pytest.mark.asyncio
+async def test_buffered_writes(
+    session_id: str,
+    encryptor: AES_SIV_Encryptor,
+    fs_backend: FSBackend,
+    mocker: MockerFixture,
+):
+    """Check that a buffered session serves its own writes and applies them at once."""
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=fs_backend,
+        buffered=True,
+    )
+    commit = mocker.spy(fs_backend, "commit")
+
+    await session.set("fast", "api")
+    await session.update({"session": "buffered", "removed": True})
+    await session.delete("removed")
+
+    assert list(await session.get("fast", "session", "removed")) == [
+        "api",
+        "buffered",
+        None,
+    ]
+    assert await session.exists("fast", "removed") == 1
+    assert await fs_backend.exists(session._key("fast")) == 0
+
+    await session.commit()
+    await session.commit()
+
+    commit.assert_called_once()
+    assert await fs_backend.exists(session._key("fast")) == 1
+    assert await fs_backend.exists(session._key("removed")) == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_encryption(
+    session_id: str,
+    encryptor: AES_SIV_Encryptor,
+    fs_backend: FSBackend,
+    mocker: MockerFixture,
+):
+    """Check that values are encrypted in batches and large ones are offloaded."""
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=fs_backend,
+        offload_threshold=3,
+    )
+    run_in_executor = mocker.spy(session._loop, "run_in_executor")
+    encrypt_many = mocker.spy(encryptor, "encrypt_many")
+
+    await session.update({"fast": "api", "session": 1})
+    assert run_in_executor.call_count == 0
+    await session.update({f"key{index}": index for index in range(3)})
+    assert run_in_executor.call_count == 1
+    assert encrypt_many.call_count == 2
+
+    values = await session.get("fast", "missing", "session", "key2")
+    assert list(values) == ["api", None, 1, 2]
+    assert encryptor.decrypt_many(encryptor.encrypt_many(["a", "b"])) == [b"a", b"b"]
+
+
+@pytest.mark.asyncio
+async def test_aead_session(
+    session_id: str, secret: str, salt: str, fs_backend: FSBackend
+):
+    """Check that values are bound to their storage keys by an AEAD encryptor."""
+    encryptor = AEADEncryptor(secret, salt)
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=fs_backend,
+    )
+    await session.set("fast", "api")
+    await session.update({"session": 1, "cart": ["apple"]})
+    assert list(await session.get("fast", "session", "cart")) == ["api", 1, ["apple"]]
+
+    # A value moved under another key is rejected
+    (value,) = await fs_backend.get(session._key("fast"))
+    await fs_backend.set(session._key("session"), value)
+    with pytest.raises(ValueError):
+        list(await session.get("session"))
+
+
+@pytest.mark.asyncio
+async def test_session_ttl(
+    session_id: str,
+    encryptor: AES_SIV_Encryptor,
+    fs_backend: FSBackend,
+):
+    """Check that values expire in a passed TTL or in the session TTL."""
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=fs_backend,
+        ttl=60,
+    )
+    await session.set("fast", "api")
+    await session.update({"session": "ttl"}, ttl=120)
+    expires = fs_backend._expires
+    assert 0 < expires[session._key("session")] - expires[session._key("fast")] <= 61
+
+    session._buffered = True
+    await session.set("fast", "api", ttl=0)
+    await session.set("buffered", "ttl")
+    await session.commit()
+    assert session._key("fast") not in expires
+    assert session._key("buffered") in expires
+
+
+@pytest.mark.asyncio
+async def test_buffered_options(
+    session_id: str,
+    encryptor: AES_SIV_Encryptor,
+    fs_backend: FSBackend,
+):
+    """Check that backend options aren't silently dropped by a buffered session."""
+    session = await AsyncSession.create(
+        namespace=create_namespace(encryptor, session_id),
+        encryptor=encryptor,
+        backend=fs_backend,
+        buffered=True,
+    )
+    with pytest.raises(TypeError):
+        await session.set("fast", "api", exist="SET_IF_NOT_EXIST")
+    with pytest.raises(TypeError):
+        await session.update({"fast": "api"}, pexpire=1000)
+    assert await session.exists("fast") == 0
@@ -7,6 +7,7 @@ from fastapi_session import (
     FS_BACKEND_TYPE,
     FSBackend,
     BackendImportException,
+    resolve_backend,
 )
 
 
@@ -22,3 +23,8 @@ def test_import_backend():
 def test_import_backend_error(backend_path: str):
     with pytest.raises(BackendImportException):
         import_backend(backend_path)
+
+
+def test_resolve_unsupported_backend():
+    with pytest.raises(TypeError):
+        resolve_backend("fastapi_session.AsyncSession")
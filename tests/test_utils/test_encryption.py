@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 
 import pendulum
 from cryptography.fernet import Fernet, InvalidToken, InvalidSignature
+from pydantic import ValidationError
 
 from fastapi_session import (
     AES_SIV_Encryptor,
@@ -12,6 +13,8 @@ from fastapi_session import (
     encrypt_session,
     SessionSettings,
 )
+from fastapi_session.encryptors import AEADEncryptor, BLAKE2bKeyEncoder, HMACKeyEncoder
+from fastapi_session.enums import EncryptorEnum
 
 
 def test_create_namespace(encryptor: AES_SIV_Encryptor, subtests: typing.Any):
@@ -78,3 +81,85 @@ def test_token_invalidation_by_ttl(
 ):
     with pytest.raises(InvalidToken):
         decrypt_session(signer, token, ttl)
+
+
+def test_memoized_key_encryption(secret: str, salt: str, session_id: str):
+    """Check that encrypted keys and namespaces are memoized in separate caches."""
+    encryptor = AES_SIV_Encryptor(secret, salt, key_cache_size=1)
+    namespace = create_namespace(encryptor, session_id)
+    key = encryptor.encrypt_key("user_id")
+
+    assert create_namespace(encryptor, session_id) == namespace
+    assert namespace == encryptor.encrypt(session_id)
+    assert encryptor.encrypt_key("user_id") == key == encryptor.encrypt("user_id")
+    assert encryptor.key_cache.stats.hits == 1
+    assert encryptor.key_cache.stats.misses == 1
+    assert encryptor.key_cache.stats.hit_ratio == 0.5
+    # Session ids of other users never evict key names
+    for index in range(8):
+        create_namespace(encryptor, f"{session_id}-{index}")
+    encryptor.encrypt_key("user_id")
+    assert encryptor.key_cache.stats.hits == 2
+    assert encryptor.namespace_cache.stats.hits == 1
+
+
+def test_compact_encryption(secret: str, salt: str, encryptor: AES_SIV_Encryptor):
+    """Check that compact messages are smaller and legacy ones are still decrypted."""
+    compact = AES_SIV_Encryptor(secret, salt, compact=True)
+    message = '{"user_id": 42, "cart": ["apple", "pear"]}'
+    legacy = encryptor.encrypt(message)
+    encrypted = compact.encrypt(message)
+
+    assert len(encrypted) < len(legacy) * 0.6
+    for value in (encrypted, compact.encrypt_bytes(message), legacy):
+        assert compact.decrypt(value) == message.encode("utf-8")
+    assert encryptor.decrypt(encrypted) == message.encode("utf-8")
+
+
+@pytest.mark.parametrize("key_encoder_class", [HMACKeyEncoder, BLAKE2bKeyEncoder])
+def test_key_encoders(
+    secret: str, salt: str, session_id: str, key_encoder_class: typing.Type
+):
+    """Check that key names are fixed-length keyed digests."""
+    key_encoder = key_encoder_class(secret, digest_size=12)
+    encryptor = AES_SIV_Encryptor(secret, salt, key_encoder=key_encoder)
+
+    names = {encryptor.encrypt_key(key) for key in ("user_id", "cart", "x" * 100)}
+    assert len(names) == 3
+    assert {len(name) for name in names} == {16}
+    assert create_namespace(encryptor, session_id) == key_encoder.encode(session_id)
+    assert key_encoder_class("other").encode("cart") != key_encoder.encode("cart")
+    with pytest.raises(ValueError):
+        key_encoder_class(secret, digest_size=key_encoder_class.max_digest_size + 1)
+
+
+def test_key_digest_size_setting():
+    """Check that a digest size is limited by a digest of a configured key encoder."""
+    settings = SessionSettings(
+        SESSION_KEY_ENCODER="blake2b", SESSION_KEY_DIGEST_SIZE=64
+    )
+    assert settings.SESSION_KEY_DIGEST_SIZE == 64
+    for size in (0, 33):
+        with pytest.raises(ValidationError):
+            SessionSettings(
+                SESSION_KEY_ENCODER="hmac_sha256", SESSION_KEY_DIGEST_SIZE=size
+            )
+
+
+@pytest.mark.parametrize(
+    "algorithm", [EncryptorEnum.chacha20_poly1305, EncryptorEnum.aes_gcm_siv]
+)
+def test_aead_encryption(secret: str, salt: str, algorithm: EncryptorEnum):
+    """Check that AEAD messages are bound to their associated data."""
+    encryptor = AEADEncryptor(secret, salt, algorithm=algorithm)
+    messages = ['{"user_id": 42}', "x" * 4096]
+    keys = [b"namespace:user_id", b"namespace:cart"]
+    encrypted = encryptor.encrypt_many(messages, keys)
+
+    assert encryptor.encrypt(messages[0]) != encryptor.encrypt(messages[0])
+    assert encryptor.decrypt_many(encrypted, keys) == [
+        message.encode("utf-8") for message in messages
+    ]
+    with pytest.raises(ValueError):
+        encryptor.decrypt(encrypted[0], keys[1])
+    assert encryptor.encrypt_key("cart") == HMACKeyEncoder(secret).encode("cart")